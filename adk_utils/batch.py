@@ -0,0 +1,295 @@
+"""
+Offline batch runner: pushes a JSONL file of prompts through an agent.
+
+Each prompt runs as one turn in a session of its own (so answers never see
+each other's history), through Runner.run_async. At most `concurrency` prompts
+are in flight at a time, and the input is read lazily, so a file of any size
+runs in constant memory.
+
+  - timeouts: each attempt gets `timeout` seconds;
+  - retries:  a failed or timed-out attempt is retried up to `max_retries` times
+              in a fresh session, after an exponential backoff with jitter
+              (base * 2^attempt, capped at `max_backoff`);
+  - output:   one JSON line per prompt, appended as soon as it completes
+              (completion order, not input order);
+  - resume:   the output file doubles as the checkpoint. On start, ids already
+              in it are skipped, and a half-written last line from a crash is
+              cut off. Rerunning the same command after a crash picks up where it
+              stopped. Pass --retry-failed to run prompts recorded as errors again;
+              their new record is appended, and the last record for an id wins.
+
+Input lines are {"id": ..., "prompt": "..."} (also accepted: "text" or "message"
+for the prompt) or a bare JSON string; without an id, the line number is used.
+Output lines are:
+
+    {"id": ..., "prompt": "...", "status": "ok" | "error", "response": "...",
+     "tool_results": [{"name": ..., "response": {...}}], "error": null,
+     "attempts": 1, "latency_ms": 812.4}
+
+Usage (from the repository root):
+    python -m adk_utils.batch settyl invoices.jsonl results.jsonl --concurrency 16 --timeout 60
+    python -m adk_utils.batch settyl invoices.jsonl results.jsonl --stub-llm   # offline, see adk_utils.stub_llm
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+import uuid
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
+
+from google.adk.agents.run_config import RunConfig
+from google.adk.runners import Runner
+from google.genai import types
+
+from .loadgen import load_root_agent
+from .sqlite_session_service import create_session_service
+from .stub_llm import use_stub_llm
+
+PROMPT_KEYS = ("prompt", "text", "message")
+
+
+# --- Part 1: Input, Output and Checkpoint ---
+
+def read_prompts(path: str) -> Iterator[Tuple[str, str]]:
+    """
+    Yields (id, prompt) pairs from a JSONL file, one line at a time.
+
+    Raises:
+        ValueError: If a line is not JSON or has no prompt.
+    """
+    with open(path, encoding="utf-8") as f:
+        for line_number, line in enumerate(f, start=1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError as e:
+                raise ValueError(f"{path}:{line_number}: not valid JSON ({e})") from e
+            if isinstance(record, str):
+                yield str(line_number), record
+                continue
+            prompt = next((record[key] for key in PROMPT_KEYS if isinstance(record.get(key), str)), None)
+            if prompt is None:
+                raise ValueError(f"{path}:{line_number}: no {' / '.join(PROMPT_KEYS)} field")
+            yield str(record.get("id", line_number)), prompt
+
+
+def load_checkpoint(path: str, retry_failed: bool = False) -> Set[str]:
+    """
+    Reads the ids already finished in an output file.
+
+    A last line without its newline is what a crash mid-write leaves behind; it
+    is truncated away so the next record starts on a clean line.
+
+    Args:
+        path (str): The output JSONL file. A missing file means nothing is done.
+        retry_failed (bool): Leave ids whose last record is an error out of the set.
+
+    Returns:
+        Set[str]: Ids to skip.
+    """
+    if not os.path.exists(path):
+        return set()
+    with open(path, "rb") as f:
+        data = f.read()
+    complete = data.rfind(b"\n") + 1
+    if complete < len(data):
+        with open(path, "r+b") as f:
+            f.truncate(complete)
+
+    status: Dict[str, str] = {}
+    for line in data[:complete].splitlines():
+        try:
+            record = json.loads(line)
+        except json.JSONDecodeError:
+            continue
+        if isinstance(record, dict) and "id" in record:
+            status[str(record["id"])] = record.get("status", "ok")
+    return {record_id for record_id, state in status.items() if not (retry_failed and state != "ok")}
+
+
+class ResultWriter:
+    """
+    Appends result records to a JSONL file.
+
+    Every record is flushed when written; every `sync_every` records (and on
+    close) the file is also fsync'ed, so at most that many finished prompts are
+    redone after a power loss. A process crash loses nothing that was flushed.
+    """
+
+    def __init__(self, path: str, sync_every: int = 50):
+        self.path = path
+        self.sync_every = sync_every
+        self._file = open(path, "a", encoding="utf-8")
+        self._unsynced = 0
+
+    def write(self, record: Dict[str, Any]) -> None:
+        self._file.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+        self._file.flush()
+        self._unsynced += 1
+        if self._unsynced >= self.sync_every:
+            os.fsync(self._file.fileno())
+            self._unsynced = 0
+
+    def close(self) -> None:
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._file.close()
+
+
+# --- Part 2: Running One Prompt ---
+
+def backoff_delay(attempt: int, base: float, cap: float) -> float:
+    """Seconds to wait before retry number `attempt` (1-based): full jitter over base * 2^(attempt-1), capped."""
+    return random.uniform(0, min(cap, base * 2 ** (attempt - 1)))
+
+
+async def _run_once(runner: Runner, user_id: str, prompt: str,
+                    run_config: Optional[RunConfig]) -> Tuple[str, List[Dict[str, Any]]]:
+    """One turn in a new session. Returns the final reply text and the tool results."""
+    session_id = f"batch-{uuid.uuid4().hex}"
+    session_service = runner.session_service
+    await session_service.create_session(app_name=runner.app_name, user_id=user_id, session_id=session_id)
+    content = types.Content(role="user", parts=[types.Part(text=prompt)])
+    reply = ""
+    tool_results: List[Dict[str, Any]] = []
+    try:
+        async for event in runner.run_async(user_id=user_id, session_id=session_id, new_message=content,
+                                            run_config=run_config or RunConfig()):
+            for response in event.get_function_responses():
+                tool_results.append({"name": response.name, "response": response.response or {}})
+            if event.is_final_response() and event.content and event.content.parts:
+                reply = "".join(part.text for part in event.content.parts if part.text and not part.thought)
+    finally:
+        # The batch never revisits a session; don't let thousands of them pile up.
+        await session_service.delete_session(app_name=runner.app_name, user_id=user_id, session_id=session_id)
+    return reply, tool_results
+
+
+async def run_prompt(runner: Runner, prompt_id: str, prompt: str, timeout: Optional[float] = 120.0,
+                     max_retries: int = 3, backoff_base: float = 1.0, max_backoff: float = 60.0,
+                     user_id: str = "batch_user", run_config: Optional[RunConfig] = None) -> Dict[str, Any]:
+    """
+    Runs one prompt with timeout and retries, and returns its output record.
+
+    Errors never propagate: after the last attempt the record has status 'error'
+    and the message of the last failure.
+    """
+    start = time.perf_counter()
+    error: Optional[str] = None
+    attempt = 0
+    while attempt <= max_retries:
+        if attempt:
+            await asyncio.sleep(backoff_delay(attempt, backoff_base, max_backoff))
+        attempt += 1
+        try:
+            reply, tool_results = await asyncio.wait_for(_run_once(runner, user_id, prompt, run_config), timeout)
+        except asyncio.TimeoutError:
+            error = f"TimeoutError: no reply within {timeout} s"
+            continue
+        except Exception as e:  # retried; recorded if it keeps failing
+            error = f"{type(e).__name__}: {e}"
+            continue
+        return {"id": prompt_id, "prompt": prompt, "status": "ok", "response": reply, "tool_results": tool_results,
+                "error": None, "attempts": attempt, "latency_ms": (time.perf_counter() - start) * 1000}
+    return {"id": prompt_id, "prompt": prompt, "status": "error", "response": None, "tool_results": [],
+            "error": error, "attempts": attempt, "latency_ms": (time.perf_counter() - start) * 1000}
+
+
+# --- Part 3: The Batch ---
+
+async def run_batch(agent, input_path: str, output_path: str, concurrency: int = 8, timeout: Optional[float] = 120.0,
+                    max_retries: int = 3, backoff_base: float = 1.0, max_backoff: float = 60.0,
+                    retry_failed: bool = False, sync_every: int = 50, progress_every: int = 100,
+                    app_name: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Runs every prompt of `input_path` not yet in `output_path` through the agent.
+
+    Args:
+        agent: The root agent.
+        input_path (str): JSONL prompts (see the module docstring).
+        output_path (str): JSONL results; appended to, and read first to resume.
+        concurrency (int): Prompts in flight at once.
+        timeout (Optional[float]): Seconds per attempt.
+        max_retries (int): Extra attempts after a failure.
+        backoff_base (float): First retry waits up to this many seconds; doubles per retry.
+        max_backoff (float): Longest wait between attempts.
+        retry_failed (bool): Run prompts whose recorded result is an error again.
+        sync_every (int): Records between fsyncs of the output file.
+        progress_every (int): Records between progress lines on stderr (0 for none).
+        app_name (Optional[str]): Defaults to the agent's name.
+
+    Returns:
+        Dict[str, Any]: Counts of skipped, ok and failed prompts and the run time.
+    """
+    done = load_checkpoint(output_path, retry_failed)
+    runner = Runner(agent=agent, app_name=app_name or agent.name, session_service=create_session_service())
+    writer = ResultWriter(output_path, sync_every)
+    semaphore = asyncio.Semaphore(concurrency)
+    pending: Set[asyncio.Task] = set()
+    counts = {"skipped": 0, "ok": 0, "error": 0}
+    start = time.perf_counter()
+
+    def finished(task: asyncio.Task) -> None:
+        pending.discard(task)
+        semaphore.release()
+        if task.cancelled():
+            return
+        record = task.result()
+        writer.write(record)
+        counts[record["status"]] += 1
+        completed = counts["ok"] + counts["error"]
+        if progress_every and completed % progress_every == 0:
+            elapsed = time.perf_counter() - start
+            print(f"[batch] {completed} done ({counts['error']} failed, {counts['skipped']} skipped) "
+                  f"in {elapsed:.0f} s, {completed / elapsed:.2f}/s", file=sys.stderr, flush=True)
+
+    try:
+        for prompt_id, prompt in read_prompts(input_path):
+            if prompt_id in done:
+                counts["skipped"] += 1
+                continue
+            done.add(prompt_id)  # an id repeated in the input runs once
+            await semaphore.acquire()  # wait for a free slot before reading further
+            task = asyncio.create_task(run_prompt(runner, prompt_id, prompt, timeout, max_retries,
+                                                  backoff_base, max_backoff))
+            pending.add(task)
+            task.add_done_callback(finished)
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+    finally:
+        for task in list(pending):
+            task.cancel()
+        writer.close()
+
+    return dict(counts, duration_s=time.perf_counter() - start)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run a JSONL file of prompts through an ADK agent.")
+    parser.add_argument("agent", help="Module with a root_agent, e.g. 'settyl', or 'module:attribute'.")
+    parser.add_argument("input", help="JSONL file of prompts.")
+    parser.add_argument("output", help="JSONL file for results; rerun with the same file to resume.")
+    parser.add_argument("--concurrency", type=int, default=8, help="Prompts in flight at once (default: 8).")
+    parser.add_argument("--timeout", type=float, default=120.0, help="Seconds per attempt (default: 120).")
+    parser.add_argument("--retries", type=int, default=3, help="Retries after a failed attempt (default: 3).")
+    parser.add_argument("--backoff", type=float, default=1.0, help="Base retry backoff in seconds (default: 1).")
+    parser.add_argument("--max-backoff", type=float, default=60.0)
+    parser.add_argument("--retry-failed", action="store_true", help="Run prompts recorded as errors again.")
+    parser.add_argument("--stub-llm", action="store_true",
+                        help="Replace the agent's model with StubLlm (configured by ADK_STUB_* variables).")
+    cli_args = parser.parse_args()
+
+    target_agent = load_root_agent(cli_args.agent)
+    if cli_args.stub_llm:
+        use_stub_llm(target_agent)
+    summary = asyncio.run(run_batch(
+        target_agent, cli_args.input, cli_args.output, cli_args.concurrency, cli_args.timeout, cli_args.retries,
+        cli_args.backoff, cli_args.max_backoff, cli_args.retry_failed,
+    ))
+    print(f"\n{summary['ok']} ok, {summary['error']} failed, {summary['skipped']} already done "
+          f"in {summary['duration_s']:.1f} s -> {cli_args.output}")
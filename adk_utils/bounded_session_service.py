@@ -0,0 +1,487 @@
+"""
+An in-memory session service that stays within fixed limits.
+
+InMemorySessionService keeps every session and all its events for the life
+of the process, so a long-running server grows without bound.
+BoundedSessionService keeps sessions in memory too, but:
+
+  - caps each app at `max_sessions_per_app` sessions and `max_bytes_per_app`
+    (approximate serialized size of events and state);
+  - drops sessions idle for longer than `idle_ttl_seconds`;
+  - evicts least recently used sessions first when a cap is exceeded;
+  - with `spill_dir`, writes evicted and expired sessions to disk as JSON and
+    loads them back transparently on the next get_session(), so eviction
+    frees memory without losing conversations;
+  - locks per session: turns of different sessions never wait on each other,
+    and an app-wide lock is only held to update the LRU index. Spill files are
+    written and read in worker threads (asyncio.to_thread), outside that lock,
+    so disk I/O never blocks the event loop or other sessions of the app.
+
+stats() reports live sessions and approximate bytes per app and per user.
+
+    from adk_utils.bounded_session_service import BoundedSessionService
+
+    session_service = BoundedSessionService(max_sessions_per_app=5000, idle_ttl_seconds=3600,
+                                            spill_dir="/var/tmp/adk_sessions")
+
+Unlike InMemorySessionService, get_session() does not deep-copy the event
+list. Events are not modified once appended, so the copy shares them. The
+session state is still copied.
+"""
+
+import asyncio
+import contextlib
+import copy
+import json
+import os
+import threading
+import time
+import urllib.parse
+import uuid
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from google.adk.events.event import Event
+from google.adk.sessions.base_session_service import (
+    BaseSessionService,
+    GetSessionConfig,
+    ListSessionsResponse,
+)
+from google.adk.sessions.session import Session
+from google.adk.sessions.state import State
+
+SessionKey = Tuple[str, str]  # (user_id, session_id) within an app
+
+
+class _Slot:
+    """One stored session with its lock and size."""
+
+    __slots__ = ("session", "lock", "last_access", "event_bytes", "state_bytes", "deleted")
+
+    def __init__(self, session: Session):
+        self.session = session
+        self.lock = threading.Lock()
+        self.deleted = False  # set by delete_session(), so a pending spill write is discarded
+        self.last_access = time.monotonic()
+        self.event_bytes = sum(len(event.model_dump_json(exclude_none=True)) for event in session.events)
+        self.state_bytes = _state_size(session.state)
+
+    @property
+    def size(self) -> int:
+        return self.event_bytes + self.state_bytes
+
+
+class _AppStore:
+    """The sessions of one app in LRU order (least recently used first)."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.slots: "OrderedDict[SessionKey, _Slot]" = OrderedDict()
+        self.spilling: Dict[SessionKey, _Slot] = {}         # evicted, write to disk pending
+        self.to_spill: List[Tuple[SessionKey, _Slot]] = []  # queued for the next _flush_spills()
+        self.writes_completed = 0
+        self.bytes = 0
+        self.evicted = 0
+        self.expired = 0
+        self.spilled = 0
+        self.restored = 0
+
+
+def _state_size(state: Dict[str, Any]) -> int:
+    return len(json.dumps(state, default=str)) if state else 0
+
+
+def _remove_file(path: str) -> None:
+    with contextlib.suppress(FileNotFoundError):
+        os.remove(path)
+
+
+class BoundedSessionService(BaseSessionService):
+    """
+    In-memory session service with per-app caps, idle expiry, LRU eviction
+    and optional spilling to disk (see the module docstring).
+
+    Args:
+        max_sessions_per_app (int): Sessions kept in memory per app.
+        max_bytes_per_app (Optional[int]): Approximate bytes kept in memory per app.
+        idle_ttl_seconds (Optional[float]): Sessions untouched this long are
+                                            dropped (or spilled). None keeps them.
+        spill_dir (Optional[str]): Directory for evicted sessions. Without it,
+                                   evicted sessions are discarded.
+        sweep_interval_seconds (float): Minimum time between idle sweeps, which
+                                        piggyback on normal calls.
+    """
+
+    def __init__(self, max_sessions_per_app: int = 10_000, max_bytes_per_app: Optional[int] = None,
+                 idle_ttl_seconds: Optional[float] = None, spill_dir: Optional[str] = None,
+                 sweep_interval_seconds: float = 30.0):
+        self.max_sessions_per_app = max_sessions_per_app
+        self.max_bytes_per_app = max_bytes_per_app
+        self.idle_ttl_seconds = idle_ttl_seconds
+        self.spill_dir = spill_dir
+        self.sweep_interval_seconds = sweep_interval_seconds
+        self._apps: Dict[str, _AppStore] = {}
+        self._apps_lock = threading.Lock()
+        self._app_state: Dict[str, Dict[str, Any]] = {}
+        self._user_state: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        self._last_sweep = time.monotonic()
+        if spill_dir:
+            os.makedirs(spill_dir, exist_ok=True)
+
+    # --- Storage helpers ---
+
+    def _app(self, app_name: str) -> _AppStore:
+        store = self._apps.get(app_name)
+        if store is None:
+            with self._apps_lock:
+                store = self._apps.setdefault(app_name, _AppStore())
+        return store
+
+    def _spill_path(self, app_name: str, user_id: str, session_id: str) -> str:
+        quote = lambda value: urllib.parse.quote(value, safe="")
+        return os.path.join(self.spill_dir, quote(app_name), quote(user_id), quote(session_id) + ".json")
+
+    def _write_spill(self, store: _AppStore, key: SessionKey, slot: _Slot) -> None:
+        """Writes an evicted session to disk. Runs in a worker thread, holding no app lock."""
+        session = slot.session
+        path = self._spill_path(session.app_name, session.user_id, session.id)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        # The slot lock gives a consistent snapshot and orders writes of the same session.
+        with slot.lock:
+            if slot.deleted:
+                return
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                f.write(session.model_dump_json())
+            os.replace(tmp_path, path)
+        with store.lock:
+            store.writes_completed += 1
+            if store.spilling.get(key) is slot:
+                del store.spilling[key]
+                store.spilled += 1
+                return
+        if slot.deleted:  # deleted while it was being written
+            _remove_file(path)
+
+    async def _flush_spills(self, store: _AppStore) -> None:
+        """Writes the sessions evicted since the last call, off the event loop."""
+        with store.lock:
+            pending, store.to_spill = store.to_spill, []
+        for key, slot in pending:
+            await asyncio.to_thread(self._write_spill, store, key, slot)
+
+    def _read_spill(self, app_name: str, user_id: str, session_id: str) -> Optional[Session]:
+        path = self._spill_path(app_name, user_id, session_id)
+        try:
+            with open(path, encoding="utf-8") as f:
+                return Session.model_validate_json(f.read())
+        except FileNotFoundError:
+            return None
+
+    async def _restore(self, app_name: str, user_id: str, session_id: str) -> Optional[_Slot]:
+        """Moves a spilled session back into memory."""
+        if not self.spill_dir:
+            return None
+        store = self._app(app_name)
+        key = (user_id, session_id)
+        while True:
+            writes_before = store.writes_completed
+            session = await asyncio.to_thread(self._read_spill, app_name, user_id, session_id)
+            with store.lock:
+                slot = store.slots.get(key)  # another caller may have restored it meanwhile
+                if slot is None:
+                    # A copy evicted again and still waiting for its write is newer than the file.
+                    slot = store.spilling.pop(key, None)
+                    if slot is None and session is not None and store.writes_completed != writes_before:
+                        continue  # a write finished while reading; the file may be newer now
+                    if slot is None and session is not None:
+                        slot = _Slot(session)
+                    if slot is not None:
+                        store.slots[key] = slot
+                        store.bytes += slot.size
+                        store.restored += 1
+            break
+        if slot is None:
+            return None
+        # The file stays: memory is checked first, and the next eviction overwrites it.
+        # Sessions this evicts are written by the caller's _flush_spills(), once it has used the slot.
+        self._enforce_limits(app_name, keep=key)
+        return slot
+
+    def _evict(self, store: _AppStore, key: SessionKey) -> None:
+        """
+        Takes a slot out of the LRU index; the caller holds store.lock.
+
+        With a spill directory the slot is queued for _flush_spills() and stays
+        reachable through store.spilling until it is on disk.
+        """
+        slot = store.slots.pop(key)
+        store.bytes -= slot.size
+        if self.spill_dir:
+            store.spilling[key] = slot
+            store.to_spill.append((key, slot))
+
+    def _enforce_limits(self, app_name: str, keep: Optional[SessionKey] = None) -> None:
+        store = self._app(app_name)
+        with store.lock:
+            while store.slots and (
+                len(store.slots) > self.max_sessions_per_app
+                or (self.max_bytes_per_app is not None and store.bytes > self.max_bytes_per_app)
+            ):
+                oldest = next(iter(store.slots))
+                if oldest == keep:
+                    if len(store.slots) == 1:
+                        break  # a single session larger than the budget stays
+                    store.slots.move_to_end(oldest)
+                    continue
+                self._evict(store, oldest)
+                store.evicted += 1
+
+    async def _maybe_sweep(self) -> None:
+        if self.idle_ttl_seconds is None:
+            return
+        now = time.monotonic()
+        if now - self._last_sweep < self.sweep_interval_seconds:
+            return
+        self._last_sweep = now
+        await self.sweep()
+
+    async def sweep(self) -> int:
+        """
+        Drops (or spills) sessions idle for longer than idle_ttl_seconds.
+
+        Returns:
+            int: Number of sessions removed from memory.
+        """
+        if self.idle_ttl_seconds is None:
+            return 0
+        cutoff = time.monotonic() - self.idle_ttl_seconds
+        removed = 0
+        for store in list(self._apps.values()):
+            with store.lock:
+                # LRU order: stop at the first session used after the cutoff.
+                while store.slots:
+                    key, slot = next(iter(store.slots.items()))
+                    if slot.last_access > cutoff:
+                        break
+                    self._evict(store, key)
+                    store.expired += 1
+                    removed += 1
+            await self._flush_spills(store)
+        return removed
+
+    def _touch(self, app_name: str, key: SessionKey) -> Optional[_Slot]:
+        store = self._app(app_name)
+        with store.lock:
+            slot = store.slots.get(key)
+            if slot is None:
+                # Evicted but not yet on disk: take it back.
+                slot = store.spilling.pop(key, None)
+                if slot is not None:
+                    store.slots[key] = slot
+                    store.bytes += slot.size
+                    store.restored += 1
+            if slot is not None:
+                if self.idle_ttl_seconds is not None and time.monotonic() - slot.last_access > self.idle_ttl_seconds:
+                    self._evict(store, key)
+                    store.expired += 1
+                    slot = None
+                else:
+                    slot.last_access = time.monotonic()
+                    store.slots.move_to_end(key)
+        return slot
+
+    def _merge_shared_state(self, app_name: str, user_id: str, state: Dict[str, Any]) -> Dict[str, Any]:
+        for key, value in self._app_state.get(app_name, {}).items():
+            state[State.APP_PREFIX + key] = value
+        for key, value in self._user_state.get(app_name, {}).get(user_id, {}).items():
+            state[State.USER_PREFIX + key] = value
+        return state
+
+    def _apply_shared_delta(self, app_name: str, user_id: str, delta: Dict[str, Any]) -> Dict[str, Any]:
+        """Stores 'app:' and 'user:' keys centrally; returns the session-scoped rest."""
+        session_delta: Dict[str, Any] = {}
+        for key, value in delta.items():
+            if key.startswith(State.APP_PREFIX):
+                self._app_state.setdefault(app_name, {})[key[len(State.APP_PREFIX):]] = value
+            elif key.startswith(State.USER_PREFIX):
+                self._user_state.setdefault(app_name, {}).setdefault(user_id, {})[key[len(State.USER_PREFIX):]] = value
+            elif not key.startswith(State.TEMP_PREFIX):
+                session_delta[key] = value
+        return session_delta
+
+    def _copy_for_caller(self, slot: _Slot, app_name: str, user_id: str,
+                         config: Optional[GetSessionConfig] = None) -> Session:
+        with slot.lock:
+            stored = slot.session
+            events = stored.events
+            if config and config.num_recent_events:
+                events = events[-config.num_recent_events:]
+            if config and config.after_timestamp:
+                events = [event for event in events if event.timestamp >= config.after_timestamp]
+            session = Session(app_name=stored.app_name, user_id=stored.user_id, id=stored.id,
+                              state=copy.deepcopy(stored.state), events=list(events),
+                              last_update_time=stored.last_update_time)
+        self._merge_shared_state(app_name, user_id, session.state)
+        return session
+
+    # --- BaseSessionService ---
+
+    async def create_session(
+        self,
+        *,
+        app_name: str,
+        user_id: str,
+        state: Optional[Dict[str, Any]] = None,
+        session_id: Optional[str] = None,
+    ) -> Session:
+        await self._maybe_sweep()
+        session_id = session_id.strip() if session_id and session_id.strip() else str(uuid.uuid4())
+        session_state = self._apply_shared_delta(app_name, user_id, dict(state or {}))
+        session = Session(app_name=app_name, user_id=user_id, id=session_id, state=session_state,
+                          last_update_time=time.time())
+        store = self._app(app_name)
+        slot = _Slot(session)
+        with store.lock:
+            old = store.slots.pop((user_id, session_id), None)
+            if old is not None:
+                store.bytes -= old.size
+                old.deleted = True
+            pending = store.spilling.pop((user_id, session_id), None)
+            if pending is not None:
+                pending.deleted = True
+            store.slots[(user_id, session_id)] = slot
+            store.bytes += slot.size
+        self._enforce_limits(app_name, keep=(user_id, session_id))
+        await self._flush_spills(store)
+        return self._copy_for_caller(slot, app_name, user_id)
+
+    async def get_session(
+        self,
+        *,
+        app_name: str,
+        user_id: str,
+        session_id: str,
+        config: Optional[GetSessionConfig] = None,
+    ) -> Optional[Session]:
+        await self._maybe_sweep()
+        key = (user_id, session_id)
+        store = self._app(app_name)
+        slot = self._touch(app_name, key)
+        if slot is None:
+            slot = await self._restore(app_name, user_id, session_id)
+        session = self._copy_for_caller(slot, app_name, user_id, config) if slot is not None else None
+        await self._flush_spills(store)
+        return session
+
+    def _list_spilled(self, app_name: str, user_id: str) -> List[Tuple[str, float]]:
+        user_dir = os.path.dirname(self._spill_path(app_name, user_id, "x"))
+        if not os.path.isdir(user_dir):
+            return []
+        return [(urllib.parse.unquote(name[:-len(".json")]), os.path.getmtime(os.path.join(user_dir, name)))
+                for name in os.listdir(user_dir) if name.endswith(".json")]
+
+    async def list_sessions(self, *, app_name: str, user_id: str) -> ListSessionsResponse:
+        sessions = []
+        listed = set()
+        store = self._app(app_name)
+        with store.lock:
+            slots = [slot for (slot_user, _), slot in list(store.slots.items()) + list(store.spilling.items())
+                     if slot_user == user_id]
+        for slot in slots:
+            stored = slot.session
+            sessions.append(Session(app_name=app_name, user_id=user_id, id=stored.id,
+                                    last_update_time=stored.last_update_time))
+            listed.add(stored.id)
+        if self.spill_dir:
+            for session_id, modified in await asyncio.to_thread(self._list_spilled, app_name, user_id):
+                if session_id not in listed:
+                    sessions.append(Session(app_name=app_name, user_id=user_id, id=session_id,
+                                            last_update_time=modified))
+        return ListSessionsResponse(sessions=sessions)
+
+    async def delete_session(self, *, app_name: str, user_id: str, session_id: str) -> None:
+        store = self._app(app_name)
+        key = (user_id, session_id)
+        with store.lock:
+            slot = store.slots.pop(key, None)
+            if slot is not None:
+                store.bytes -= slot.size
+                slot.deleted = True
+            pending = store.spilling.pop(key, None)
+            if pending is not None:
+                pending.deleted = True  # its write removes its own file
+        if self.spill_dir:
+            await asyncio.to_thread(_remove_file, self._spill_path(app_name, user_id, session_id))
+
+    async def append_event(self, session: Session, event: Event) -> Event:
+        if event.partial:
+            return event
+        # Updates the caller's session object (state and events).
+        await super().append_event(session=session, event=event)
+        session.last_update_time = event.timestamp
+
+        app_name, user_id = session.app_name, session.user_id
+        key = (user_id, session.id)
+        store = self._app(app_name)
+        # No await between finding the slot and appending to it, or it could be
+        # evicted and written to disk in between, losing the event.
+        slot = self._touch(app_name, key)
+        if slot is None:
+            slot = await self._restore(app_name, user_id, session.id)
+        if slot is None:
+            # Evicted without a spill directory while a turn was running: the
+            # caller's copy is the most complete one left, so keep that.
+            slot = _Slot(Session(app_name=app_name, user_id=user_id, id=session.id,
+                                 state={key: value for key, value in session.state.items()
+                                        if not key.startswith((State.APP_PREFIX, State.USER_PREFIX, State.TEMP_PREFIX))},
+                                 events=list(session.events), last_update_time=session.last_update_time))
+            with store.lock:
+                store.slots[key] = slot
+                store.bytes += slot.size
+        else:
+            event_bytes = len(event.model_dump_json(exclude_none=True))
+            with slot.lock:
+                stored = slot.session
+                stored.events.append(event)
+                stored.last_update_time = event.timestamp
+                old_size = slot.size
+                slot.event_bytes += event_bytes
+                if event.actions and event.actions.state_delta:
+                    stored.state.update(self._apply_shared_delta(app_name, user_id, event.actions.state_delta))
+                    slot.state_bytes = _state_size(stored.state)
+                grown = slot.size - old_size
+            with store.lock:
+                if store.slots.get(key) is slot:
+                    store.bytes += grown
+        self._enforce_limits(app_name, keep=key)
+        await self._flush_spills(store)
+        await self._maybe_sweep()
+        return event
+
+    # --- Accounting ---
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Live sessions and approximate bytes in memory, per app and per user,
+        plus eviction, expiry and spill counts per app.
+        """
+        report: Dict[str, Any] = {}
+        for app_name, store in list(self._apps.items()):
+            with store.lock:
+                users: Dict[str, Dict[str, int]] = {}
+                for (user_id, _), slot in store.slots.items():
+                    user = users.setdefault(user_id, {"sessions": 0, "bytes": 0})
+                    user["sessions"] += 1
+                    user["bytes"] += slot.size
+                report[app_name] = {
+                    "sessions": len(store.slots),
+                    "bytes": store.bytes,
+                    "evicted": store.evicted,
+                    "expired": store.expired,
+                    "spilled": store.spilled,
+                    "spill_pending": len(store.spilling),
+                    "restored": store.restored,
+                    "users": users,
+                }
+        return report
@@ -0,0 +1,213 @@
+"""
+Keeps the prompt within a token budget on long sessions.
+
+ADK resends a session's whole history on every model call, so prompt size,
+latency and cost grow with the length of the conversation. ContextWindow is a
+before_model_callback that bounds it:
+
+  - tokens are estimated locally (about four characters per token, no API call);
+  - if the request fits the budget it is left untouched;
+  - otherwise the most recent `keep_turns` turns stay verbatim and everything
+    older is replaced by one summary message at the start of the contents.
+
+A turn starts at a user text message and runs until the next one, so a tool
+call and its response always stay together.
+
+The summary rolls forward. It lives in session state with the number of turns
+it covers, and each call only folds in the turns that dropped out of the window
+since the last call. The default summarizer needs no model call: it keeps one
+line per turn (the question, the tools called and the start of the answer) and
+drops its oldest lines when it outgrows `summary_max_tokens`. Pass your own
+`summarizer(previous_summary, new_turns)` (sync or async) to summarize with a model.
+
+    from adk_utils.context_window import ContextWindow
+
+    agent = Agent(..., before_model_callback=[my_guardrail, ContextWindow(max_tokens=8000, keep_turns=4)])
+"""
+
+import inspect
+import json
+from typing import Awaitable, Callable, List, Optional, Union
+
+from google.adk.agents.callback_context import CallbackContext
+from google.adk.models.llm_request import LlmRequest
+from google.adk.models.llm_response import LlmResponse
+from google.genai import types
+
+from .telemetry import set_span_attributes
+
+SUMMARY_STATE_KEY = "context_window_summary"
+SUMMARY_PREFIX = "For context, a summary of the earlier conversation:\n"
+
+Summarizer = Callable[[str, List[types.Content]], Union[str, Awaitable[str]]]
+
+
+# --- Part 1: Counting Tokens ---
+
+def count_tokens(content: types.Content) -> int:
+    """Estimated tokens in one message: about four characters per token, plus a little per part."""
+    chars = 0
+    for part in content.parts or ():
+        if part.text:
+            chars += len(part.text)
+        elif part.function_call is not None:
+            chars += len(part.function_call.name or "") + len(json.dumps(part.function_call.args or {}, default=str))
+        elif part.function_response is not None:
+            chars += len(part.function_response.name or "") + len(
+                json.dumps(part.function_response.response or {}, default=str))
+        chars += 16  # role and part framing
+    return chars // 4 + 1
+
+
+def split_turns(contents: List[types.Content]) -> List[List[types.Content]]:
+    """
+    Groups contents into turns, each starting at a user text message.
+
+    Anything before the first user message forms a turn of its own.
+    """
+    turns: List[List[types.Content]] = []
+    for content in contents:
+        starts_turn = content.role == "user" and any(part.text for part in content.parts or ())
+        if starts_turn or not turns:
+            turns.append([content])
+        else:
+            turns[-1].append(content)
+    return turns
+
+
+# --- Part 2: The Default Summarizer ---
+
+def _clip(text: str, limit: int) -> str:
+    text = " ".join(text.split())
+    return text if len(text) <= limit else text[:limit - 3] + "..."
+
+
+def summarize_turn(turn: List[types.Content], max_chars: int = 160) -> str:
+    """One line for a turn: the question, the tools called and the start of the answer."""
+    question = ""
+    tools: List[str] = []
+    answer = ""
+    for content in turn:
+        for part in content.parts or ():
+            if part.function_call is not None:
+                tools.append(_clip(f"{part.function_call.name}({json.dumps(part.function_call.args or {}, default=str)})",
+                                   max_chars))
+            elif part.text and not part.thought:
+                if content.role == "user" and not question:
+                    question = part.text
+                elif content.role == "model":
+                    answer = part.text
+    line = f"- User: {_clip(question, max_chars)}"
+    if tools:
+        line += f" | Tools: {'; '.join(tools)}"
+    if answer:
+        line += f" | Agent: {_clip(answer, max_chars)}"
+    return line
+
+
+def make_extractive_summarizer(max_tokens: int = 600) -> Summarizer:
+    """
+    Builds the default summarizer: one line per folded turn, oldest lines
+    dropped once the summary exceeds `max_tokens`.
+    """
+    max_chars = max_tokens * 4
+
+    def summarizer(previous: str, new_turns: List[types.Content]) -> str:
+        lines = previous.splitlines() if previous else []
+        omitted = 0
+        if lines and lines[0].startswith("("):
+            omitted = int(lines.pop(0).split()[0].lstrip("("))
+        lines.extend(summarize_turn(turn) for turn in split_turns(new_turns))
+        while len(lines) > 1 and sum(len(line) + 1 for line in lines) > max_chars:
+            lines.pop(0)
+            omitted += 1
+        if omitted:
+            lines.insert(0, f"({omitted} earlier turns omitted)")
+        return "\n".join(lines)
+
+    return summarizer
+
+
+# --- Part 3: The Callback ---
+
+class ContextWindow:
+    """
+    before_model_callback that keeps llm_request.contents within a token budget.
+
+    Args:
+        max_tokens (int): Budget for the request contents (estimated tokens).
+        keep_turns (int): Most recent turns always kept verbatim when trimming.
+                          The current turn is kept even if it alone exceeds the budget.
+        summarizer (Optional[Summarizer]): (previous_summary, contents_to_fold) -> new summary.
+                                           Defaults to make_extractive_summarizer(summary_max_tokens).
+        summary_max_tokens (int): Size cap for the default summarizer.
+        state_key (str): Session state key for the rolling summary.
+    """
+
+    def __init__(self, max_tokens: int = 8000, keep_turns: int = 4, summarizer: Optional[Summarizer] = None,
+                 summary_max_tokens: int = 600, state_key: str = SUMMARY_STATE_KEY):
+        if keep_turns < 1:
+            raise ValueError("keep_turns must be at least 1 (the current turn).")
+        self.max_tokens = max_tokens
+        self.keep_turns = keep_turns
+        self.summarizer = summarizer or make_extractive_summarizer(summary_max_tokens)
+        self.state_key = state_key
+        self.__name__ = "context_window"  # span name when wrapped with adk_utils.telemetry.traced
+
+    def _plan(self, turn_tokens: List[int], summary_tokens: int) -> int:
+        """Number of leading turns to fold so the rest fits, keeping at least `keep_turns` turns."""
+        total = sum(turn_tokens)
+        if total <= self.max_tokens:
+            return 0
+        cut = max(0, len(turn_tokens) - self.keep_turns)
+        kept = sum(turn_tokens[cut:])
+        # Still over budget: fold further turns, but never the current one.
+        while cut < len(turn_tokens) - 1 and kept + summary_tokens > self.max_tokens:
+            kept -= turn_tokens[cut]
+            cut += 1
+        return cut
+
+    async def __call__(self, callback_context: CallbackContext, llm_request: LlmRequest) -> Optional[LlmResponse]:
+        turns = split_turns(llm_request.contents)
+        turn_tokens = [sum(count_tokens(content) for content in turn) for turn in turns]
+        tokens_before = sum(turn_tokens)
+
+        stored = callback_context.state.get(self.state_key) or {}
+        summary: str = stored.get("text", "")
+        folded: int = stored.get("turns", 0)
+        if folded > len(turns) or stored.get("first") != _fingerprint(turns):
+            # History was rewritten or belongs to another conversation: start over.
+            summary, folded = "", 0
+
+        cut = self._plan(turn_tokens, len(summary) // 4)
+        if cut == 0:
+            set_span_attributes(context_tokens=tokens_before, context_turns_folded=0)
+            return None
+
+        if cut > folded:
+            new_contents = [content for turn in turns[folded:cut] for content in turn]
+            result = self.summarizer(summary, new_contents)
+            summary = await result if inspect.isawaitable(result) else result
+            folded = cut
+            callback_context.state[self.state_key] = {"text": summary, "turns": folded,
+                                                      "first": _fingerprint(turns)}
+        # When earlier calls folded more turns than needed now, the summary covers
+        # them already; keep only what comes after.
+        kept_contents = [content for turn in turns[folded:] for content in turn]
+        summary_content = types.Content(role="user", parts=[types.Part(text=SUMMARY_PREFIX + summary)])
+        llm_request.contents = [summary_content] + kept_contents
+
+        tokens_after = sum(count_tokens(content) for content in llm_request.contents)
+        set_span_attributes(context_tokens=tokens_before, context_tokens_after=tokens_after,
+                            context_turns_folded=folded)
+        return None
+
+
+def _fingerprint(turns: List[List[types.Content]]) -> Optional[str]:
+    """The start of the first user message, to recognize the same conversation on later calls."""
+    if not turns:
+        return None
+    for part in turns[0][0].parts or ():
+        if part.text:
+            return part.text[:64]
+    return None
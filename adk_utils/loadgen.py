@@ -0,0 +1,350 @@
+"""
+Load generator for Runner-based agents.
+
+Drives many concurrent sessions through Runner.run_async and reports
+throughput, turn latency percentiles and time to first event.
+
+Two arrival models:
+  - closed: every session is a user who sends the next message as soon as the
+            previous turn finishes (plus an optional think time). Load adapts
+            to the agent's speed; use it to find maximum throughput.
+  - open:   turns arrive at a fixed rate (Poisson or evenly spaced) whether or
+            not earlier ones have finished, spread round-robin over the
+            sessions. Latency is measured from the scheduled arrival, so time
+            spent queued behind a slow turn of the same session counts; use it
+            to see how latency holds up at a given request rate.
+
+Usage (from the repository root):
+    python -m adk_utils.loadgen settyl --sessions 20 --turns 5
+    python -m adk_utils.loadgen test_agent --mode open --rate 10 --sessions 50 --turns 4
+    python -m adk_utils.loadgen settyl --queries queries.txt --output load.json
+    python -m adk_utils.loadgen settyl --stub-llm --stream --sessions 200   # offline, see adk_utils.stub_llm
+
+The target is any module exposing `root_agent` (or whose `agent` submodule
+does), or 'module:attribute'. Sessions are stored by create_session_service(),
+so ADK_SESSION_DB applies here as it does to the agents.
+"""
+
+import argparse
+import asyncio
+import importlib
+import json
+import math
+import random
+import time
+import uuid
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence
+
+from google.adk.agents.run_config import RunConfig, StreamingMode
+from google.adk.runners import Runner
+from google.genai import types
+
+from .sqlite_session_service import create_session_service
+from .stub_llm import use_stub_llm
+
+DEFAULT_QUERIES = (
+    "Validate HSN code 85444999.",
+    "Are 0101 and 99887766 valid HSN codes?",
+    "What is the weather like in London?",
+    "What time is it in New York?",
+)
+
+
+class TurnResult(NamedTuple):
+    session_id: str
+    turn: int
+    latency_s: float                # scheduled arrival (or start, closed loop) to last event
+    service_s: float                # start of run_async to last event
+    first_event_s: Optional[float]  # scheduled arrival to first event; None if no event came
+    events: int
+    error: Optional[str]            # exception type and message, if the turn failed
+
+
+# --- Part 1: Loading the Agent ---
+
+def load_root_agent(target: str):
+    """
+    Imports an agent by module name.
+
+    Args:
+        target (str): 'settyl', 'settyl.agent' or 'package.module:attribute'.
+
+    Returns:
+        The agent object (`root_agent` unless an attribute is given).
+    """
+    module_name, _, attribute = target.partition(":")
+    module = importlib.import_module(module_name)
+    if attribute:
+        return getattr(module, attribute)
+    if hasattr(module, "root_agent"):
+        return module.root_agent
+    agent_module = importlib.import_module(f"{module_name}.agent")
+    return agent_module.root_agent
+
+
+# --- Part 2: Driving Turns ---
+
+async def run_turn(runner: Runner, user_id: str, session_id: str, turn: int, query: str,
+                   scheduled: float, timeout: Optional[float], run_config: Optional[RunConfig] = None) -> TurnResult:
+    """Runs one turn and times it. `scheduled` is the perf_counter() time the turn was due."""
+    content = types.Content(role="user", parts=[types.Part(text=query)])
+    start = time.perf_counter()
+    first_event: Optional[float] = None
+    events = 0
+    error: Optional[str] = None
+
+    async def consume() -> None:
+        nonlocal first_event, events
+        async for _ in runner.run_async(user_id=user_id, session_id=session_id, new_message=content,
+                                        run_config=run_config or RunConfig()):
+            if first_event is None:
+                first_event = time.perf_counter()
+            events += 1
+
+    try:
+        await asyncio.wait_for(consume(), timeout)
+    except asyncio.TimeoutError:
+        error = f"TimeoutError: no final event within {timeout} s"
+    except Exception as e:  # a failed turn is a data point, not the end of the run
+        error = f"{type(e).__name__}: {e}"
+    end = time.perf_counter()
+    return TurnResult(
+        session_id=session_id,
+        turn=turn,
+        latency_s=end - scheduled,
+        service_s=end - start,
+        first_event_s=None if first_event is None else first_event - scheduled,
+        events=events,
+        error=error,
+    )
+
+
+async def _create_sessions(runner: Runner, user_id: str, sessions: int) -> List[str]:
+    session_ids = [f"load-{uuid.uuid4().hex[:12]}" for _ in range(sessions)]
+    for session_id in session_ids:
+        await runner.session_service.create_session(app_name=runner.app_name, user_id=user_id, session_id=session_id)
+    return session_ids
+
+
+async def run_closed_loop(runner: Runner, queries: Sequence[str], sessions: int, turns: int,
+                          think_time: float = 0.0, timeout: Optional[float] = None,
+                          user_id: str = "load_user", run_config: Optional[RunConfig] = None) -> List[TurnResult]:
+    """
+    Runs `sessions` concurrent users, each sending `turns` messages back to back.
+
+    Args:
+        think_time (float): Seconds a user waits between the end of one turn and the next message.
+    """
+    session_ids = await _create_sessions(runner, user_id, sessions)
+    results: List[TurnResult] = []
+
+    async def user(index: int, session_id: str) -> None:
+        for turn in range(turns):
+            query = queries[(index + turn) % len(queries)]
+            results.append(await run_turn(runner, user_id, session_id, turn, query, time.perf_counter(), timeout,
+                                          run_config))
+            if think_time and turn < turns - 1:
+                await asyncio.sleep(think_time)
+
+    await asyncio.gather(*(user(index, session_id) for index, session_id in enumerate(session_ids)))
+    return results
+
+
+async def run_open_loop(runner: Runner, queries: Sequence[str], sessions: int, turns: int, rate: float,
+                        arrivals: str = "poisson", timeout: Optional[float] = None,
+                        user_id: str = "load_user", seed: Optional[int] = None,
+                        run_config: Optional[RunConfig] = None) -> List[TurnResult]:
+    """
+    Sends sessions * turns messages at `rate` per second, round-robin over the sessions.
+
+    A session handles its turns in order, so a turn that arrives while the
+    previous turn of its session is still running waits, and that wait is
+    part of its latency.
+
+    Args:
+        rate (float): Mean arrivals per second.
+        arrivals (str): 'poisson' (exponential gaps) or 'uniform' (evenly spaced).
+    """
+    if rate <= 0:
+        raise ValueError("Open-loop rate must be positive.")
+    session_ids = await _create_sessions(runner, user_id, sessions)
+    rng = random.Random(seed)
+    offsets: List[float] = []
+    clock = 0.0
+    for _ in range(sessions * turns):
+        offsets.append(clock)
+        clock += rng.expovariate(rate) if arrivals == "poisson" else 1.0 / rate
+
+    results: List[TurnResult] = []
+    start = time.perf_counter()
+
+    async def session_worker(index: int, session_id: str) -> None:
+        for turn in range(turns):
+            scheduled = start + offsets[turn * sessions + index]
+            delay = scheduled - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            query = queries[(index + turn) % len(queries)]
+            results.append(await run_turn(runner, user_id, session_id, turn, query, scheduled, timeout, run_config))
+
+    await asyncio.gather(*(session_worker(index, session_id) for index, session_id in enumerate(session_ids)))
+    return results
+
+
+# --- Part 3: Reporting ---
+
+def percentile(sorted_values: Sequence[float], q: float) -> Optional[float]:
+    """Nearest-rank percentile of an ascending sequence (q in 0-100)."""
+    if not sorted_values:
+        return None
+    rank = max(1, math.ceil(len(sorted_values) * q / 100))
+    return sorted_values[min(len(sorted_values), rank) - 1]
+
+
+def _distribution_ms(values: List[float]) -> Dict[str, Optional[float]]:
+    values = sorted(values)
+    if not values:
+        return {"p50": None, "p95": None, "p99": None, "mean": None, "max": None}
+    return {
+        "p50": percentile(values, 50) * 1000,
+        "p95": percentile(values, 95) * 1000,
+        "p99": percentile(values, 99) * 1000,
+        "mean": sum(values) / len(values) * 1000,
+        "max": values[-1] * 1000,
+    }
+
+
+def summarize(results: List[TurnResult], duration_s: float) -> Dict[str, Any]:
+    """
+    Aggregates turn results.
+
+    Latency percentiles cover successful turns only; failed turns are counted
+    in 'errors' with their most common messages.
+
+    Returns:
+        Dict[str, Any]: Counts, throughput and latency distributions in ms.
+    """
+    ok = [result for result in results if result.error is None]
+    error_counts: Dict[str, int] = {}
+    for result in results:
+        if result.error is not None:
+            error_counts[result.error] = error_counts.get(result.error, 0) + 1
+    return {
+        "turns": len(results),
+        "completed": len(ok),
+        "errors": len(results) - len(ok),
+        "error_messages": dict(sorted(error_counts.items(), key=lambda item: -item[1])[:5]),
+        "duration_s": duration_s,
+        "throughput_turns_per_s": len(ok) / duration_s if duration_s > 0 else 0.0,
+        "events_per_turn": sum(result.events for result in ok) / len(ok) if ok else 0.0,
+        "latency_ms": _distribution_ms([result.latency_s for result in ok]),
+        "service_ms": _distribution_ms([result.service_s for result in ok]),
+        "first_event_ms": _distribution_ms([result.first_event_s for result in ok if result.first_event_s is not None]),
+    }
+
+
+async def run_load(agent, queries: Sequence[str] = DEFAULT_QUERIES, sessions: int = 10, turns: int = 5,
+                   mode: str = "closed", rate: float = 10.0, arrivals: str = "poisson", think_time: float = 0.0,
+                   timeout: Optional[float] = 120.0, warmup: int = 1, app_name: Optional[str] = None,
+                   seed: Optional[int] = None, stream: bool = False) -> Dict[str, Any]:
+    """
+    Runs a load test against an agent and returns the summary.
+
+    Args:
+        agent: The root agent.
+        queries (Sequence[str]): User messages, used in rotation.
+        sessions (int): Concurrent sessions.
+        turns (int): Turns per session.
+        mode (str): 'closed' or 'open' (see the module docstring).
+        rate (float): Arrivals per second in open-loop mode.
+        arrivals (str): 'poisson' or 'uniform', for open-loop mode.
+        think_time (float): Pause between turns in closed-loop mode, in seconds.
+        timeout (Optional[float]): Seconds before a turn counts as failed.
+        warmup (int): Untimed turns run first, so data loading and imports on
+                      the first call do not end up in the percentiles.
+        app_name (Optional[str]): Defaults to the agent's name.
+        seed (Optional[int]): Seeds the open-loop arrival times.
+        stream (bool): Run turns in SSE streaming mode, so the first event is
+                       the model's first text chunk.
+
+    Returns:
+        Dict[str, Any]: The settings and the output of summarize().
+    """
+    runner = Runner(agent=agent, app_name=app_name or agent.name, session_service=create_session_service())
+    run_config = RunConfig(streaming_mode=StreamingMode.SSE if stream else StreamingMode.NONE)
+    if warmup > 0:
+        await run_closed_loop(runner, queries, 1, warmup, timeout=timeout, user_id="warmup_user",
+                              run_config=run_config)
+
+    start = time.perf_counter()
+    if mode == "closed":
+        results = await run_closed_loop(runner, queries, sessions, turns, think_time, timeout, run_config=run_config)
+    elif mode == "open":
+        results = await run_open_loop(runner, queries, sessions, turns, rate, arrivals, timeout, seed=seed,
+                                      run_config=run_config)
+    else:
+        raise ValueError(f"Unknown mode {mode!r}; use 'closed' or 'open'.")
+    duration = time.perf_counter() - start
+
+    summary = summarize(results, duration)
+    summary["settings"] = {"agent": agent.name, "mode": mode, "sessions": sessions, "turns_per_session": turns,
+                           "rate": rate if mode == "open" else None,
+                           "arrivals": arrivals if mode == "open" else None,
+                           "think_time_s": think_time if mode == "closed" else None, "warmup_turns": warmup,
+                           "stream": stream, "model": getattr(agent.model, "model", agent.model)}
+    return summary
+
+
+def _read_queries(path: str) -> List[str]:
+    with open(path, encoding="utf-8") as f:
+        return [line.strip() for line in f if line.strip() and not line.lstrip().startswith("#")]
+
+
+def _format_ms(value: Optional[float]) -> str:
+    return f"{value:10.1f}" if value is not None else f"{'-':>10}"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load-test an ADK agent through Runner.run_async.")
+    parser.add_argument("agent", help="Module with a root_agent, e.g. 'settyl' or 'test_agent', or 'module:attribute'.")
+    parser.add_argument("--sessions", type=int, default=10, help="Concurrent sessions (default: 10).")
+    parser.add_argument("--turns", type=int, default=5, help="Turns per session (default: 5).")
+    parser.add_argument("--mode", choices=("closed", "open"), default="closed")
+    parser.add_argument("--rate", type=float, default=10.0, help="Open loop: turns per second (default: 10).")
+    parser.add_argument("--arrivals", choices=("poisson", "uniform"), default="poisson")
+    parser.add_argument("--think-time", type=float, default=0.0, help="Closed loop: seconds between turns.")
+    parser.add_argument("--timeout", type=float, default=120.0, help="Seconds before a turn counts as failed.")
+    parser.add_argument("--warmup", type=int, default=1, help="Untimed turns before the run (default: 1).")
+    parser.add_argument("--queries", default=None, help="File with one user message per line.")
+    parser.add_argument("--query", action="append", default=None, help="A user message (repeatable).")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--stub-llm", action="store_true",
+                        help="Replace the agent's model with StubLlm (configured by ADK_STUB_* variables).")
+    parser.add_argument("--stream", action="store_true", help="Run turns in SSE streaming mode.")
+    parser.add_argument("--output", "-o", default=None, help="Write the JSON summary to this file.")
+    cli_args = parser.parse_args()
+
+    query_list = cli_args.query or (_read_queries(cli_args.queries) if cli_args.queries else list(DEFAULT_QUERIES))
+    target_agent = load_root_agent(cli_args.agent)
+    if cli_args.stub_llm:
+        use_stub_llm(target_agent)
+    report = asyncio.run(run_load(
+        target_agent, query_list, cli_args.sessions, cli_args.turns, cli_args.mode,
+        cli_args.rate, cli_args.arrivals, cli_args.think_time, cli_args.timeout, cli_args.warmup, seed=cli_args.seed,
+        stream=cli_args.stream,
+    ))
+
+    print(f"\n{report['settings']['mode']} loop, {report['settings']['sessions']} sessions x "
+          f"{report['settings']['turns_per_session']} turns against '{report['settings']['agent']}'")
+    print(f"completed {report['completed']}/{report['turns']} turns in {report['duration_s']:.2f} s "
+          f"({report['throughput_turns_per_s']:.2f} turns/s, {report['events_per_turn']:.1f} events/turn)")
+    for message, count in report["error_messages"].items():
+        print(f"  {count} x {message}")
+    print(f"\n{'':<16}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+    for label, key in (("turn latency", "latency_ms"), ("service time", "service_ms"), ("first event", "first_event_ms")):
+        row = report[key]
+        print(f"{label:<16}{_format_ms(row['p50'])}{_format_ms(row['p95'])}{_format_ms(row['p99'])}{_format_ms(row['max'])}")
+
+    if cli_args.output:
+        with open(cli_args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
@@ -0,0 +1,317 @@
+"""
+Response cache and request coalescing in front of an agent's model.
+
+CachingLlm wraps any BaseLlm (or model name). Before a request goes upstream
+it is reduced to a key:
+  - the model name,
+  - the request config (system instruction, tool declarations, generation settings),
+  - the contents of the whole conversation so far. Text is whitespace-collapsed
+    and case-folded, and function call ids are ignored.
+
+The key is hashed. If a fresh response is cached under it, the response is
+replayed without a model call. If an identical request is already in flight,
+the caller waits for it and gets a copy of its response, so a burst of
+identical questions costs one model call. Otherwise the request goes upstream,
+and a successful response is cached with a TTL. Entries are evicted LRU-first
+when the cache exceeds its entry count or byte budget.
+
+The whole history is keyed by default, so an answer is only replayed for the
+same conversation: a follow-up such as "is that one valid?" never gets the
+answer given to someone else whose earlier turns were different. Pass
+context_turns=N to key only the current turn and N earlier ones, which raises
+the hit rate but is only safe for an agent whose answers never depend on turns
+outside that window.
+
+    from adk_utils.model_cache import with_response_cache
+
+    agent = Agent(model=with_response_cache("gemini-2.0-flash", ttl_seconds=300), ...)
+
+Hit, miss and coalesced counts and the model time saved are recorded as the
+counters adk.model_cache.requests and adk.model_cache.saved_ms (see
+adk_utils.telemetry), and are also available from ResponseCache.stats().
+"""
+
+import asyncio
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, AsyncGenerator, Dict, List, NamedTuple, Optional, Tuple, Union
+
+from google.adk.models.base_llm import BaseLlm
+from google.adk.models.base_llm_connection import BaseLlmConnection
+from google.adk.models.llm_request import LlmRequest
+from google.adk.models.llm_response import LlmResponse
+from google.adk.models.registry import LLMRegistry
+from google.genai import types
+from pydantic import PrivateAttr
+
+from .telemetry import add_to_counter
+
+REQUESTS_COUNTER = "adk.model_cache.requests"
+SAVED_MS_COUNTER = "adk.model_cache.saved_ms"
+
+
+class _Entry(NamedTuple):
+    responses: Tuple[str, ...]  # LlmResponse JSON, in the order the model yielded them
+    size: int
+    expires_at: float
+    upstream_ms: float          # how long the model took to produce them
+
+
+# --- Part 1: The Cache ---
+
+class ResponseCache:
+    """
+    TTL + LRU store for model responses, bounded by entries and bytes.
+
+    Thread-safe; one instance can be shared by several agents or models.
+
+    Args:
+        ttl_seconds (float): How long a response stays valid.
+        max_entries (int): Entries kept before the least recently used are evicted.
+        max_bytes (int): Total size of the stored response JSON before eviction.
+    """
+
+    def __init__(self, ttl_seconds: float = 300.0, max_entries: int = 10_000, max_bytes: int = 64 * 1024 * 1024):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "coalesced": 0, "evictions": 0, "expired": 0,
+                       "uncacheable": 0, "saved_ms": 0.0}
+
+    def get(self, key: str) -> Optional[_Entry]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry.expires_at <= time.monotonic():
+                self._remove(key)
+                self._stats["expired"] += 1
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def put(self, key: str, responses: List[str], upstream_ms: float) -> None:
+        size = sum(len(response) for response in responses)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = _Entry(tuple(responses), size, time.monotonic() + self.ttl_seconds, upstream_ms)
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+                self._stats["evictions"] += 1
+
+    def _remove(self, key: str) -> None:
+        entry = self._entries.pop(key)
+        self._bytes -= entry.size
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def record(self, result: str, saved_ms: float = 0.0) -> None:
+        """Counts a lookup result ('hits', 'misses', 'coalesced', 'uncacheable') and the model time it saved."""
+        with self._lock:
+            self._stats[result] += 1
+            self._stats["saved_ms"] += saved_ms
+        add_to_counter(REQUESTS_COUNTER, 1, {"adk.cache.result": result},
+                       description="Model requests by response-cache result.")
+        if saved_ms > 0:
+            add_to_counter(SAVED_MS_COUNTER, saved_ms, unit="ms",
+                           description="Model latency avoided by the response cache.")
+
+    def stats(self) -> Dict[str, Any]:
+        """Counters plus current size and hit rate (hits and coalesced requests over all lookups)."""
+        with self._lock:
+            stats = dict(self._stats, entries=len(self._entries), bytes=self._bytes)
+        lookups = stats["hits"] + stats["misses"] + stats["coalesced"]
+        stats["hit_rate"] = (stats["hits"] + stats["coalesced"]) / lookups if lookups else 0.0
+        return stats
+
+
+# --- Part 2: Request Keys ---
+
+def _normalize_text(text: str) -> str:
+    return " ".join(text.casefold().split())
+
+
+def _content_key(content: types.Content) -> Dict[str, Any]:
+    parts = []
+    for part in content.parts or ():
+        if part.text is not None:
+            if not part.thought:
+                parts.append({"text": _normalize_text(part.text)})
+        elif part.function_call is not None:
+            parts.append({"call": part.function_call.name, "args": part.function_call.args or {}})
+        elif part.function_response is not None:
+            parts.append({"response": part.function_response.name, "value": part.function_response.response or {}})
+        else:
+            # Inline data and the like: keyed on the full part.
+            parts.append(part.model_dump(mode="json", exclude_none=True))
+    return {"role": content.role, "parts": parts}
+
+
+def _is_user_message(content: types.Content) -> bool:
+    return content.role == "user" and any(part.text for part in content.parts or ())
+
+
+def relevant_contents(contents: List[types.Content], context_turns: Optional[int]) -> List[types.Content]:
+    """The contents from the start of the (context_turns + 1)-th most recent user message on."""
+    if context_turns is None:
+        return contents
+    seen = 0
+    for index in range(len(contents) - 1, -1, -1):
+        if _is_user_message(contents[index]):
+            seen += 1
+            if seen > context_turns:
+                return contents[index:]
+    return contents
+
+
+def request_key(llm_request: LlmRequest, stream: bool = False, context_turns: Optional[int] = None) -> str:
+    """
+    Hashes the parts of a request that determine the model's answer.
+
+    Args:
+        llm_request (LlmRequest): The request ADK is about to send.
+        stream (bool): Streamed and non-streamed responses are cached separately.
+        context_turns (Optional[int]): Earlier turns to include; None (the default) for all.
+
+    Returns:
+        str: A hex SHA-256 digest.
+    """
+    config = llm_request.config.model_dump(mode="json", exclude_none=True) if llm_request.config else {}
+    config.pop("http_options", None)
+    key = {
+        "model": llm_request.model,
+        "stream": stream,
+        "config": config,
+        "contents": [_content_key(content) for content in relevant_contents(llm_request.contents, context_turns)],
+    }
+    encoded = json.dumps(key, sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=str)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+def _is_cacheable(responses: List[LlmResponse]) -> bool:
+    return bool(responses) and all(
+        response.error_code is None and not response.interrupted for response in responses
+    ) and not responses[-1].partial
+
+
+# --- Part 3: The Caching Model ---
+
+class CachingLlm(BaseLlm):
+    """
+    A BaseLlm that answers repeated requests from a ResponseCache.
+
+    Attributes:
+        inner (BaseLlm): The model that answers cache misses.
+        cache (ResponseCache): Where responses are kept.
+        context_turns (Optional[int]): Earlier turns that are part of the key; None for all.
+    """
+
+    inner: BaseLlm
+    cache: Any
+    context_turns: Optional[int] = None
+
+    _inflight: Dict[str, "asyncio.Future"] = PrivateAttr(default_factory=dict)
+
+    async def generate_content_async(
+        self, llm_request: LlmRequest, stream: bool = False
+    ) -> AsyncGenerator[LlmResponse, None]:
+        start = time.perf_counter()
+        key = request_key(llm_request, stream, self.context_turns)
+
+        entry = self.cache.get(key)
+        if entry is not None:
+            self.cache.record("hits", max(0.0, entry.upstream_ms - (time.perf_counter() - start) * 1000))
+            for response in entry.responses:
+                yield LlmResponse.model_validate_json(response)
+            return
+
+        loop = asyncio.get_running_loop()
+        leader = self._inflight.get(key)
+        if leader is not None and leader.get_loop() is loop:
+            # Same request already on its way upstream: wait for its answer.
+            result = await asyncio.shield(leader)
+            if result is not None:
+                responses, upstream_ms = result
+                self.cache.record("coalesced", max(0.0, upstream_ms - (time.perf_counter() - start) * 1000))
+                for response in responses:
+                    yield LlmResponse.model_validate_json(response)
+                return
+            # The leader gave up without an answer; ask the model ourselves.
+
+        future = loop.create_future()
+        self._inflight.setdefault(key, future)
+        recorded: List[str] = []
+        responses: List[LlmResponse] = []
+        completed = False
+        try:
+            async for response in self.inner.generate_content_async(llm_request, stream=stream):
+                # Serialized before ADK sees it; ADK fills in function call ids on the object.
+                recorded.append(response.model_dump_json(exclude_none=True))
+                responses.append(response)
+                yield response
+            completed = True
+        except Exception as e:
+            if not future.done():
+                future.set_exception(e)
+                future.exception()  # retrieved, so asyncio does not warn when nobody was waiting
+            raise
+        finally:
+            if self._inflight.get(key) is future:
+                del self._inflight[key]
+            upstream_ms = (time.perf_counter() - start) * 1000
+            cacheable = completed and _is_cacheable(responses)
+            if not future.done():
+                future.set_result((recorded, upstream_ms) if cacheable else None)
+            if cacheable:
+                self.cache.put(key, recorded, upstream_ms)
+            self.cache.record("misses" if cacheable else "uncacheable")
+
+    def connect(self, llm_request: LlmRequest) -> BaseLlmConnection:
+        # Live (bidirectional) sessions are not cached.
+        return self.inner.connect(llm_request)
+
+
+_shared_cache: Optional[ResponseCache] = None
+_shared_lock = threading.Lock()
+
+
+def get_shared_cache() -> ResponseCache:
+    """The process-wide ResponseCache used by with_response_cache() when none is given."""
+    global _shared_cache
+    with _shared_lock:
+        if _shared_cache is None:
+            _shared_cache = ResponseCache()
+        return _shared_cache
+
+
+def with_response_cache(model: Union[str, BaseLlm], cache: Optional[ResponseCache] = None,
+                        ttl_seconds: Optional[float] = None, context_turns: Optional[int] = None) -> BaseLlm:
+    """
+    Wraps a model (an instance or a name such as 'gemini-2.0-flash') in a CachingLlm.
+
+    Args:
+        model (Union[str, BaseLlm]): The model to put the cache in front of.
+        cache (Optional[ResponseCache]): Defaults to get_shared_cache().
+        ttl_seconds (Optional[float]): Creates a dedicated cache with this TTL instead.
+        context_turns (Optional[int]): Earlier turns that are part of the key; None for all.
+
+    Returns:
+        BaseLlm: The caching model, to pass as an agent's `model`.
+    """
+    inner = LLMRegistry.new_llm(model) if isinstance(model, str) else model
+    if cache is None:
+        cache = ResponseCache(ttl_seconds=ttl_seconds) if ttl_seconds is not None else get_shared_cache()
+    return CachingLlm(model=inner.model, inner=inner, cache=cache, context_turns=context_turns)
@@ -0,0 +1,466 @@
+"""
+A persistent ADK session service on a local SQLite file.
+
+    from adk_utils.sqlite_session_service import SqliteSessionService
+
+    session_service = SqliteSessionService("sessions.db")
+    runner = Runner(agent=root_agent, app_name=APP_NAME, session_service=session_service)
+
+Storage layout:
+  - sessions:    one row per session holding its current session-scoped state.
+  - app_states / user_states: the current 'app:' and 'user:' state.
+  - events:      the event log. State deltas travel inside the events, while
+                 the tables above hold the materialized state, so reading a
+                 session never replays its history.
+
+The database runs in WAL mode, so readers in other processes are not blocked
+by a writer. Statements are parsed once and reused from the driver's
+statement cache.
+
+Event writes are batched per turn. The session object the runner holds is
+updated immediately. The rows are written in one transaction when the agent's
+final response arrives (the user's message that opens the turn is only
+buffered), when `max_batch_events` are pending, or before any read, delete or
+close() of that session. A process that dies mid-turn loses at most that turn's
+unwritten events; pass batch_events=False to write every event as it arrives.
+
+All database work runs in worker threads (asyncio.to_thread), so a write
+waiting on another process's lock (up to busy_timeout) never stalls the event
+loop. Writes of one session are serialized by a striped lock, so its batches
+commit in order.
+"""
+
+import asyncio
+import atexit
+import contextlib
+import copy
+import json
+import os
+import threading
+import time
+import uuid
+import weakref
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from google.adk.events.event import Event
+from google.adk.sessions.base_session_service import (
+    BaseSessionService,
+    GetSessionConfig,
+    ListSessionsResponse,
+)
+from google.adk.sessions.session import Session
+from google.adk.sessions.state import State
+from sqlalchemy import create_engine, event as sa_event, text
+from sqlalchemy.engine import Connection
+
+from .bounded_session_service import BoundedSessionService
+from .state_offload import DEFAULT_THRESHOLD_BYTES, OffloadingSessionService, default_blob_root
+
+SCHEMA = (
+    """CREATE TABLE IF NOT EXISTS sessions (
+        app_name TEXT NOT NULL,
+        user_id TEXT NOT NULL,
+        id TEXT NOT NULL,
+        state TEXT NOT NULL,
+        create_time REAL NOT NULL,
+        update_time REAL NOT NULL,
+        PRIMARY KEY (app_name, user_id, id)
+    )""",
+    """CREATE TABLE IF NOT EXISTS app_states (
+        app_name TEXT PRIMARY KEY,
+        state TEXT NOT NULL,
+        update_time REAL NOT NULL
+    )""",
+    """CREATE TABLE IF NOT EXISTS user_states (
+        app_name TEXT NOT NULL,
+        user_id TEXT NOT NULL,
+        state TEXT NOT NULL,
+        update_time REAL NOT NULL,
+        PRIMARY KEY (app_name, user_id)
+    )""",
+    """CREATE TABLE IF NOT EXISTS events (
+        seq INTEGER PRIMARY KEY,
+        app_name TEXT NOT NULL,
+        user_id TEXT NOT NULL,
+        session_id TEXT NOT NULL,
+        id TEXT NOT NULL,
+        invocation_id TEXT NOT NULL,
+        author TEXT NOT NULL,
+        timestamp REAL NOT NULL,
+        event TEXT NOT NULL
+    )""",
+    "CREATE INDEX IF NOT EXISTS events_by_session ON events (app_name, user_id, session_id, seq)",
+)
+
+# Statements are built once; SQLAlchemy caches their compiled form and sqlite3
+# keeps the prepared statement per connection.
+_INSERT_SESSION = text(
+    "INSERT INTO sessions (app_name, user_id, id, state, create_time, update_time) "
+    "VALUES (:app_name, :user_id, :id, :state, :now, :now)"
+)
+_SELECT_SESSION = text(
+    "SELECT state, update_time FROM sessions WHERE app_name = :app_name AND user_id = :user_id AND id = :id"
+)
+_UPDATE_SESSION = text(
+    "UPDATE sessions SET state = :state, update_time = :update_time "
+    "WHERE app_name = :app_name AND user_id = :user_id AND id = :id"
+)
+_TOUCH_SESSION = text(
+    "UPDATE sessions SET update_time = :update_time WHERE app_name = :app_name AND user_id = :user_id AND id = :id"
+)
+_LIST_SESSIONS = text(
+    "SELECT id, update_time FROM sessions WHERE app_name = :app_name AND user_id = :user_id ORDER BY create_time"
+)
+_DELETE_SESSION = text("DELETE FROM sessions WHERE app_name = :app_name AND user_id = :user_id AND id = :id")
+_DELETE_EVENTS = text("DELETE FROM events WHERE app_name = :app_name AND user_id = :user_id AND session_id = :id")
+_INSERT_EVENT = text(
+    "INSERT INTO events (app_name, user_id, session_id, id, invocation_id, author, timestamp, event) "
+    "VALUES (:app_name, :user_id, :session_id, :id, :invocation_id, :author, :timestamp, :event)"
+)
+_SELECT_EVENTS = text(
+    "SELECT event FROM events WHERE app_name = :app_name AND user_id = :user_id AND session_id = :id "
+    "AND timestamp >= :after ORDER BY seq"
+)
+_SELECT_RECENT_EVENTS = text(
+    "SELECT event FROM (SELECT seq, event FROM events WHERE app_name = :app_name AND user_id = :user_id "
+    "AND session_id = :id AND timestamp >= :after ORDER BY seq DESC LIMIT :limit) ORDER BY seq"
+)
+_SELECT_APP_STATE = text("SELECT state FROM app_states WHERE app_name = :app_name")
+_UPSERT_APP_STATE = text(
+    "INSERT INTO app_states (app_name, state, update_time) VALUES (:app_name, :state, :now) "
+    "ON CONFLICT (app_name) DO UPDATE SET state = excluded.state, update_time = excluded.update_time"
+)
+_SELECT_USER_STATE = text("SELECT state FROM user_states WHERE app_name = :app_name AND user_id = :user_id")
+_UPSERT_USER_STATE = text(
+    "INSERT INTO user_states (app_name, user_id, state, update_time) VALUES (:app_name, :user_id, :state, :now) "
+    "ON CONFLICT (app_name, user_id) DO UPDATE SET state = excluded.state, update_time = excluded.update_time"
+)
+
+
+def _split_state(state: Dict[str, Any]) -> Tuple[Dict[str, Any], Dict[str, Any], Dict[str, Any]]:
+    """Splits state into (app, user, session) parts, dropping 'temp:' keys and the prefixes."""
+    app_state, user_state, session_state = {}, {}, {}
+    for key, value in state.items():
+        if key.startswith(State.APP_PREFIX):
+            app_state[key[len(State.APP_PREFIX):]] = value
+        elif key.startswith(State.USER_PREFIX):
+            user_state[key[len(State.USER_PREFIX):]] = value
+        elif not key.startswith(State.TEMP_PREFIX):
+            session_state[key] = value
+    return app_state, user_state, session_state
+
+
+# Services whose buffered events are written when the interpreter exits normally.
+# Held weakly, so a service that is no longer used can still be garbage collected.
+_live_services: "weakref.WeakSet[SqliteSessionService]" = weakref.WeakSet()
+
+
+@atexit.register
+def _flush_live_services() -> None:
+    for service in list(_live_services):
+        try:
+            service.flush()
+        except Exception as e:
+            print(f"--- WARNING: Could not write pending session events to '{service.db_path}': {e} ---")
+
+
+class _PendingWrites:
+    """Events and state changes of one session not yet written to the database."""
+
+    def __init__(self):
+        self.events: List[Dict[str, Any]] = []
+        self.session_delta: Dict[str, Any] = {}
+        self.app_delta: Dict[str, Any] = {}
+        self.user_delta: Dict[str, Any] = {}
+        self.update_time = 0.0
+
+
+class SqliteSessionService(BaseSessionService):
+    """
+    Session service that keeps sessions, state and events in a SQLite database.
+
+    Drop-in replacement for InMemorySessionService: pass it to
+    Runner(session_service=...). Several processes can share the same file.
+
+    Args:
+        db_path (str): The database file. Created with its tables if missing.
+        batch_events (bool): Buffer each turn's events and write them in one
+                             transaction (see the module docstring).
+        max_batch_events (int): Write a session's buffer once it holds this many events.
+    """
+
+    def __init__(self, db_path: str, batch_events: bool = True, max_batch_events: int = 64):
+        self.db_path = db_path
+        self.batch_events = batch_events
+        self.max_batch_events = max_batch_events
+        self._engine = create_engine(
+            f"sqlite:///{os.path.abspath(db_path)}",
+            connect_args={"check_same_thread": False, "cached_statements": 256},
+        )
+        sa_event.listen(self._engine, "connect", self._on_connect)
+        sa_event.listen(self._engine, "begin", self._on_begin)
+        # Guards _pending only and is never held during database I/O.
+        self._lock = threading.Lock()
+        self._pending: Dict[Tuple[str, str, str], _PendingWrites] = {}
+        # Held while a session's rows are written or read, so its batches commit in order.
+        self._session_locks = [threading.Lock() for _ in range(64)]
+
+        with self._write() as conn:
+            for statement in SCHEMA:
+                conn.exec_driver_sql(statement)
+        _live_services.add(self)
+
+    @staticmethod
+    def _on_connect(dbapi_connection, connection_record) -> None:
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        # Durable at checkpoints; in WAL mode a crash can lose only the last commits, never corrupt.
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute("PRAGMA busy_timeout=5000")
+        cursor.close()
+        # Let SQLAlchemy's "begin" event issue BEGIN itself (see _on_begin).
+        dbapi_connection.isolation_level = None
+
+    @staticmethod
+    def _on_begin(conn: Connection) -> None:
+        # Writers take the write lock up front, so two processes never deadlock
+        # upgrading read transactions; readers use a plain deferred BEGIN.
+        if conn.get_execution_options().get("write"):
+            conn.exec_driver_sql("BEGIN IMMEDIATE")
+        else:
+            conn.exec_driver_sql("BEGIN")
+
+    @contextlib.contextmanager
+    def _write(self) -> Iterator[Connection]:
+        """A connection in a write transaction, committed on success."""
+        with self._engine.connect() as conn:
+            conn.execution_options(write=True)
+            with conn.begin():
+                yield conn
+
+    # --- Reading ---
+
+    def _load_state(self, conn: Connection, app_name: str, user_id: str, session_state: Dict[str, Any]) -> Dict[str, Any]:
+        state = dict(session_state)
+        app_row = conn.execute(_SELECT_APP_STATE, {"app_name": app_name}).first()
+        if app_row is not None:
+            for key, value in json.loads(app_row[0]).items():
+                state[State.APP_PREFIX + key] = value
+        user_row = conn.execute(_SELECT_USER_STATE, {"app_name": app_name, "user_id": user_id}).first()
+        if user_row is not None:
+            for key, value in json.loads(user_row[0]).items():
+                state[State.USER_PREFIX + key] = value
+        return state
+
+    def _session_lock(self, key: Tuple[str, str, str]) -> threading.Lock:
+        return self._session_locks[hash(key) % len(self._session_locks)]
+
+    def _create_session(self, app_name: str, user_id: str, state: Dict[str, Any], session_id: str) -> Session:
+        app_state, user_state, session_state = _split_state(state)
+        now = time.time()
+        with self._write() as conn:
+            if conn.execute(_SELECT_SESSION, {"app_name": app_name, "user_id": user_id, "id": session_id}).first():
+                raise ValueError(f"Session '{session_id}' already exists for app '{app_name}' and user '{user_id}'.")
+            conn.execute(_INSERT_SESSION, {"app_name": app_name, "user_id": user_id, "id": session_id,
+                                           "state": json.dumps(session_state), "now": now})
+            self._merge_shared_state(conn, app_name, user_id, app_state, user_state, now)
+            merged_state = self._load_state(conn, app_name, user_id, session_state)
+        # 'temp:' keys are never stored, but the returned session carries them like InMemorySessionService does.
+        merged_state.update({key: value for key, value in state.items() if key.startswith(State.TEMP_PREFIX)})
+        return Session(app_name=app_name, user_id=user_id, id=session_id, state=merged_state, last_update_time=now)
+
+    async def create_session(
+        self,
+        *,
+        app_name: str,
+        user_id: str,
+        state: Optional[Dict[str, Any]] = None,
+        session_id: Optional[str] = None,
+    ) -> Session:
+        session_id = session_id.strip() if session_id and session_id.strip() else str(uuid.uuid4())
+        return await asyncio.to_thread(self._create_session, app_name, user_id, state or {}, session_id)
+
+    def _get_session(self, key: Tuple[str, str, str], config: Optional[GetSessionConfig]) -> Optional[Session]:
+        app_name, user_id, session_id = key
+        with self._session_lock(key):
+            self._flush(key)
+            with self._engine.connect() as conn:
+                params = {"app_name": app_name, "user_id": user_id, "id": session_id}
+                row = conn.execute(_SELECT_SESSION, params).first()
+                if row is None:
+                    return None
+                state = self._load_state(conn, app_name, user_id, json.loads(row[0]))
+
+                params["after"] = config.after_timestamp if config and config.after_timestamp else 0.0
+                if config and config.num_recent_events:
+                    params["limit"] = config.num_recent_events
+                    event_rows = conn.execute(_SELECT_RECENT_EVENTS, params).all()
+                else:
+                    event_rows = conn.execute(_SELECT_EVENTS, params).all()
+
+        events = [Event.model_validate_json(event_row[0]) for event_row in event_rows]
+        return Session(app_name=app_name, user_id=user_id, id=session_id, state=state,
+                       events=events, last_update_time=row[1])
+
+    async def get_session(
+        self,
+        *,
+        app_name: str,
+        user_id: str,
+        session_id: str,
+        config: Optional[GetSessionConfig] = None,
+    ) -> Optional[Session]:
+        return await asyncio.to_thread(self._get_session, (app_name, user_id, session_id), config)
+
+    def _list_sessions(self, app_name: str, user_id: str) -> List[Any]:
+        self.flush()
+        with self._engine.connect() as conn:
+            return conn.execute(_LIST_SESSIONS, {"app_name": app_name, "user_id": user_id}).all()
+
+    async def list_sessions(self, *, app_name: str, user_id: str) -> ListSessionsResponse:
+        rows = await asyncio.to_thread(self._list_sessions, app_name, user_id)
+        return ListSessionsResponse(sessions=[
+            Session(app_name=app_name, user_id=user_id, id=row[0], state={}, events=[], last_update_time=row[1])
+            for row in rows
+        ])
+
+    def _delete_session(self, key: Tuple[str, str, str]) -> None:
+        app_name, user_id, session_id = key
+        with self._session_lock(key):
+            with self._lock:
+                self._pending.pop(key, None)
+            with self._write() as conn:
+                params = {"app_name": app_name, "user_id": user_id, "id": session_id}
+                conn.execute(_DELETE_EVENTS, params)
+                conn.execute(_DELETE_SESSION, params)
+
+    async def delete_session(self, *, app_name: str, user_id: str, session_id: str) -> None:
+        await asyncio.to_thread(self._delete_session, (app_name, user_id, session_id))
+
+    # --- Writing ---
+
+    async def append_event(self, session: Session, event: Event) -> Event:
+        if event.partial:
+            return event
+        # Updates the caller's session object (state and events) right away.
+        await super().append_event(session=session, event=event)
+        session.last_update_time = event.timestamp
+
+        key = (session.app_name, session.user_id, session.id)
+        with self._lock:
+            pending = self._pending.get(key)
+            if pending is None:
+                pending = self._pending[key] = _PendingWrites()
+            pending.events.append({
+                "app_name": session.app_name,
+                "user_id": session.user_id,
+                "session_id": session.id,
+                "id": event.id,
+                "invocation_id": event.invocation_id,
+                "author": event.author,
+                "timestamp": event.timestamp,
+                "event": event.model_dump_json(exclude_none=True),
+            })
+            if event.actions and event.actions.state_delta:
+                app_delta, user_delta, session_delta = _split_state(event.actions.state_delta)
+                pending.app_delta.update(copy.deepcopy(app_delta))
+                pending.user_delta.update(copy.deepcopy(user_delta))
+                pending.session_delta.update(copy.deepcopy(session_delta))
+            pending.update_time = event.timestamp
+            # The user's message counts as a final response too; it only opens the turn.
+            turn_done = event.author != "user" and event.is_final_response()
+            flush_now = not self.batch_events or turn_done or len(pending.events) >= self.max_batch_events
+
+        if flush_now:
+            await asyncio.to_thread(self._flush_in_order, key)
+        return event
+
+    def _merge_shared_state(self, conn: Connection, app_name: str, user_id: str,
+                            app_delta: Dict[str, Any], user_delta: Dict[str, Any], now: float) -> None:
+        if app_delta:
+            row = conn.execute(_SELECT_APP_STATE, {"app_name": app_name}).first()
+            app_state = json.loads(row[0]) if row is not None else {}
+            app_state.update(app_delta)
+            conn.execute(_UPSERT_APP_STATE, {"app_name": app_name, "state": json.dumps(app_state), "now": now})
+        if user_delta:
+            row = conn.execute(_SELECT_USER_STATE, {"app_name": app_name, "user_id": user_id}).first()
+            user_state = json.loads(row[0]) if row is not None else {}
+            user_state.update(user_delta)
+            conn.execute(_UPSERT_USER_STATE, {"app_name": app_name, "user_id": user_id,
+                                              "state": json.dumps(user_state), "now": now})
+
+    def _flush_in_order(self, key: Tuple[str, str, str]) -> None:
+        with self._session_lock(key):
+            self._flush(key)
+
+    def _flush(self, key: Tuple[str, str, str]) -> None:
+        """
+        Writes one session's pending events and state changes in a single
+        transaction. The caller holds the session's lock.
+        """
+        with self._lock:
+            pending = self._pending.pop(key, None)
+        if pending is None:
+            return
+        app_name, user_id, session_id = key
+        params = {"app_name": app_name, "user_id": user_id, "id": session_id}
+        with self._write() as conn:
+            row = conn.execute(_SELECT_SESSION, params).first()
+            if row is None:
+                return  # deleted meanwhile
+            conn.execute(_INSERT_EVENT, pending.events)
+            if pending.session_delta:
+                # Deltas are merged into the stored state, so writers of different keys do not clobber each other.
+                session_state = json.loads(row[0])
+                session_state.update(pending.session_delta)
+                conn.execute(_UPDATE_SESSION, {**params, "state": json.dumps(session_state),
+                                               "update_time": pending.update_time})
+            else:
+                conn.execute(_TOUCH_SESSION, {**params, "update_time": pending.update_time})
+            self._merge_shared_state(conn, app_name, user_id, pending.app_delta, pending.user_delta,
+                                     pending.update_time)
+
+    def flush(self) -> None:
+        """Writes every session's pending events now (blocking; call it from a thread or at shutdown)."""
+        with self._lock:
+            keys = list(self._pending)
+        for key in keys:
+            self._flush_in_order(key)
+
+    def close(self) -> None:
+        """Writes pending events and closes the database connections."""
+        _live_services.discard(self)
+        self.flush()
+        self._engine.dispose()
+
+
+def create_session_service() -> BaseSessionService:
+    """
+    Returns the session service selected by the environment.
+
+    Sessions go to a SqliteSessionService on the file named by ADK_SESSION_DB.
+    When the variable is not set they stay in memory, in a BoundedSessionService
+    limited by ADK_SESSION_MAX_PER_APP (default 10000 sessions),
+    ADK_SESSION_MAX_BYTES_PER_APP and ADK_SESSION_IDLE_TTL (seconds; unset or 0
+    means no limit), with evicted sessions spilled to ADK_SESSION_SPILL_DIR if
+    set (see adk_utils.bounded_session_service). When a blob directory is
+    configured (ADK_BLOB_DIR, or ADK_SESSION_DB), state values of
+    ADK_STATE_OFFLOAD_BYTES (default 32 KiB) or more are kept there instead
+    (see adk_utils.state_offload); set it to 0 to disable that. Without a
+    directory nothing is offloaded, since an in-memory blob store would only
+    move the values, not free them.
+    """
+    db_path = os.getenv("ADK_SESSION_DB")
+    service: BaseSessionService
+    if db_path:
+        service = SqliteSessionService(db_path)
+    else:
+        max_bytes = int(os.getenv("ADK_SESSION_MAX_BYTES_PER_APP", "0"))
+        idle_ttl = float(os.getenv("ADK_SESSION_IDLE_TTL", "0"))
+        service = BoundedSessionService(max_sessions_per_app=int(os.getenv("ADK_SESSION_MAX_PER_APP", "10000")),
+                                        max_bytes_per_app=max_bytes or None, idle_ttl_seconds=idle_ttl or None,
+                                        spill_dir=os.getenv("ADK_SESSION_SPILL_DIR") or None)
+    threshold = int(os.getenv("ADK_STATE_OFFLOAD_BYTES", DEFAULT_THRESHOLD_BYTES))
+    if threshold > 0 and default_blob_root() is not None:
+        service = OffloadingSessionService(service, threshold_bytes=threshold)
+    return service
@@ -0,0 +1,314 @@
+"""
+Keeps large values out of session state.
+
+A tool that stores a 10k-row result in state makes every copy of the
+session (InMemorySessionService deep-copies it on each read), every event
+delta and every stored snapshot carry that payload. OffloadingSessionService
+wraps any session service and, as events are appended, moves state values
+larger than a threshold into a content-addressed BlobStore. State and the
+event's state_delta keep only a small handle:
+
+    {"__blob__": "sha256:9f2c...", "bytes": 1843211, "type": "list", "length": 10000}
+
+The value is read back only when someone asks for it:
+
+    rows = load_state_value(tool_context.state, "report_rows")
+
+Identical values are stored once. Blobs are not deleted with their sessions,
+because other sessions may share them; clear the blob directory to reclaim space.
+A store without a directory keeps blobs in memory up to `max_memory_bytes` and
+drops the least recently used ones beyond that, so it cannot grow without
+bound, but a handle can then outlive its value (load raises KeyError).
+create_session_service() therefore only offloads when a directory is configured.
+
+Note that this covers state only. A tool's return value still travels in its
+function_response event, because the model has to see it.
+"""
+
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+from google.adk.events.event import Event
+from google.adk.sessions.base_session_service import (
+    BaseSessionService,
+    GetSessionConfig,
+    ListSessionsResponse,
+)
+from google.adk.sessions.session import Session
+
+HANDLE_KEY = "__blob__"
+
+# Values whose JSON encoding is at least this many bytes are offloaded.
+DEFAULT_THRESHOLD_BYTES = 32 * 1024
+
+
+# --- Part 1: The Blob Store ---
+
+class BlobStore:
+    """
+    Content-addressed store for JSON values.
+
+    Blobs are named by the SHA-256 of their JSON encoding and written once;
+    storing a value that is already there costs only the hash.
+
+    Args:
+        root (Optional[str]): Directory for the blob files, created if missing.
+                              With None, blobs are kept in memory (state stays
+                              small, but nothing survives the process).
+        cache_size (int): Number of recently read blobs kept in memory.
+        max_memory_bytes (int): Without a root, total size of the blobs kept;
+                                the least recently used are dropped beyond it.
+    """
+
+    def __init__(self, root: Optional[str] = None, cache_size: int = 32,
+                 max_memory_bytes: int = 64 * 1024 * 1024):
+        self.root = root
+        self.cache_size = cache_size
+        self.max_memory_bytes = max_memory_bytes
+        self._memory: "OrderedDict[str, bytes]" = OrderedDict()
+        self._memory_bytes = 0
+        self._cache: "OrderedDict[str, bytes]" = OrderedDict()
+        self._lock = threading.Lock()
+        if root is not None:
+            os.makedirs(root, exist_ok=True)
+
+    def _path(self, digest: str) -> str:
+        return os.path.join(self.root, digest[:2], digest[2:])
+
+    def put_bytes(self, data: bytes) -> str:
+        """Stores raw bytes and returns their SHA-256 hex digest."""
+        digest = hashlib.sha256(data).hexdigest()
+        if self.root is None:
+            with self._lock:
+                if digest in self._memory:
+                    self._memory.move_to_end(digest)
+                else:
+                    self._memory[digest] = data
+                    self._memory_bytes += len(data)
+                    while len(self._memory) > 1 and self._memory_bytes > self.max_memory_bytes:
+                        _, dropped = self._memory.popitem(last=False)
+                        self._memory_bytes -= len(dropped)
+            return digest
+        path = self._path(digest)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # Written under a temporary name and renamed, so readers never see a partial blob.
+            tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        return digest
+
+    def get_bytes(self, digest: str) -> bytes:
+        """
+        Returns the bytes stored under a digest.
+
+        Raises:
+            KeyError: If no blob has that digest.
+        """
+        with self._lock:
+            data = self._memory.get(digest) if self.root is None else self._cache.get(digest)
+            if data is not None:
+                (self._cache if self.root is not None else self._memory).move_to_end(digest)
+                return data
+        if self.root is None:
+            raise KeyError(digest)
+        try:
+            with open(self._path(digest), "rb") as f:
+                data = f.read()
+        except FileNotFoundError:
+            raise KeyError(digest) from None
+        with self._lock:
+            self._cache[digest] = data
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return data
+
+    def put(self, value: Any, encoded: Optional[bytes] = None) -> Dict[str, Any]:
+        """
+        Stores a JSON value and returns its handle.
+
+        Args:
+            value (Any): A JSON-serializable value.
+            encoded (Optional[bytes]): The value's JSON encoding, if the caller already has it.
+
+        Returns:
+            Dict[str, Any]: The handle to keep in state in place of the value.
+        """
+        if encoded is None:
+            encoded = _encode(value)
+        handle: Dict[str, Any] = {HANDLE_KEY: "sha256:" + self.put_bytes(encoded), "bytes": len(encoded),
+                                  "type": type(value).__name__}
+        if isinstance(value, (list, dict, str)):
+            handle["length"] = len(value)
+        return handle
+
+    def get(self, handle: Dict[str, Any]) -> Any:
+        """Loads the value a handle refers to. Each call returns a fresh copy."""
+        digest = handle[HANDLE_KEY].partition(":")[2]
+        return json.loads(self.get_bytes(digest))
+
+
+def _encode(value: Any) -> bytes:
+    return json.dumps(value, separators=(",", ":"), ensure_ascii=False, default=str).encode("utf-8")
+
+
+def is_handle(value: Any) -> bool:
+    """True if a state value is a blob handle rather than the value itself."""
+    return isinstance(value, dict) and isinstance(value.get(HANDLE_KEY), str)
+
+
+_default_store: Optional[BlobStore] = None
+_default_lock = threading.Lock()
+
+
+def default_blob_root() -> Optional[str]:
+    """The blob directory configured by ADK_BLOB_DIR or ADK_SESSION_DB, or None."""
+    root = os.getenv("ADK_BLOB_DIR")
+    if not root and os.getenv("ADK_SESSION_DB"):
+        root = os.getenv("ADK_SESSION_DB") + ".blobs"
+    return root or None
+
+
+def get_default_blob_store() -> BlobStore:
+    """
+    Returns the process-wide store: a directory named by ADK_BLOB_DIR, next to
+    ADK_SESSION_DB ('<db>.blobs') when sessions are persistent, or memory otherwise.
+    """
+    global _default_store
+    with _default_lock:
+        if _default_store is None:
+            _default_store = BlobStore(default_blob_root())
+        return _default_store
+
+
+# --- Part 2: Offloading and Loading State Values ---
+
+def offload_large_values(delta: Dict[str, Any], store: BlobStore,
+                         threshold_bytes: int = DEFAULT_THRESHOLD_BYTES) -> int:
+    """
+    Replaces large values in a state dict (or state delta) with handles, in place.
+
+    Numbers, booleans and short strings are never encoded, so a typical delta
+    costs a few type checks. 'temp:' values are offloaded too: they never reach
+    session state, but ADK keeps them in the stored event's state_delta.
+
+    Args:
+        delta (Dict[str, Any]): The state values to inspect.
+        store (BlobStore): Where large values go.
+        threshold_bytes (int): Minimum JSON size of an offloaded value.
+
+    Returns:
+        int: Number of values offloaded.
+    """
+    offloaded = 0
+    for key, value in delta.items():
+        if is_handle(value):
+            continue
+        if isinstance(value, str):
+            # UTF-8 needs at most 4 bytes per character.
+            if len(value) * 4 < threshold_bytes:
+                continue
+        elif not isinstance(value, (list, dict, tuple)):
+            continue
+        encoded = _encode(value)
+        if len(encoded) >= threshold_bytes:
+            delta[key] = store.put(value, encoded)
+            offloaded += 1
+    return offloaded
+
+
+def resolve_value(value: Any, store: Optional[BlobStore] = None) -> Any:
+    """Returns the value behind a handle, or the value itself if it is not a handle."""
+    if not is_handle(value):
+        return value
+    return (store or get_default_blob_store()).get(value)
+
+
+def load_state_value(state: Any, key: str, default: Any = None, store: Optional[BlobStore] = None) -> Any:
+    """
+    Reads a state key, loading the value from the blob store if it was offloaded.
+
+    Args:
+        state (Any): session.state, or a context's State object.
+        key (str): The state key.
+        default (Any): Returned when the key is not set.
+        store (Optional[BlobStore]): Defaults to get_default_blob_store().
+
+    Returns:
+        Any: The stored value.
+    """
+    return resolve_value(state.get(key, default), store)
+
+
+# --- Part 3: The Session Service Wrapper ---
+
+class OffloadingSessionService(BaseSessionService):
+    """
+    Wraps a session service so large state values are stored as blob handles.
+
+    Offloading happens in append_event, before the wrapped service sees the
+    event, so the runner's session object, the stored state and the event's
+    state_delta all hold the handle. Everything else is delegated unchanged.
+
+    Args:
+        inner (BaseSessionService): The service that stores the sessions.
+        store (Optional[BlobStore]): Defaults to get_default_blob_store().
+        threshold_bytes (int): Minimum JSON size of an offloaded value.
+    """
+
+    def __init__(self, inner: BaseSessionService, store: Optional[BlobStore] = None,
+                 threshold_bytes: int = DEFAULT_THRESHOLD_BYTES):
+        self.inner = inner
+        self.store = store or get_default_blob_store()
+        self.threshold_bytes = threshold_bytes
+
+    async def create_session(
+        self,
+        *,
+        app_name: str,
+        user_id: str,
+        state: Optional[Dict[str, Any]] = None,
+        session_id: Optional[str] = None,
+    ) -> Session:
+        if state:
+            state = dict(state)
+            offload_large_values(state, self.store, self.threshold_bytes)
+        return await self.inner.create_session(app_name=app_name, user_id=user_id, state=state,
+                                               session_id=session_id)
+
+    async def get_session(
+        self,
+        *,
+        app_name: str,
+        user_id: str,
+        session_id: str,
+        config: Optional[GetSessionConfig] = None,
+    ) -> Optional[Session]:
+        return await self.inner.get_session(app_name=app_name, user_id=user_id, session_id=session_id,
+                                            config=config)
+
+    async def list_sessions(self, *, app_name: str, user_id: str) -> ListSessionsResponse:
+        return await self.inner.list_sessions(app_name=app_name, user_id=user_id)
+
+    async def delete_session(self, *, app_name: str, user_id: str, session_id: str) -> None:
+        await self.inner.delete_session(app_name=app_name, user_id=user_id, session_id=session_id)
+
+    async def append_event(self, session: Session, event: Event) -> Event:
+        if not event.partial and event.actions and event.actions.state_delta:
+            offload_large_values(event.actions.state_delta, self.store, self.threshold_bytes)
+        return await self.inner.append_event(session, event)
+
+    def __getattr__(self, name: str) -> Any:
+        # flush(), close() and the like of the wrapped service.
+        if name == "inner":
+            raise AttributeError(name)
+        return getattr(self.inner, name)
+
+    def load(self, session: Session, key: str, default: Any = None) -> Any:
+        """Reads a state key of a session, loading it from the blob store if it was offloaded."""
+        return load_state_value(session.state, key, default, self.store)
@@ -0,0 +1,195 @@
+"""
+Streams an agent's reply to the user as it is generated.
+
+The usual interaction helper waits for event.is_final_response() and prints
+the whole reply at the end. Here the runner runs in SSE streaming mode. The
+model's partial text events are forwarded as they arrive, and tool calls and
+tool results are reported as their own messages between the text chunks. So
+the user sees the first words while the model is still writing.
+
+    from adk_utils.streaming import print_agent_stream
+
+    await print_agent_stream(runner, "What is HSN 8544?", user_id, session_id)
+
+Server (Server-Sent Events over HTTP):
+
+    python -m adk_utils.streaming settyl --port 8001
+    curl -N -X POST localhost:8001/chat/stream \\
+         -H 'Content-Type: application/json' \\
+         -d '{"user_id": "u1", "session_id": "s1", "message": "Validate 0101"}'
+
+Every message carries a `type`:
+  - text:        {"text": "..."}, the next piece of the reply
+  - tool_call:   {"name": ..., "args": {...}}
+  - tool_result: {"name": ..., "response": {...}}
+  - final:       {"text": "...", "time_to_first_token_ms": ..., "total_ms": ...}
+  - error:       {"message": "..."}
+"""
+
+import argparse
+import json
+import time
+from typing import Any, AsyncGenerator, Dict, Optional
+
+from google.adk.agents.run_config import RunConfig, StreamingMode
+from google.adk.events.event import Event
+from google.adk.runners import Runner
+from google.genai import types
+
+STREAMING_RUN_CONFIG = RunConfig(streaming_mode=StreamingMode.SSE)
+
+
+# --- Part 1: Turning Events into Stream Messages ---
+
+def _text_of(event: Event) -> str:
+    if not event.content or not event.content.parts:
+        return ""
+    return "".join(part.text for part in event.content.parts if part.text and not part.thought)
+
+
+async def stream_agent_reply(runner: Runner, query: str, user_id: str, session_id: str,
+                             run_config: RunConfig = STREAMING_RUN_CONFIG) -> AsyncGenerator[Dict[str, Any], None]:
+    """
+    Runs one turn and yields its stream messages (see the module docstring) as they happen.
+
+    Partial text is yielded as it arrives. When the model then sends the whole
+    text again as a non-partial event (as Gemini does in SSE mode), it is not
+    repeated. A model that does not stream gets its text yielded in one piece.
+    The last message is always 'final' (or 'error').
+
+    Args:
+        runner (Runner): The runner for the agent.
+        query (str): The user's message.
+        user_id (str): The user.
+        session_id (str): An existing session.
+        run_config (RunConfig): Defaults to SSE streaming.
+    """
+    content = types.Content(role="user", parts=[types.Part(text=query)])
+    start = time.perf_counter()
+    first_token: Optional[float] = None
+    streamed = ""        # partial text of the current model response, already sent
+    reply_parts = []     # complete text of each model response this turn
+
+    try:
+        async for event in runner.run_async(user_id=user_id, session_id=session_id, new_message=content,
+                                            run_config=run_config):
+            for call in event.get_function_calls():
+                yield {"type": "tool_call", "name": call.name, "args": call.args or {}}
+            for response in event.get_function_responses():
+                yield {"type": "tool_result", "name": response.name, "response": response.response or {}}
+
+            text = _text_of(event)
+            if not text:
+                continue
+            if event.partial:
+                if first_token is None:
+                    first_token = time.perf_counter()
+                streamed += text
+                yield {"type": "text", "text": text}
+                continue
+            # A complete text event: either the aggregate of the partials just sent, or unstreamed text.
+            if text != streamed:
+                if first_token is None:
+                    first_token = time.perf_counter()
+                yield {"type": "text", "text": text[len(streamed):] if text.startswith(streamed) else text}
+            reply_parts.append(text)
+            streamed = ""
+    except Exception as e:
+        yield {"type": "error", "message": f"{type(e).__name__}: {e}"}
+        return
+
+    end = time.perf_counter()
+    yield {
+        "type": "final",
+        "text": "".join(reply_parts),
+        "time_to_first_token_ms": None if first_token is None else (first_token - start) * 1000,
+        "total_ms": (end - start) * 1000,
+    }
+
+
+async def print_agent_stream(runner: Runner, query: str, user_id: str, session_id: str) -> Dict[str, Any]:
+    """
+    Prints the agent's reply to the console as it streams in, with tool activity on its own lines.
+
+    Returns:
+        Dict[str, Any]: The 'final' (or 'error') message, including the timings.
+    """
+    print(f"\n>>> User Query: {query}")
+    print("<<< Agent Response: ", end="", flush=True)
+    last: Dict[str, Any] = {}
+    async for message in stream_agent_reply(runner, query, user_id, session_id):
+        if message["type"] == "text":
+            print(message["text"], end="", flush=True)
+        elif message["type"] == "tool_call":
+            print(f"\n    [calling {message['name']}({json.dumps(message['args'], default=str)[:200]})]", flush=True)
+        elif message["type"] == "tool_result":
+            print(f"    [{message['name']} returned]", flush=True)
+        else:
+            last = message
+    if last.get("type") == "error":
+        print(f"\n--- Error: {last['message']} ---")
+    else:
+        print()
+    return last
+
+
+def sse_message(message: Dict[str, Any]) -> str:
+    """Formats a stream message as a Server-Sent Events frame."""
+    return f"event: {message['type']}\ndata: {json.dumps(message, default=str, ensure_ascii=False)}\n\n"
+
+
+# --- Part 2: The HTTP Endpoint ---
+
+def create_streaming_app(runner: Runner):
+    """
+    Builds a FastAPI app with POST /chat/stream, which answers with an SSE stream.
+
+    The request body is {"user_id", "session_id", "message"}; the session is
+    created if it does not exist yet.
+    """
+    from fastapi import FastAPI
+    from fastapi.responses import StreamingResponse
+    from pydantic import BaseModel
+
+    class ChatRequest(BaseModel):
+        user_id: str
+        session_id: str
+        message: str
+
+    app = FastAPI(title=f"{runner.app_name} streaming")
+
+    @app.post("/chat/stream")
+    async def chat_stream(request: ChatRequest) -> StreamingResponse:
+        session_service = runner.session_service
+        session = await session_service.get_session(app_name=runner.app_name, user_id=request.user_id,
+                                                    session_id=request.session_id)
+        if session is None:
+            await session_service.create_session(app_name=runner.app_name, user_id=request.user_id,
+                                                 session_id=request.session_id)
+
+        async def frames() -> AsyncGenerator[str, None]:
+            async for message in stream_agent_reply(runner, request.message, request.user_id, request.session_id):
+                yield sse_message(message)
+
+        # No proxy buffering, or the chunks arrive all at once at the end.
+        return StreamingResponse(frames(), media_type="text/event-stream",
+                                 headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+    return app
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    from .loadgen import load_root_agent
+    from .sqlite_session_service import create_session_service
+
+    parser = argparse.ArgumentParser(description="Serve an agent with token streaming over SSE.")
+    parser.add_argument("agent", help="Module with a root_agent, e.g. 'settyl', or 'module:attribute'.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8001)
+    cli_args = parser.parse_args()
+
+    target_agent = load_root_agent(cli_args.agent)
+    serving_runner = Runner(agent=target_agent, app_name=target_agent.name, session_service=create_session_service())
+    uvicorn.run(create_streaming_app(serving_runner), host=cli_args.host, port=cli_args.port)
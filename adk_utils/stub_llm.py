@@ -0,0 +1,311 @@
+"""
+A deterministic stand-in for the Gemini model, for offline runs and load tests.
+
+StubLlm implements ADK's BaseLlm, so agents, callbacks, tools, the runner and
+the session services run unchanged while the model call costs only a
+configurable delay. The same request always yields the same response and
+token counts, and the n-th call of a run always gets the same delay, so a run
+repeated with the same seed sees the same latency sequence.
+
+How it answers:
+  - Scripted rules (StubRule) are tried first, in order, against the user's message.
+  - Otherwise, if the agent has one of the repo's tools and the message fits
+    it, it calls that tool: hsn_code_validation_tool with the 2-8 digit numbers
+    in the message, get_weather / get_current_time with the city after 'in'.
+  - After a tool response it answers with a short text summary of the result.
+  - Anything else gets a plain text reply.
+
+Select it without touching agent code by setting ADK_MODEL=stub; every agent
+that takes its model from model_from_env() then uses it. Latency, output
+length and streaming are set by the environment:
+
+    ADK_MODEL=stub ADK_STUB_LATENCY=lognormal:300:0.4 ADK_STUB_OUTPUT_TOKENS=200 \\
+        python -m adk_utils.loadgen settyl --sessions 50 --turns 5
+
+Latency specs, in milliseconds: '50' or 'fixed:50', 'uniform:20:80',
+'normal:MEAN:STDDEV', 'lognormal:MEDIAN:SIGMA'. The delay applies before the
+first chunk; with streaming, each further chunk follows ADK_STUB_CHUNK_INTERVAL ms later.
+"""
+
+import asyncio
+import itertools
+import json
+import math
+import os
+import random
+import re
+from typing import Any, AsyncGenerator, Callable, Dict, List, Optional, Union
+
+from google.adk.models.base_llm import BaseLlm
+from google.adk.models.llm_request import LlmRequest
+from google.adk.models.llm_response import LlmResponse
+from google.adk.models.registry import LLMRegistry
+from google.genai import types
+from pydantic import BaseModel, PrivateAttr
+
+STUB_MODEL_NAME = "stub"
+
+# Words used to pad replies to the requested length.
+_FILLER = ("the", "code", "is", "listed", "under", "this", "heading", "and", "its", "description", "applies")
+
+_HSN_CODE = re.compile(r"(?<!\d)\d{2,8}(?!\d)")
+_CITY = r"\bin ([A-Z][\w.'-]*(?: [A-Z][\w.'-]*)*)"
+_WEATHER = re.compile(r"\bweather\b.*?" + _CITY, re.IGNORECASE | re.DOTALL)
+_TIME = re.compile(r"\btime\b.*?" + _CITY, re.IGNORECASE | re.DOTALL)
+
+
+class StubRule(BaseModel):
+    """
+    A scripted response: when `pattern` matches the user's message, reply with
+    `text`, or call `tool` with `args`. String values in `args` may refer to
+    the pattern's groups as '$1', '$2', ...
+    """
+
+    pattern: str
+    text: Optional[str] = None
+    tool: Optional[str] = None
+    args: Optional[Dict[str, Any]] = None
+
+
+# --- Part 1: Latency and Token Helpers ---
+
+def parse_latency(spec: Union[str, float, None]) -> Callable[[random.Random], float]:
+    """
+    Turns a latency spec (milliseconds; see the module docstring) into a sampler returning seconds.
+
+    Raises:
+        ValueError: If the spec is not recognised.
+    """
+    if spec is None or spec == "":
+        return lambda rng: 0.0
+    if isinstance(spec, (int, float)):
+        return lambda rng: max(0.0, float(spec)) / 1000
+    kind, _, rest = str(spec).partition(":")
+    try:
+        if not rest:
+            value = float(kind)
+            return lambda rng: max(0.0, value) / 1000
+        params = [float(part) for part in rest.split(":")]
+        if kind == "fixed" and len(params) == 1:
+            return lambda rng: max(0.0, params[0]) / 1000
+        if kind == "uniform" and len(params) == 2:
+            return lambda rng: rng.uniform(params[0], params[1]) / 1000
+        if kind == "normal" and len(params) == 2:
+            return lambda rng: max(0.0, rng.gauss(params[0], params[1])) / 1000
+        if kind == "lognormal" and len(params) == 2:
+            mu = math.log(params[0])
+            return lambda rng: rng.lognormvariate(mu, params[1]) / 1000
+    except ValueError:
+        pass
+    raise ValueError(f"Unrecognised latency spec {spec!r}; use e.g. '50', 'uniform:20:80' or 'lognormal:300:0.4'.")
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count, about four characters per token."""
+    return max(1, (len(text) + 3) // 4) if text else 0
+
+
+def _request_text(llm_request: LlmRequest) -> str:
+    pieces: List[str] = []
+    system_instruction = llm_request.config.system_instruction if llm_request.config else None
+    if isinstance(system_instruction, str):
+        pieces.append(system_instruction)
+    for content in llm_request.contents:
+        for part in content.parts or ():
+            if part.text:
+                pieces.append(part.text)
+            elif part.function_call:
+                pieces.append(json.dumps(part.function_call.args or {}, default=str))
+            elif part.function_response:
+                pieces.append(json.dumps(part.function_response.response or {}, default=str))
+    return "\n".join(pieces)
+
+
+def _substitute(args: Dict[str, Any], match: "re.Match[str]") -> Dict[str, Any]:
+    def expand(value: Any) -> Any:
+        if isinstance(value, str):
+            return re.sub(r"\$(\d+)", lambda m: match.group(int(m.group(1))) or "", value)
+        return value
+    return {key: expand(value) for key, value in args.items()}
+
+
+def _summarize_tool_response(response: types.FunctionResponse) -> str:
+    payload = response.response or {}
+    rows = payload.get("result")
+    if isinstance(rows, list):
+        valid = sum(1 for row in rows if isinstance(row, dict) and row.get("is_valid"))
+        return f"{response.name} checked {len(rows)} item(s): {valid} valid, {len(rows) - valid} not valid."
+    if "report" in payload:
+        return str(payload["report"])
+    if "error_message" in payload:
+        return f"Sorry: {payload['error_message']}"
+    return f"{response.name} returned {json.dumps(payload, default=str)[:200]}"
+
+
+# --- Part 2: The Model ---
+
+class StubLlm(BaseLlm):
+    """
+    Scripted, rule-based model implementing ADK's BaseLlm.
+
+    Attributes:
+        latency (str): Delay before the first chunk (spec in ms, see parse_latency).
+        output_tokens (Optional[int]): Pad text replies to about this many
+                                       tokens (words); None keeps them short.
+        chunk_tokens (int): Words per streamed chunk.
+        chunk_interval_ms (float): Delay between streamed chunks. Non-streaming
+                                   calls wait as long as the whole stream would take.
+        rules (List[StubRule]): Scripted responses, tried before the built-in rules.
+        seed (int): Seeds the latency sequence.
+    """
+
+    model: str = STUB_MODEL_NAME
+    latency: str = "0"
+    output_tokens: Optional[int] = None
+    chunk_tokens: int = 4
+    chunk_interval_ms: float = 0.0
+    rules: List[StubRule] = []
+    seed: int = 0
+
+    _calls: Any = PrivateAttr(default_factory=itertools.count)
+
+    @classmethod
+    def supported_models(cls) -> List[str]:
+        return [r"stub(-.*)?"]
+
+    def _decide(self, llm_request: LlmRequest) -> Union[str, types.FunctionCall]:
+        last = llm_request.contents[-1] if llm_request.contents else None
+        parts = (last.parts or []) if last else []
+        responses = [part.function_response for part in parts if part.function_response]
+        if responses:
+            return " ".join(_summarize_tool_response(response) for response in responses)
+
+        message = " ".join(part.text for part in parts if part.text)
+        for rule in self.rules:
+            match = re.search(rule.pattern, message, re.IGNORECASE)
+            if match:
+                if rule.tool:
+                    return types.FunctionCall(name=rule.tool, args=_substitute(rule.args or {}, match))
+                return rule.text or ""
+
+        tools = llm_request.tools_dict
+        if "hsn_code_validation_tool" in tools:
+            codes = _HSN_CODE.findall(message)
+            if codes:
+                return types.FunctionCall(name="hsn_code_validation_tool", args={"hsn_inputs": codes})
+        for tool_name, pattern in (("get_weather", _WEATHER), ("get_current_time", _TIME)):
+            if tool_name in tools:
+                match = pattern.search(message)
+                if match:
+                    return types.FunctionCall(name=tool_name, args={"city": match.group(1)})
+        return f"This is a stub reply to: {message[:120]}" if message else "This is a stub reply."
+
+    def _pad(self, text: str, rng: random.Random) -> str:
+        if self.output_tokens is None:
+            return text
+        words = text.split()
+        while len(words) < self.output_tokens:
+            words.append(rng.choice(_FILLER))
+        return " ".join(words)
+
+    async def generate_content_async(
+        self, llm_request: LlmRequest, stream: bool = False
+    ) -> AsyncGenerator[LlmResponse, None]:
+        request_text = _request_text(llm_request)
+        rng = random.Random(f"{self.seed}:{next(self._calls)}")
+        first_chunk_delay = parse_latency(self.latency)(rng)
+        prompt_tokens = estimate_tokens(request_text)
+        decision = self._decide(llm_request)
+
+        if isinstance(decision, types.FunctionCall):
+            await asyncio.sleep(first_chunk_delay)
+            output_tokens = estimate_tokens(json.dumps(decision.args or {}))
+            yield LlmResponse(
+                content=types.Content(role="model", parts=[types.Part(function_call=decision)]),
+                usage_metadata=_usage(prompt_tokens, output_tokens),
+            )
+            return
+
+        # Padding depends on the request only, so replies stay reproducible whatever the call order.
+        text = self._pad(decision, random.Random(request_text))
+        words = text.split(" ")
+        size = max(1, self.chunk_tokens)
+        chunks = [" ".join(words[i:i + size]) + (" " if i + size < len(words) else "")
+                  for i in range(0, len(words), size)]
+        usage = _usage(prompt_tokens, len(words))
+
+        if not stream:
+            await asyncio.sleep(first_chunk_delay + self.chunk_interval_ms / 1000 * (len(chunks) - 1))
+            yield LlmResponse(content=types.Content(role="model", parts=[types.Part(text=text)]),
+                              usage_metadata=usage)
+            return
+
+        # Like the Gemini backend in SSE mode: partial text chunks, then the whole text once.
+        await asyncio.sleep(first_chunk_delay)
+        for index, chunk in enumerate(chunks):
+            if index:
+                await asyncio.sleep(self.chunk_interval_ms / 1000)
+            yield LlmResponse(content=types.Content(role="model", parts=[types.Part(text=chunk)]), partial=True)
+        yield LlmResponse(content=types.Content(role="model", parts=[types.Part(text=text)]), usage_metadata=usage)
+
+
+def _usage(prompt_tokens: int, output_tokens: int) -> types.GenerateContentResponseUsageMetadata:
+    return types.GenerateContentResponseUsageMetadata(
+        prompt_token_count=prompt_tokens,
+        candidates_token_count=output_tokens,
+        total_token_count=prompt_tokens + output_tokens,
+    )
+
+
+# model="stub" resolves to StubLlm once this module is imported.
+LLMRegistry.register(StubLlm)
+
+
+# --- Part 3: Selecting the Model ---
+
+def stub_llm_from_env() -> StubLlm:
+    """Builds a StubLlm from ADK_STUB_LATENCY, ADK_STUB_OUTPUT_TOKENS, ADK_STUB_CHUNK_TOKENS and ADK_STUB_CHUNK_INTERVAL."""
+    output_tokens = os.getenv("ADK_STUB_OUTPUT_TOKENS")
+    llm = StubLlm(
+        latency=os.getenv("ADK_STUB_LATENCY", "0"),
+        output_tokens=int(output_tokens) if output_tokens else None,
+        chunk_tokens=int(os.getenv("ADK_STUB_CHUNK_TOKENS", "4")),
+        chunk_interval_ms=float(os.getenv("ADK_STUB_CHUNK_INTERVAL", "0")),
+        seed=int(os.getenv("ADK_STUB_SEED", "0")),
+    )
+    parse_latency(llm.latency)  # fail at startup, not on the first request
+    return llm
+
+
+def model_from_env(default: Union[str, BaseLlm]) -> Union[str, BaseLlm]:
+    """
+    Returns the model an agent should use: a StubLlm when ADK_MODEL is 'stub',
+    the named model when ADK_MODEL is set to anything else, and `default` otherwise.
+    """
+    name = os.getenv("ADK_MODEL")
+    if not name:
+        return default
+    if re.fullmatch(StubLlm.supported_models()[0], name):
+        return stub_llm_from_env()
+    return name
+
+
+def use_stub_llm(agent, llm: Optional[StubLlm] = None):
+    """
+    Points an agent and all its sub-agents that call a model at a StubLlm.
+
+    Args:
+        agent: The root agent.
+        llm (Optional[StubLlm]): Defaults to stub_llm_from_env().
+
+    Returns:
+        The same agent.
+    """
+    llm = llm or stub_llm_from_env()
+    pending = [agent]
+    while pending:
+        current = pending.pop()
+        if hasattr(current, "model"):
+            current.model = llm
+        pending.extend(getattr(current, "sub_agents", None) or ())
+    return agent
@@ -0,0 +1,476 @@
+"""
+OpenTelemetry spans and latency histograms for ADK callbacks, tools and runner turns.
+
+Nothing is recorded until configure_telemetry() is called (or ADK_TELEMETRY is
+set to 'memory' or 'file'); until then the decorators call straight through.
+ADK itself already emits 'invocation', 'call_llm' and 'tool_call' spans on the
+global tracer, so once a provider is configured those are captured too, and a
+turn can be broken down into model, tool and callback time.
+
+Usage:
+    from adk_utils.telemetry import traced, instrument_runner
+
+    @traced("tool")
+    def get_weather(city: str) -> dict: ...
+
+    agent = Agent(..., before_model_callback=traced("before_model_callback")(my_guardrail))
+    runner = instrument_runner(Runner(...))
+
+Summarize a span file written with ADK_TELEMETRY=file:
+    python -m adk_utils.telemetry spans.jsonl
+"""
+
+import functools
+import inspect
+import json
+import os
+import sys
+import threading
+import time
+from collections import defaultdict
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from opentelemetry import metrics, trace
+from opentelemetry.sdk.metrics import MeterProvider
+from opentelemetry.sdk.metrics.export import InMemoryMetricReader
+from opentelemetry.sdk.resources import Resource
+from opentelemetry.sdk.trace import ReadableSpan, TracerProvider
+from opentelemetry.sdk.trace.export import (
+    BatchSpanProcessor,
+    SimpleSpanProcessor,
+    SpanExporter,
+    SpanExportResult,
+)
+from opentelemetry.sdk.trace.export.in_memory_span_exporter import InMemorySpanExporter
+
+INSTRUMENTATION_NAME = "adk_utils.telemetry"
+
+# Span attributes set by this module
+ATTR_KIND = "adk.kind"                  # 'tool', 'before_model_callback', 'turn', ...
+ATTR_AGENT = "adk.agent"
+ATTR_SESSION = "adk.session_id"
+ATTR_INPUT_SIZE = "adk.input_size"      # items in the call's list arguments / request contents
+ATTR_RESULT_COUNT = "adk.result_count"  # rows returned by a tool, events yielded by a turn
+ATTR_DECISION = "adk.decision"          # 'allowed' or 'blocked', for before_* callbacks
+ATTR_ERROR = "error.type"               # exception class name, when the call raised
+ATTR_FIRST_EVENT_MS = "adk.time_to_first_event_ms"
+
+# ADK's own span names, mapped to the kinds used in reports
+ADK_SPAN_KINDS = {"call_llm": "model", "invocation": "invocation"}
+
+
+# --- Part 1: Exporters and Configuration ---
+
+class JsonLinesSpanExporter(SpanExporter):
+    """Appends finished spans to a file, one compact JSON object per line."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._file = open(path, "a", encoding="utf-8")
+
+    def export(self, spans: Sequence[ReadableSpan]) -> SpanExportResult:
+        lines = []
+        for span in spans:
+            lines.append(json.dumps({
+                "name": span.name,
+                "trace_id": format(span.context.trace_id, "032x"),
+                "span_id": format(span.context.span_id, "016x"),
+                "parent_id": format(span.parent.span_id, "016x") if span.parent else None,
+                "start_ns": span.start_time,
+                "end_ns": span.end_time,
+                "duration_ms": (span.end_time - span.start_time) / 1e6,
+                "status": span.status.status_code.name,
+                "attributes": dict(span.attributes or {}),
+            }, default=str))
+        with self._lock:
+            self._file.write("\n".join(lines) + "\n")
+            self._file.flush()
+        return SpanExportResult.SUCCESS
+
+    def shutdown(self) -> None:
+        with self._lock:
+            self._file.close()
+
+
+class _Telemetry:
+    def __init__(self):
+        self.enabled = False
+        self.tracer = trace.get_tracer(INSTRUMENTATION_NAME)
+        self.tracer_provider: Optional[TracerProvider] = None
+        self.span_exporter: Optional[SpanExporter] = None
+        self.metric_reader: Optional[InMemoryMetricReader] = None
+        self.meter = None
+        self.duration_histogram = None
+        self.counters: Dict[str, Any] = {}
+
+
+_state = _Telemetry()
+_configure_lock = threading.Lock()
+
+
+def configure_telemetry(exporter: str = "memory", path: Optional[str] = None,
+                        service_name: str = "adk-agents") -> None:
+    """
+    Installs a tracer and meter provider that keep data on this machine.
+
+    Args:
+        exporter (str): 'memory' keeps finished spans in memory (see get_finished_spans());
+                        'file' appends them as JSON lines to `path`.
+        path (Optional[str]): The span file for the 'file' exporter. Defaults to
+                              ADK_TELEMETRY_FILE, then 'adk_spans.jsonl'.
+        service_name (str): The service.name resource attribute.
+    """
+    with _configure_lock:
+        if _state.enabled:
+            return
+        resource = Resource.create({"service.name": service_name})
+        if exporter == "file":
+            span_exporter: SpanExporter = JsonLinesSpanExporter(path or os.getenv("ADK_TELEMETRY_FILE", "adk_spans.jsonl"))
+            processor = BatchSpanProcessor(span_exporter)
+        elif exporter == "memory":
+            span_exporter = InMemorySpanExporter()
+            processor = SimpleSpanProcessor(span_exporter)
+        else:
+            raise ValueError(f"Unknown telemetry exporter {exporter!r}; use 'memory' or 'file'.")
+
+        tracer_provider = TracerProvider(resource=resource)
+        tracer_provider.add_span_processor(processor)
+        # The global provider can only be set once per process; ADK's tracers follow it.
+        trace.set_tracer_provider(tracer_provider)
+
+        metric_reader = InMemoryMetricReader()
+        meter_provider = MeterProvider(resource=resource, metric_readers=[metric_reader])
+        metrics.set_meter_provider(meter_provider)
+        meter = meter_provider.get_meter(INSTRUMENTATION_NAME)
+
+        _state.tracer = tracer_provider.get_tracer(INSTRUMENTATION_NAME)
+        _state.tracer_provider = tracer_provider
+        _state.span_exporter = span_exporter
+        _state.metric_reader = metric_reader
+        _state.meter = meter
+        _state.duration_histogram = meter.create_histogram(
+            "adk.operation.duration", unit="ms",
+            description="Latency of ADK callbacks, tools and runner turns.",
+        )
+        _state.enabled = True
+
+
+def configure_from_env() -> None:
+    """Calls configure_telemetry() if ADK_TELEMETRY is 'memory' or 'file'."""
+    mode = os.getenv("ADK_TELEMETRY", "").strip().lower()
+    if mode in ("memory", "file"):
+        configure_telemetry(mode)
+
+
+def telemetry_enabled() -> bool:
+    return _state.enabled
+
+
+def get_finished_spans() -> List[ReadableSpan]:
+    """Spans collected by the 'memory' exporter so far (empty for other exporters)."""
+    if isinstance(_state.span_exporter, InMemorySpanExporter):
+        return list(_state.span_exporter.get_finished_spans())
+    return []
+
+
+def flush_telemetry() -> None:
+    """Exports spans still waiting in the batch processor."""
+    if _state.tracer_provider is not None:
+        _state.tracer_provider.force_flush()
+
+
+# --- Part 2: Instrumentation ---
+
+def _count_items(value: Any) -> int:
+    """Rows in a tool result or items in an argument: list length, 1 for a single value, 0 for None."""
+    if value is None:
+        return 0
+    if isinstance(value, (list, tuple)):
+        return len(value)
+    if isinstance(value, dict):
+        for key in ("items", "results"):
+            if isinstance(value.get(key), list):
+                return len(value[key])
+        return 1
+    return 1
+
+
+def _input_size(arguments: Dict[str, Any]) -> int:
+    if "llm_request" in arguments:
+        return len(getattr(arguments["llm_request"], "contents", None) or ())
+    if "args" in arguments and isinstance(arguments["args"], dict):
+        return sum(_count_items(v) for v in arguments["args"].values() if isinstance(v, (list, tuple)))
+    return sum(len(v) for v in arguments.values() if isinstance(v, (list, tuple)))
+
+
+def _context_attributes(arguments: Dict[str, Any]) -> Dict[str, Any]:
+    attributes: Dict[str, Any] = {}
+    for name in ("callback_context", "tool_context"):
+        context = arguments.get(name)
+        if context is None:
+            continue
+        attributes[ATTR_AGENT] = context.agent_name
+        session = getattr(getattr(context, "_invocation_context", None), "session", None)
+        if session is not None:
+            attributes[ATTR_SESSION] = session.id
+        break
+    return attributes
+
+
+def _record(span, kind: str, name: str, attributes: Dict[str, Any], result: Any, start: float,
+            error: Optional[BaseException] = None) -> None:
+    duration_ms = (time.perf_counter() - start) * 1000
+    if error is not None:
+        # The span itself gets the exception and an ERROR status from start_as_current_span.
+        attributes[ATTR_ERROR] = type(error).__name__
+    elif kind.startswith("before_"):
+        attributes[ATTR_DECISION] = "allowed" if result is None else "blocked"
+    elif kind.startswith("after_"):
+        attributes[ATTR_DECISION] = "unchanged" if result is None else "modified"
+    else:
+        attributes[ATTR_RESULT_COUNT] = _count_items(result)
+    span.set_attributes(attributes)
+
+    metric_attributes = {ATTR_KIND: kind, "adk.name": name}
+    for key in (ATTR_DECISION, ATTR_ERROR):
+        if key in attributes:
+            metric_attributes[key] = attributes[key]
+    _state.duration_histogram.record(duration_ms, metric_attributes)
+
+
+def traced(kind: str, name: Optional[str] = None) -> Callable[[Callable], Callable]:
+    """
+    Decorator that wraps a tool or callback in a span and records its latency.
+
+    The wrapped function keeps its name, docstring and signature, so ADK builds
+    the same tool declaration from it. Sync and async functions are supported.
+    Calls that raise are recorded too, with the exception class as 'error.type'.
+    When telemetry is not configured the function is called directly.
+
+    Args:
+        kind (str): 'tool', 'before_model_callback', 'before_tool_callback',
+                    'after_tool_callback', ... For before_* callbacks a None
+                    result is recorded as 'allowed', anything else as 'blocked'.
+        name (Optional[str]): Span name suffix. Defaults to the function name.
+    """
+    def decorator(fn: Callable) -> Callable:
+        span_name = f"{kind} [{name or fn.__name__}]"
+        signature = inspect.signature(fn)
+
+        def call_attributes(args, kwargs) -> Dict[str, Any]:
+            # Taken before the call: callbacks may modify their arguments.
+            try:
+                arguments = signature.bind_partial(*args, **kwargs).arguments
+            except TypeError:
+                arguments = kwargs
+            attributes = {ATTR_KIND: kind, ATTR_INPUT_SIZE: _input_size(arguments)}
+            attributes.update(_context_attributes(arguments))
+            return attributes
+
+        if inspect.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                if not _state.enabled:
+                    return await fn(*args, **kwargs)
+                with _state.tracer.start_as_current_span(span_name) as span:
+                    attributes = call_attributes(args, kwargs)
+                    start = time.perf_counter()
+                    result = error = None
+                    try:
+                        result = await fn(*args, **kwargs)
+                        return result
+                    except BaseException as e:
+                        error = e
+                        raise
+                    finally:
+                        _record(span, kind, name or fn.__name__, attributes, result, start, error)
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not _state.enabled:
+                return fn(*args, **kwargs)
+            with _state.tracer.start_as_current_span(span_name) as span:
+                attributes = call_attributes(args, kwargs)
+                start = time.perf_counter()
+                result = error = None
+                try:
+                    result = fn(*args, **kwargs)
+                    return result
+                except BaseException as e:
+                    error = e
+                    raise
+                finally:
+                    _record(span, kind, name or fn.__name__, attributes, result, start, error)
+        return wrapper
+
+    return decorator
+
+
+def add_to_counter(name: str, amount: float = 1, attributes: Optional[Dict[str, Any]] = None,
+                   unit: str = "1", description: str = "") -> None:
+    """
+    Adds to a monotonic counter (created on first use), e.g. cache hits. No-op when disabled.
+    Read the totals with counter_values().
+    """
+    if not _state.enabled:
+        return
+    counter = _state.counters.get(name)
+    if counter is None:
+        with _configure_lock:
+            counter = _state.counters.get(name)
+            if counter is None:
+                counter = _state.counters[name] = _state.meter.create_counter(name, unit=unit, description=description)
+    counter.add(amount, attributes or {})
+
+
+def set_span_attributes(**attributes: Any) -> None:
+    """
+    Adds attributes (prefixed 'adk.') to the current span, e.g. from inside a
+    traced callback: set_span_attributes(blocked_count=3). No-op when disabled.
+    """
+    if _state.enabled:
+        trace.get_current_span().set_attributes({f"adk.{key}": value for key, value in attributes.items()})
+
+
+def instrument_runner(runner):
+    """
+    Wraps runner.run_async so every turn is a 'turn' span, recording the number
+    of events and the time to the first event. Returns the same runner.
+    """
+    run_async = runner.run_async
+
+    @functools.wraps(run_async)
+    async def traced_run_async(*args, **kwargs):
+        if not _state.enabled:
+            async for event in run_async(*args, **kwargs):
+                yield event
+            return
+
+        with _state.tracer.start_as_current_span(f"turn [{runner.app_name}]") as span:
+            start = time.perf_counter()
+            events = 0
+            try:
+                async for event in run_async(*args, **kwargs):
+                    if events == 0:
+                        span.set_attribute(ATTR_FIRST_EVENT_MS, (time.perf_counter() - start) * 1000)
+                    events += 1
+                    yield event
+            finally:
+                duration_ms = (time.perf_counter() - start) * 1000
+                span.set_attributes({
+                    ATTR_KIND: "turn",
+                    ATTR_AGENT: runner.agent.name,
+                    ATTR_SESSION: str(kwargs.get("session_id")),
+                    ATTR_RESULT_COUNT: events,
+                })
+                _state.duration_histogram.record(duration_ms, {ATTR_KIND: "turn", "adk.name": runner.app_name})
+
+    runner.run_async = traced_run_async
+    return runner
+
+
+# --- Part 3: Reports ---
+
+def latency_histograms() -> List[Dict[str, Any]]:
+    """
+    Reads the latency histogram from the in-memory metric reader.
+
+    Returns:
+        List[Dict[str, Any]]: One entry per (kind, name, decision) with count,
+                              sum, min, max and the bucket counts, in ms.
+    """
+    if _state.metric_reader is None:
+        return []
+    data = _state.metric_reader.get_metrics_data()
+    rows = []
+    for resource_metrics in (data.resource_metrics if data else ()):
+        for scope_metrics in resource_metrics.scope_metrics:
+            for metric in scope_metrics.metrics:
+                if metric.name != "adk.operation.duration":
+                    continue
+                for point in metric.data.data_points:
+                    rows.append({
+                        "attributes": dict(point.attributes),
+                        "count": point.count,
+                        "sum_ms": point.sum,
+                        "min_ms": point.min,
+                        "max_ms": point.max,
+                        "bucket_bounds_ms": list(point.explicit_bounds),
+                        "bucket_counts": list(point.bucket_counts),
+                    })
+    return rows
+
+
+def counter_values(name: str) -> List[Dict[str, Any]]:
+    """
+    Reads a counter from the in-memory metric reader.
+
+    Returns:
+        List[Dict[str, Any]]: One {'attributes', 'value'} entry per attribute set.
+    """
+    if _state.metric_reader is None:
+        return []
+    data = _state.metric_reader.get_metrics_data()
+    rows = []
+    for resource_metrics in (data.resource_metrics if data else ()):
+        for scope_metrics in resource_metrics.scope_metrics:
+            for metric in scope_metrics.metrics:
+                if metric.name == name:
+                    rows.extend({"attributes": dict(point.attributes), "value": point.value}
+                                for point in metric.data.data_points)
+    return rows
+
+
+def _span_kind(name: str, attributes: Dict[str, Any]) -> str:
+    if ATTR_KIND in attributes:
+        kind = attributes[ATTR_KIND]
+        return "callback" if "callback" in kind else kind
+    if name.startswith("tool_call"):
+        return "adk_tool_call"
+    if name.startswith("agent_run"):
+        return "agent"
+    return ADK_SPAN_KINDS.get(name, "other")
+
+
+def summarize_spans(spans: List[Dict[str, Any]]) -> Dict[str, Dict[str, float]]:
+    """
+    Totals span durations by kind ('turn', 'model', 'tool', 'callback', ...).
+
+    Args:
+        spans (List[Dict[str, Any]]): Spans as written by JsonLinesSpanExporter.
+
+    Returns:
+        Dict[str, Dict[str, float]]: count, total_ms and mean_ms per kind.
+    """
+    totals: Dict[str, List[float]] = defaultdict(list)
+    for span in spans:
+        totals[_span_kind(span["name"], span.get("attributes") or {})].append(span["duration_ms"])
+    return {
+        kind: {"count": len(durations), "total_ms": sum(durations), "mean_ms": sum(durations) / len(durations)}
+        for kind, durations in sorted(totals.items())
+    }
+
+
+def spans_as_dicts(spans: Sequence[ReadableSpan]) -> List[Dict[str, Any]]:
+    """Converts in-memory spans to the dict form used by summarize_spans()."""
+    return [
+        {"name": span.name, "duration_ms": (span.end_time - span.start_time) / 1e6,
+         "attributes": dict(span.attributes or {})}
+        for span in spans
+    ]
+
+
+configure_from_env()
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 2:
+        print("Usage: python -m adk_utils.telemetry <spans.jsonl>")
+        sys.exit(2)
+    with open(sys.argv[1], encoding="utf-8") as f:
+        span_rows = [json.loads(line) for line in f if line.strip()]
+    print(f"{'kind':<16}{'count':>8}{'total ms':>14}{'mean ms':>12}")
+    for span_kind, row in summarize_spans(span_rows).items():
+        print(f"{span_kind:<16}{row['count']:>8}{row['total_ms']:>14.2f}{row['mean_ms']:>12.3f}")
@@ -0,0 +1,221 @@
+"""
+Renders tool results as the final reply, skipping the model call that would
+otherwise summarize them.
+
+After a tool runs, ADK calls the model again with the tool's result, often just
+to restate it as text. For a tool that returns 500 rows, that call resends the
+rows and has the model write them out again. ToolResultRenderer is a
+before_model_callback: when the latest message of the request is the result of
+tools that declared a formatter, it answers with the formatted text itself, and
+the model is not called.
+
+A formatter takes the tool's return value and returns the reply text, or None
+to leave that result to the model. Declare one on the tool function with
+@render_with, or pass formatters={tool_name: formatter}. Two are provided:
+
+  - table_formatter(columns):        a Markdown table of the rows;
+  - summary_formatter(is_ok, ...):   a count line plus only the rows that are not ok.
+
+    from adk_utils.tool_rendering import ToolResultRenderer, render_with, table_formatter
+
+    @render_with(table_formatter(["code", "description"]))
+    def lookup_tool(...): ...
+
+    agent = Agent(..., tools=[lookup_tool],
+                  before_model_callback=ToolResultRenderer(tools=[lookup_tool]))
+
+Model calls and estimated tokens saved are recorded as the counters
+adk.tool_render.model_calls_saved, adk.tool_render.prompt_tokens_saved and
+adk.tool_render.output_tokens_saved (attribute adk.tool.name), as span
+attributes on the callback's span, and in ToolResultRenderer.stats().
+"""
+
+import threading
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence
+
+from google.adk.agents.callback_context import CallbackContext
+from google.adk.models.llm_request import LlmRequest
+from google.adk.models.llm_response import LlmResponse
+from google.genai import types
+
+from .context_window import count_tokens
+from .telemetry import add_to_counter, set_span_attributes
+
+# Attribute that @render_with sets on a tool function.
+RENDER_ATTRIBUTE = "render_result"
+
+MODEL_CALLS_COUNTER = "adk.tool_render.model_calls_saved"
+PROMPT_TOKENS_COUNTER = "adk.tool_render.prompt_tokens_saved"
+OUTPUT_TOKENS_COUNTER = "adk.tool_render.output_tokens_saved"
+
+Formatter = Callable[[Any], Optional[str]]
+
+
+# --- Part 1: Formatters ---
+
+def render_with(formatter: Formatter) -> Callable:
+    """Decorator declaring how a tool's result is rendered as the reply."""
+    def decorate(tool_function: Callable) -> Callable:
+        setattr(tool_function, RENDER_ATTRIBUTE, formatter)
+        return tool_function
+    return decorate
+
+
+def result_rows(result: Any) -> Optional[List[Dict[str, Any]]]:
+    """The list of row dicts in a tool result (ADK wraps a non-dict return value as {'result': ...})."""
+    if isinstance(result, dict) and "result" in result:
+        result = result["result"]
+    if isinstance(result, list) and all(isinstance(row, dict) for row in result):
+        return result
+    return None
+
+
+def _cell(value: Any) -> str:
+    if isinstance(value, dict):
+        value = ", ".join(f"{key}: {item}" for key, item in value.items())
+    return "" if value is None else str(value).replace("|", "\\|").replace("\n", " ")
+
+
+def table_formatter(columns: Sequence[str], headers: Optional[Sequence[str]] = None,
+                    max_rows: Optional[int] = None) -> Formatter:
+    """
+    Renders a list of row dicts as a Markdown table.
+
+    Args:
+        columns (Sequence[str]): Row keys to show, in order.
+        headers (Optional[Sequence[str]]): Column titles; defaults to the keys.
+        max_rows (Optional[int]): Rows shown before the rest are counted as "... and N more".
+    """
+    titles = list(headers or columns)
+
+    def format_table(result: Any) -> Optional[str]:
+        rows = result_rows(result)
+        if rows is None:
+            return None
+        shown = rows if max_rows is None else rows[:max_rows]
+        lines = ["| " + " | ".join(titles) + " |", "|" + "---|" * len(titles)]
+        lines.extend("| " + " | ".join(_cell(row.get(column)) for column in columns) + " |" for row in shown)
+        if len(shown) < len(rows):
+            lines.append(f"... and {len(rows) - len(shown)} more.")
+        return "\n".join(lines)
+
+    return format_table
+
+
+def summary_formatter(is_ok: Callable[[Dict[str, Any]], bool], describe: Callable[[Dict[str, Any]], str],
+                      noun: str = "item", max_listed: Optional[int] = 100) -> Formatter:
+    """
+    Renders a count line ("Checked 500 items: 497 ok, 3 not ok.") followed by
+    one line per row that is not ok.
+
+    Args:
+        is_ok (Callable): Whether a row needs no mention.
+        describe (Callable): The line for a row that is not ok.
+        noun (str): What the rows are, for the count line.
+        max_listed (Optional[int]): Rows listed before the rest are counted as "... and N more".
+    """
+    def format_summary(result: Any) -> Optional[str]:
+        rows = result_rows(result)
+        if rows is None:
+            return None
+        problems = [row for row in rows if not is_ok(row)]
+        lines = [f"Checked {len(rows)} {noun}{'' if len(rows) == 1 else 's'}: "
+                 f"{len(rows) - len(problems)} ok, {len(problems)} not ok."]
+        listed = problems if max_listed is None else problems[:max_listed]
+        lines.extend(describe(row) for row in listed)
+        if len(listed) < len(problems):
+            lines.append(f"... and {len(problems) - len(listed)} more.")
+        return "\n".join(lines)
+
+    return format_summary
+
+
+# --- Part 2: The Callback ---
+
+def _estimate_prompt_tokens(llm_request: LlmRequest) -> int:
+    tokens = sum(count_tokens(content) for content in llm_request.contents)
+    instruction = llm_request.config.system_instruction if llm_request.config else None
+    if isinstance(instruction, str):
+        tokens += len(instruction) // 4
+    return tokens
+
+
+class ToolResultRenderer:
+    """
+    before_model_callback that turns formatted tool results into the final reply
+    (see the module docstring).
+
+    Args:
+        tools (Iterable[Callable]): Tool functions; those decorated with
+                                    @render_with contribute their formatter.
+        formatters (Optional[Dict[str, Formatter]]): Formatters by tool name,
+                                                     overriding the declared ones.
+        enabled (bool): When False, tool results always go to the model.
+    """
+
+    def __init__(self, tools: Iterable[Callable] = (), formatters: Optional[Dict[str, Formatter]] = None,
+                 enabled: bool = True):
+        self.formatters: Dict[str, Formatter] = {}
+        for tool in tools:
+            formatter = getattr(tool, RENDER_ATTRIBUTE, None)
+            if formatter is not None:
+                self.formatters[getattr(tool, "name", None) or tool.__name__] = formatter
+        self.formatters.update(formatters or {})
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._stats = {"turns_rendered": 0, "model_calls_saved": 0, "prompt_tokens_saved": 0,
+                       "output_tokens_saved": 0}
+        self.__name__ = "tool_result_renderer"  # span name when wrapped with adk_utils.telemetry.traced
+
+    def render(self, content: types.Content) -> Optional[str]:
+        """The reply for a message of tool results, or None if any of them has no formatter or declines."""
+        parts = content.parts or ()
+        if content.role != "user" or not parts or any(part.function_response is None for part in parts):
+            return None
+        texts = []
+        for part in parts:
+            response = part.function_response
+            formatter = self.formatters.get(response.name)
+            text = formatter(response.response) if formatter is not None else None
+            if text is None:
+                return None
+            texts.append(text)
+        return "\n\n".join(texts)
+
+    def _record(self, tool_names: List[str], prompt_tokens: int, output_tokens: int) -> None:
+        with self._lock:
+            self._stats["turns_rendered"] += 1
+            self._stats["model_calls_saved"] += 1
+            self._stats["prompt_tokens_saved"] += prompt_tokens
+            self._stats["output_tokens_saved"] += output_tokens
+        attributes = {"adk.tool.name": ",".join(sorted(set(tool_names)))}
+        add_to_counter(MODEL_CALLS_COUNTER, 1, attributes,
+                       description="Model calls skipped because a tool result was rendered directly.")
+        add_to_counter(PROMPT_TOKENS_COUNTER, prompt_tokens, attributes,
+                       description="Estimated prompt tokens not sent because a tool result was rendered.")
+        add_to_counter(OUTPUT_TOKENS_COUNTER, output_tokens, attributes,
+                       description="Estimated output tokens not generated because a tool result was rendered.")
+        set_span_attributes(tool_render_model_calls_saved=1, tool_render_prompt_tokens_saved=prompt_tokens,
+                            tool_render_output_tokens_saved=output_tokens)
+
+    def __call__(self, callback_context: CallbackContext, llm_request: LlmRequest) -> Optional[LlmResponse]:
+        if not self.enabled or not self.formatters or not llm_request.contents:
+            return None
+        latest = llm_request.contents[-1]
+        text = self.render(latest)
+        if text is None:
+            return None
+        reply = types.Content(role="model", parts=[types.Part(text=text)])
+        tool_names = [part.function_response.name for part in latest.parts]
+        # The skipped call would have resent the whole request and written about as much text.
+        self._record(tool_names, _estimate_prompt_tokens(llm_request), count_tokens(reply))
+        return LlmResponse(content=reply)
+
+    def stats(self) -> Dict[str, Any]:
+        """Totals since start, plus the average tokens saved per rendered turn (one model call each)."""
+        with self._lock:
+            stats = dict(self._stats)
+        turns = stats["turns_rendered"]
+        for key in ("prompt_tokens_saved", "output_tokens_saved"):
+            stats[f"{key}_per_turn"] = stats[key] / turns if turns else 0.0
+        return stats
@@ -2,6 +2,10 @@ import datetime
 from zoneinfo import ZoneInfo
 from google.adk.agents import Agent
 
+from adk_utils.stub_llm import model_from_env
+from adk_utils.telemetry import traced
+
+@traced("tool")
 def get_weather(city: str) -> dict:
     """Retrieves the current weather report for a specified city.
 
@@ -26,6 +30,7 @@ def get_weather(city: str) -> dict:
         }
 
 
+@traced("tool")
 def get_current_time(city: str) -> dict:
     """Returns the current time in a specified city.
 
@@ -57,7 +62,7 @@ def get_current_time(city: str) -> dict:
 root_agent = Agent(
     name="weather_time_agent",
     # model="gemini-2.0-flash",
-    model="gemini-2.0-flash",
+    model=model_from_env("gemini-2.0-flash"),
     description=(
         "Agent to answer questions about the time and weather in a city."
     ),
@@ -1,45 +1,90 @@
 # main_agent.py
 
 from google.adk.agents import Agent
-import pandas as pd
 from typing import List, Dict, Union, Any, Optional
 import os
-from google.adk.sessions import InMemorySessionService
+from google.adk.sessions import BaseSessionService
 from google.adk.tools.tool_context import ToolContext
 from google.adk.runners import Runner
 from google.adk.agents.callback_context import CallbackContext
 from google.adk.models.llm_request import LlmRequest
 from google.adk.models.llm_response import LlmResponse
 from google.genai import types
+import asyncio
 import random 
+import functools
+import logging
+import time
+import weakref
 from google.adk.tools.base_tool import BaseTool
 
+from adk_utils.context_window import ContextWindow
+from adk_utils.model_cache import with_response_cache
+from adk_utils.sqlite_session_service import create_session_service
+from adk_utils.stub_llm import model_from_env
+from adk_utils.telemetry import set_span_attributes, traced
+from adk_utils.tool_rendering import ToolResultRenderer, render_with
+
+from .fast_path import HsnFastPath, format_validation_result
+from .hsn_bulk import validate_hsn_codes_bulk
+from .hsn_policy import get_hsn_policy, merge_blocked_rows
+from .hsn_store import HsnDataStore
+from .hsn_validator import load_hsn_data
+from .keyword_matcher import SessionScanCache, get_keyword_matcher
+from .structured_logging import EventLogger, elapsed_ms, ensure_logging_configured
+
+# JSON-lines event log, written from a background thread (see structured_logging.py).
+ensure_logging_configured()
+log = EventLogger("agent")
+
+# Remembers which user messages the keyword guardrail has already scanned in each session.
+keyword_scan_cache = SessionScanCache()
+
+# For calls the tool guardrail split: the permitted codes the tool validates, and the rows for
+# the blocked ones, held until the tool has run. The call's args are left as the model sent them
+# (they are the function call stored in the session history).
+# Keyed by the call's ToolContext, so an entry disappears with its call even if the tool fails.
+_pending_blocked_rows: "weakref.WeakKeyDictionary[ToolContext, Any]" = weakref.WeakKeyDictionary()
+
+def _session_id(context: CallbackContext) -> Optional[str]:
+    """The id of the session a callback or tool call belongs to."""
+    session = getattr(context._invocation_context, "session", None)
+    return session.id if session is not None else None
+
+
+@traced("before_model_callback")
 def block_keyword_model_guardrail(
     callback_context: CallbackContext, llm_request: LlmRequest
 ) -> Optional[LlmResponse]:
     """
-    Inspects the latest user message blocked words. If found, rejects the LLM call
+    Inspects the latest user message for blocked terms. If found, rejects the LLM call
     and returns a predefined LlmResponse. Otherwise, returns None to proceed.
+
+    The terms come from settyl/blocked_terms.txt (or HSN_BLOCKED_TERMS_FILE) and are
+    matched as whole words, ignoring case, across all text parts of the message.
+    A message already scanned earlier in the session is not scanned again.
     """
+    start = time.perf_counter()
     agent_name = callback_context.agent_name # Get the name of the agent whose model call is being intercepted
-    print(f"--- Callback: block_keyword_guardrail running for agent: {agent_name} ---")
+    session_id = _session_id(callback_context)
 
-    # Extract the text from the latest user message in the request history
-    last_user_message_text = ""
+    # Collect the text parts of the latest user message in the request history
+    last_user_message_parts: List[str] = []
     if llm_request.contents:
-        # Find the most recent message with role 'user'
+        # Find the most recent message with role 'user' that has text
         for content in reversed(llm_request.contents):
             if content.role == 'user' and content.parts:
-                # Assuming text is in the first part for simplicity
-                if content.parts[0].text:
-                    last_user_message_text = content.parts[0].text
+                last_user_message_parts = [part.text for part in content.parts if part.text]
+                if last_user_message_parts:
                     break # Found the last user message text
 
-    print(f"--- Callback: Inspecting last user message: '{last_user_message_text[:100]}...' ---") # Log first 100 chars
+    if log.enabled(logging.DEBUG):
+        log.debug("guardrail.keyword.inspecting", agent=agent_name, session=session_id,
+                  message_preview=" ".join(last_user_message_parts)[:100])
 
     # --- Guardrail Logic ---
-    # keyword_to_block = "BLOCK"
-    keywords_to_block = ["STUPID", "BLOCK"]
+    # The compiled matcher is cached and only rebuilt when the term file changes.
+    matcher = get_keyword_matcher()
 
     blocked_responses = [
         "I'm sorry, I cannot process this request as it contains inappropriate language.",
@@ -49,41 +94,79 @@ def block_keyword_model_guardrail(
         "I cannot proceed with this request. Please rephrase your query without using blocked words."
     ]
 
-    for keyword in keywords_to_block:
-        if keyword in last_user_message_text.upper():
-            print(f"--- Callback: Found '{keyword}'. Blocking LLM call! ---")
-            callback_context.state["guardrail_block_keyword_triggered"] = True
-            print(f"--- Callback: Set state 'guardrail_block_keyword_triggered': True ---")
-
-            random_message = random.choice(blocked_responses)
-
-            # Return a response indicating the block
-            return LlmResponse(
-                content=types.Content(
-                    role="model",
-                    parts=[types.Part(text=random_message)],
-                    # parts=[types.Part(text=f"I cannot process this request because it contains a blocked term.")],
-                )
+    # Every model call of a turn carries the same user message; it is only scanned the first time.
+    match = keyword_scan_cache.search(session_id, last_user_message_parts, matcher)
+    if match is not None:
+        callback_context.state["guardrail_block_keyword_triggered"] = True
+        log.warning("guardrail.keyword.blocked", agent=agent_name, session=session_id,
+                    latency_ms=elapsed_ms(start), term=match.term)
+
+        random_message = random.choice(blocked_responses)
+
+        # Return a response indicating the block
+        return LlmResponse(
+            content=types.Content(
+                role="model",
+                parts=[types.Part(text=random_message)],
+                # parts=[types.Part(text=f"I cannot process this request because it contains a blocked term.")],
             )
+        )
 
-    # If the loop completes without finding any blocked keywords
-    print(f"--- Callback: No blocked keywords found. Allowing LLM call for {agent_name}. ---")
+    # No blocked term was found
+    log.debug("guardrail.keyword.allowed", agent=agent_name, session=session_id, latency_ms=elapsed_ms(start))
     return None # Returning None signals ADK to continue normally
 
 # print("block_keyword_guardrail function defined.")
 
+# Long validation sessions would otherwise resend every earlier turn on each call.
+context_window = ContextWindow(
+    max_tokens=int(os.getenv("HSN_CONTEXT_MAX_TOKENS", "8000")),
+    keep_turns=int(os.getenv("HSN_CONTEXT_KEEP_TURNS", "4")),
+)
+
+
+@traced("before_model_callback")
+async def bound_context_window(callback_context: CallbackContext, llm_request: LlmRequest) -> Optional[LlmResponse]:
+    """
+    Keeps the request within HSN_CONTEXT_MAX_TOKENS: older turns are replaced by a
+    rolling summary, the last HSN_CONTEXT_KEEP_TURNS turns stay verbatim.
+    """
+    return await context_window(callback_context, llm_request)
+
+
+# Messages that only list codes are validated without a model call (see fast_path.py).
+# HSN_FAST_PATH=0 sends everything to the model.
+fast_path = HsnFastPath(enabled=os.getenv("HSN_FAST_PATH", "1") == "1")
+
+
+@traced("before_model_callback")
+def hsn_fast_path(callback_context: CallbackContext, llm_request: LlmRequest) -> Optional[LlmResponse]:
+    """
+    Calls hsn_code_validation_tool directly for messages like "validate 0101, 8471"
+    and renders its rows as the reply; anything else goes to the model.
+    """
+    return fast_path(callback_context, llm_request)
+
+
+@traced("before_tool_callback")
 def block_hsn_codes_tool_guardrail(
     tool: BaseTool, args: Dict[str, Any], tool_context: ToolContext
 ) -> Optional[Dict]:
     """
-    Checks if 'get_weather_stateful' is called for 'Paris'.
-    If so, blocks the tool execution and returns a specific error dictionary.
-    Otherwise, allows the tool call to proceed by returning None.
+    Applies the HSN code policy (settyl/hsn_policy.json) to calls of hsn_code_validation_tool.
+
+    Blocked codes are taken out of the batch instead of rejecting the whole call:
+    the tool validates the permitted codes, and merge_blocked_hsn_rows_after_tool
+    puts a BLOCKED_BY_GUARDRAIL row for each blocked code back in its original
+    position. Only when every code is blocked is the tool skipped.
     """
+    start = time.perf_counter()
     tool_name = tool.name
     agent_name = tool_context.agent_name # Agent attempting the tool call
-    print(f"--- Callback: block_hsn_codes_tool_guardrail running for tool '{tool_name}' in agent '{agent_name}' ---")
-    print(f"--- Callback: Inspecting args: {args} ---")
+    session_id = _session_id(tool_context)
+    if log.enabled(logging.DEBUG):
+        log.debug("guardrail.tool.inspecting", agent=agent_name, tool=tool_name, session=session_id,
+                  arg_names=sorted(args), hsn_input_count=len(args.get("hsn_inputs") or ()))
 
     # --- Guardrail Logic ---
     # 1. Check if the correct tool is being called
@@ -104,94 +187,181 @@ def block_hsn_codes_tool_guardrail(
             "Processing for this code has been disabled. Please verify your input or contact support for more information on this category."
         ]
 
-        if not hsn_codes_to_check:
-            # No codes found in the arguments, so nothing to block. Allow to proceed.
+        if not hsn_codes_to_check or not isinstance(hsn_codes_to_check, list):
+            # No codes to check (the tool itself reports a wrong input type). Allow to proceed.
             return None
 
-        # 3. Implement your blocking logic
-        for code in hsn_codes_to_check:
-            if isinstance(code, str) and code.strip().startswith("99"):
-                blocked_code = code
-                print(f"--- Callback: Detected blocked HSN code '{blocked_code}'. Blocking tool execution! ---")
-                
-                # Optionally update state to record the block
-                tool_context.state["guardrail_hsn_block_triggered"] = True
-                
-                # 4. Return a dictionary that matches the tool's expected error output format.
-                # This becomes the tool's result, skipping the actual tool run.
-                error_message = random.choice(guardrail_blocked_responses)
-                # error_message = f"Policy restriction: Validation for HSN code '{blocked_code}' (Services) is not allowed through this tool."
-
-                
-                # This should be a list of dictionaries, just like your real tool's output
-                return [{
-                    "input_hsn": blocked_code,
-                    "is_valid": False,
-                    "reason_code": "BLOCKED_BY_GUARDRAIL",
-                    "message": error_message
-                }]
-        
-        # If the loop completes without finding any blocked codes
-        print(f"--- Callback: All HSN codes are allowed. Proceeding with tool execution. ---")
+        # 3. Split the batch with the compiled policy (recompiled only when the file changes)
+        permitted, blocked = get_hsn_policy().partition(hsn_codes_to_check)
+        if not blocked:
+            log.debug("guardrail.tool.allowed", agent=agent_name, tool=tool_name, session=session_id,
+                      latency_ms=elapsed_ms(start), hsn_input_count=len(hsn_codes_to_check))
+            return None
 
-    # If it's not the target tool or no codes were blocked, allow the call to proceed.
-    return None
+        log.warning("guardrail.tool.blocked", agent=agent_name, tool=tool_name, session=session_id,
+                    latency_ms=elapsed_ms(start), blocked_count=len(blocked), permitted_count=len(permitted),
+                    first_blocked_code=blocked[0][1])
+        set_span_attributes(blocked_count=len(blocked), permitted_count=len(permitted))
+
+        # Optionally update state to record the block
+        tool_context.state["guardrail_hsn_block_triggered"] = True
+
+        # 4. One row per blocked code, in the tool's own output format
+        error_message = random.choice(guardrail_blocked_responses)
+        blocked_rows = [
+            (position, {
+                "input_hsn": code,
+                "is_valid": False,
+                "reason_code": "BLOCKED_BY_GUARDRAIL",
+                "message": error_message,
+                "policy_rule": rule,
+            })
+            for position, code, rule in blocked
+        ]
 
+        if not permitted:
+            # Nothing left to validate: this becomes the tool's result, skipping the actual tool run.
+            return [row for _, row in blocked_rows]
 
-print("✅ block_paris_tool_guardrail function defined.")
+        # 5. Let the tool validate only the permitted codes; the after-tool callback merges the rest back in.
+        _pending_blocked_rows[tool_context] = (permitted, blocked_rows, len(hsn_codes_to_check))
 
-# def load_hsn_data(file_path: str):
-def load_hsn_data(file_path: str) -> Dict[str, str]:
-    """
-    Loads HSN data from an Excel file into an efficient in-memory dictionary.
-    This function is called once when the application starts.
-    """
-    print(f"--- Initializing HSN Data Store from: {file_path} ---")
-    if not os.path.exists(file_path):
-        print(f"--- CRITICAL ERROR: HSN master file not found at '{file_path}'. The validation tool will be non-functional. ---")
-        return {}
+    # If it's not the target tool or some codes are permitted, allow the call to proceed.
+    return None
 
-    try:
-        df = pd.read_excel(file_path, dtype={'HSNCode': str})
 
-        if 'HSNCode' not in df.columns or 'Description' not in df.columns:
-            print("--- CRITICAL ERROR: Excel file must contain 'HSNCode' and 'Description' columns. ---")
-            return {}
+@traced("after_tool_callback")
+def merge_blocked_hsn_rows_after_tool(
+    tool: BaseTool, args: Dict[str, Any], tool_context: ToolContext, tool_response: Any
+) -> Optional[Any]:
+    """
+    Puts the rows for codes removed by block_hsn_codes_tool_guardrail back into the
+    tool's result, so the model sees one row per requested code, in request order.
+    Returns None (keeping the tool's result) when nothing was removed.
+    """
+    pending = _pending_blocked_rows.pop(tool_context, None)
+    if pending is None or not isinstance(tool_response, list):
+        return None
 
-        df.dropna(subset=['HSNCode'], inplace=True)
-        df['HSNCode'] = df['HSNCode'].str.strip()
-        hsn_map = pd.Series(df.Description.values, index=df.HSNCode).to_dict()
-        
-        print(f"--- Successfully loaded {len(hsn_map)} HSN codes into memory. ---")
-        return hsn_map
+    _, blocked_rows, total = pending
+    merged = merge_blocked_rows(tool_response, blocked_rows, total)
+    tool_context.state["hsn_tool_last_result"] = summarize_validation_results(merged)
+    return merged
 
-    except Exception as e:
-        print(f"--- CRITICAL ERROR: An error occurred while reading the Excel file: {e} ---")
-        return {}
 
-# Load the data into a global variable. This is our in-memory data store.
+# The in-memory data store. Nothing is loaded at import time: the first tool call
+# loads the data, or set HSN_DATA_WARMUP=1 to start loading it in the background
+# while the rest of the server starts up. Either way the description search index
+# is then built in a background thread, before the first search needs it.
 script_dir = os.path.dirname(__file__) # The directory where main_agent.py is located
 file_path = os.path.join(script_dir, "HSN_SAC.xlsx")
-hsn_master_data = load_hsn_data(file_path)
-# hsn_master_data = load_hsn_data("HSN_SAC.xlsx")
+# By default the data is served from the memory-mapped snapshot (CompactHsnMap), so
+# all worker processes on a host share one copy. Set HSN_COMPACT_STORE=0 to load a dict.
+hsn_data_store = HsnDataStore(
+    file_path,
+    loader=functools.partial(load_hsn_data, compact=os.getenv("HSN_COMPACT_STORE", "1") == "1"),
+)
+
+if os.getenv("HSN_DATA_WARMUP", "0") == "1":
+    hsn_data_store.start_warmup()
+
+# Tariff updates: set HSN_DATA_WATCH_INTERVAL (seconds) to reload automatically when
+# HSN_SAC.xlsx is replaced, or call reload_hsn_data() from an admin hook.
+if os.getenv("HSN_DATA_WATCH_INTERVAL"):
+    hsn_data_store.start_watching(float(os.getenv("HSN_DATA_WATCH_INTERVAL")))
+
+
+# Batches at least this large are validated with validate_hsn_codes_bulk().
+BULK_VALIDATION_THRESHOLD = int(os.getenv("HSN_BULK_VALIDATION_THRESHOLD", "1000"))
+
+# Messages used by hsn_code_validation_tool, shared with the bulk path.
+HSN_TOOL_MESSAGES = {
+    "VALID": "HSN code is valid.",
+    "INVALID_ITEM_TYPE": "Each HSN code must be a string.",
+    "INVALID_FORMAT": "HSN code must be numeric and 2, 4, 6, or 8 digits long.",
+    "NOT_FOUND": "HSN code not found in master data.",
+}
+
+
+# The validation tool returns every row to the model, but keeps only a summary in
+# session state: total, counts per reason code and the first invalid rows. Full
+# rows would be copied on every session read and stored with every event.
+LAST_RESULT_MAX_ROWS = int(os.getenv("HSN_LAST_RESULT_MAX_ROWS", "50"))
+
+
+def summarize_validation_results(results: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Builds the 'hsn_tool_last_result' state value for a validation result.
+
+    Returns:
+        Dict[str, Any]: The 'total' number of rows, 'counts' per reason code
+                        ('VALID' for valid rows), up to LAST_RESULT_MAX_ROWS
+                        'invalid_rows' in input order, whether more were left
+                        out ('invalid_rows_truncated') and the 'data_version'.
+    """
+    counts: Dict[str, int] = {}
+    invalid_rows = []
+    for row in results:
+        reason_code = "VALID" if row.get("is_valid") else row.get("reason_code", "INVALID")
+        counts[reason_code] = counts.get(reason_code, 0) + 1
+        if reason_code != "VALID" and len(invalid_rows) < LAST_RESULT_MAX_ROWS:
+            invalid_rows.append(row)
+    return {
+        "total": len(results),
+        "counts": counts,
+        "invalid_rows": invalid_rows,
+        "invalid_rows_truncated": len(results) - counts.get("VALID", 0) > len(invalid_rows),
+        "data_version": next((row["data_version"] for row in results if "data_version" in row), None),
+    }
+
+
+def hsn_data_health() -> Dict[str, Any]:
+    """Health check for the HSN data store: reports loaded, loading, failed or not_loaded."""
+    return hsn_data_store.health()
+
+
+def reload_hsn_data(wait: bool = False) -> Dict[str, Any]:
+    """
+    Admin trigger: rebuilds the HSN data in the background and swaps it in atomically.
+    Requests keep being served from the current version until the swap.
+    """
+    thread = hsn_data_store.request_reload()
+    if wait:
+        thread.join()
+    return hsn_data_store.health()
 
 
 # def hsn_code_validation_tool(hsn_inputs: Union[str, List[str]]):
-def hsn_code_validation_tool(hsn_inputs: List[str], tool_context:ToolContext) -> List[Dict[str, Any]]:
+@render_with(format_validation_result)
+@traced("tool")
+async def hsn_code_validation_tool(hsn_inputs: List[str], tool_context:ToolContext) -> List[Dict[str, Any]]:
     """
     Validates one or more HSN codes against the pre-loaded HSN master data.
     This tool should be used for all HSN validation requests. It takes either a 
     single HSN code as a string or a list of HSN codes as strings.
     """
-    print(f"--- Tool 'hsn_code_validation_tool' called with: {hsn_inputs} ---")
-    
-    # Check if the data store was loaded successfully at 
-    if not hsn_master_data:
+    start = time.perf_counter()
+    log_fields = {"agent": tool_context.agent_name, "tool": "hsn_code_validation_tool",
+                  "session": _session_id(tool_context)}
+
+    # When the tool guardrail blocked some of the codes, validate only the permitted ones.
+    pending = _pending_blocked_rows.get(tool_context)
+    if pending is not None:
+        hsn_inputs = pending[0]
+
+    # Loads the data store on first use (in a worker thread, so other sessions keep
+    # running); later calls return immediately.
+    # The whole call uses this one version, even if a reload swaps in a new one meanwhile.
+    data_version = await hsn_data_store.acurrent_version()
+    if data_version is None:
+         health = hsn_data_store.health()
+         log.error("tool.hsn_validation.datastore_unavailable", **log_fields,
+                   status=health["status"], error=health["error"])
          return [{
             "input_hsn": str(hsn_inputs),
             "is_valid": False,
             "reason_code": "DATASTORE_UNAVAILABLE",
-            "message": "The HSN master data failed to load at startup. Cannot perform validation."
+            "message": "The HSN master data could not be loaded. Cannot perform validation."
         }]
 
     # The agent will call this tool with a list, so we can remove redundant type checks.
@@ -202,6 +372,21 @@ def hsn_code_validation_tool(hsn_inputs: List[str], tool_context:ToolContext) ->
             "message": "Input must be a list of strings."
         }]
 
+    # Large invoice batches go through the vectorized path; the output is identical.
+    if len(hsn_inputs) >= BULK_VALIDATION_THRESHOLD:
+        code_table = await asyncio.to_thread(data_version.get_code_table)  # built on first use
+        bulk_result = validate_hsn_codes_bulk(hsn_inputs, code_table)
+        results = bulk_result.to_records(messages=HSN_TOOL_MESSAGES, prefix_index=data_version.index)
+        for result in results:
+            result["data_version"] = data_version.version_id
+        tool_context.state["hsn_tool_last_result"] = summarize_validation_results(results)
+        log.info("tool.hsn_validation.completed", **log_fields, latency_ms=elapsed_ms(start),
+                 codes=len(results), valid=int(bulk_result.is_valid.sum()), bulk=True,
+                 data_version=data_version.version_id)
+        return results
+
+    hsn_master_data = data_version.data
+
     results = []
     for code in hsn_inputs:
     # for code in codes_to_validate:
@@ -219,17 +404,96 @@ def hsn_code_validation_tool(hsn_inputs: List[str], tool_context:ToolContext) ->
         # This is now an extremely fast lookup in the in-memory dictionary
         description = hsn_master_data.get(clean_code)
 
-        if description:
+        if description is not None:
             results.append({"input_hsn": code, "is_valid": True, "description": description, "message": "HSN code is valid."})
         else:
-            results.append({"input_hsn": code, "is_valid": False, "reason_code": "NOT_FOUND", "message": "HSN code not found in master data."})
-
-    tool_context.state["hsn_tool_last_result"] = results
+            # Report the closest existing chapter/heading/subheading so the model
+            # can answer a near-miss without another round of guesses.
+            results.append({"input_hsn": code, "is_valid": False, "reason_code": "NOT_FOUND", "message": "HSN code not found in master data.",
+                            "nearest_ancestor": data_version.index.nearest_ancestor(clean_code)})
+
+    for result in results:
+        result["data_version"] = data_version.version_id
+    tool_context.state["hsn_tool_last_result"] = summarize_validation_results(results)
+    log.info("tool.hsn_validation.completed", **log_fields, latency_ms=elapsed_ms(start),
+             codes=len(results), valid=sum(1 for result in results if result["is_valid"]), bulk=False,
+             data_version=data_version.version_id)
 
     return results
 
 
-session_service_stateful = InMemorySessionService()
+@traced("tool")
+async def hsn_code_children_tool(hsn_prefix: str, page: Optional[int], page_size: Optional[int]) -> Dict[str, Any]:
+    """
+    Lists the HSN codes directly below a chapter, heading or subheading.
+    Use this to show what a code contains (e.g. all subheadings of heading '8471')
+    or to suggest valid alternatives when a code is not found.
+    Pass an empty string to list all chapters. Results are paginated; request the
+    next page while 'has_more' is true. Pass null for page and page_size to get
+    the first page of 25 codes.
+    """
+    log.debug("tool.hsn_children.called", tool="hsn_code_children_tool", hsn_prefix=hsn_prefix, page=page)
+
+    data_version = await hsn_data_store.acurrent_version()
+    if data_version is None:
+        return {
+            "hsn_prefix": hsn_prefix,
+            "reason_code": "DATASTORE_UNAVAILABLE",
+            "message": "The HSN master data could not be loaded. Cannot list codes."
+        }
+
+    clean_prefix = str(hsn_prefix).strip()
+    if clean_prefix and (not clean_prefix.isdigit() or len(clean_prefix) > 6):
+        return {
+            "hsn_prefix": hsn_prefix,
+            "reason_code": "INVALID_FORMAT",
+            "message": "The prefix must be numeric and at most 6 digits long."
+        }
+
+    # No defaults in the signature: ADK's Gemini declarations do not support them.
+    page = max(int(page if page is not None else 1), 1)
+    page_size = min(max(int(page_size if page_size is not None else 25), 1), 100)
+    listing = data_version.index.children(clean_prefix, offset=(page - 1) * page_size, limit=page_size)
+    return {
+        "hsn_prefix": clean_prefix,
+        "children": listing["items"],
+        "total": listing["total"],
+        "page": page,
+        "has_more": listing["next_offset"] is not None,
+        "data_version": data_version.version_id
+    }
+
+
+@traced("tool")
+async def hsn_description_search_tool(query: str, top_k: Optional[int]) -> Dict[str, Any]:
+    """
+    Finds HSN codes whose descriptions match a product description, e.g.
+    'copper winding wire' or 'basmati rice'. Use this whenever the user describes
+    goods instead of giving a code. Returns candidate codes ranked best first;
+    pick from these instead of guessing codes. top_k is the number of candidates
+    (1-50); pass null for the default of 10.
+    """
+    log.debug("tool.hsn_search.called", tool="hsn_description_search_tool", query=query[:100], top_k=top_k)
+
+    data_version = await hsn_data_store.acurrent_version()
+    if data_version is None:
+        return {
+            "query": query,
+            "reason_code": "DATASTORE_UNAVAILABLE",
+            "message": "The HSN master data could not be loaded. Cannot search descriptions."
+        }
+
+    # No default in the signature: ADK's Gemini declarations do not support them.
+    top_k = min(max(int(top_k if top_k is not None else 10), 1), 50)
+    search_index = await data_version.aget_search_index()  # normally built in the background after loading
+    candidates = search_index.search(str(query), top_k=top_k)
+    return {
+        "query": query,
+        "candidates": candidates,
+        "message": "Candidates are ranked best first." if candidates else "No HSN descriptions matched the query.",
+        "data_version": data_version.version_id
+    }
+
 
 APP_NAME = "hsn_code_agent"
 SESSION_ID_STATEFUL = "session_state_demo_001"
@@ -239,31 +503,36 @@ USER_ID_STATEFUL = "user_state_demo"
 #     "user_preference": "give funny response"
 # }
 
+# The session service is created on first use rather than at import time, since
+# `adk web`/`adk api_server` import this module only to discover the agent.
+session_service_stateful: Optional[BaseSessionService] = None
 
-session_stateful = session_service_stateful.create_session(
-    app_name=APP_NAME, 
-    user_id=USER_ID_STATEFUL,
-    session_id=SESSION_ID_STATEFUL
-    # state=initial_state 
-)
-
-# session_service_stateful.create_session(
-#     app_name=APP_NAME, 
-#     user_id=USER_ID_STATEFUL,
-#     session_id=SESSION_ID_STATEFUL
-# )
-
-print(f"Session '{SESSION_ID_STATEFUL}' created for user '{USER_ID_STATEFUL}'.")
-
-retrieved_session = session_service_stateful.get_session(app_name=APP_NAME,
-                                                         user_id=USER_ID_STATEFUL,
-                                                         session_id = SESSION_ID_STATEFUL)
+async def create_demo_session() -> BaseSessionService:
+    """
+    Creates the demo session service and session for running this agent with a Runner.
 
-# print("\n--- Initial Session State ---")
-# if retrieved_session:
-#     print(retrieved_session)
-# else:
-#     print("Error: Could not retrieve session.")
+    The service is SQLite-backed when ADK_SESSION_DB is set, so the demo session
+    may already exist from an earlier run; it is reused in that case.
+    """
+    global session_service_stateful
+    if session_service_stateful is None:
+        session_service_stateful = create_session_service()
+
+    existing = await session_service_stateful.get_session(
+        app_name=APP_NAME, user_id=USER_ID_STATEFUL, session_id=SESSION_ID_STATEFUL
+    )
+    if existing is not None:
+        print(f"Session '{SESSION_ID_STATEFUL}' resumed for user '{USER_ID_STATEFUL}'.")
+        return session_service_stateful
+
+    await session_service_stateful.create_session(
+        app_name=APP_NAME, 
+        user_id=USER_ID_STATEFUL,
+        session_id=SESSION_ID_STATEFUL
+        # state=initial_state 
+    )
+    print(f"Session '{SESSION_ID_STATEFUL}' created for user '{USER_ID_STATEFUL}'.")
+    return session_service_stateful
 
 # --- Part 3: Initialize the Root Agent ---
 
@@ -272,10 +541,36 @@ runner_root_stateful = None
 
 # if hsn_code_validation_tool in globals():  
 
+# Set HSN_MODEL_CACHE_TTL (seconds) to let identical conversations within the TTL
+# share one model call (see adk_utils.model_cache). The key covers the whole
+# history, so a follow-up is never answered from another conversation. Off by default.
+MODEL_CACHE_TTL = float(os.getenv("HSN_MODEL_CACHE_TTL", "0"))
+hsn_agent_model = model_from_env("gemini-2.0-flash")
+if MODEL_CACHE_TTL > 0:
+    hsn_agent_model = with_response_cache(hsn_agent_model, ttl_seconds=MODEL_CACHE_TTL)
+
+# With HSN_RENDER_TOOL_RESULTS=1, validation results become the reply without the
+# second model call that would only restate them (see adk_utils.tool_rendering).
+# Off by default: a question like "explain 0101 in detail" then gets the rows, not an explanation.
+tool_result_renderer = ToolResultRenderer(
+    tools=[hsn_code_validation_tool],
+    enabled=os.getenv("HSN_RENDER_TOOL_RESULTS", "0") == "1",
+)
+
+
+@traced("before_model_callback")
+def render_tool_results(callback_context: CallbackContext, llm_request: LlmRequest) -> Optional[LlmResponse]:
+    """
+    Answers with the formatted tool result when the request only carries
+    hsn_code_validation_tool rows to summarize (if HSN_RENDER_TOOL_RESULTS=1).
+    """
+    return tool_result_renderer(callback_context, llm_request)
+
+
 root_agent = Agent(
     name="hsn_code_agent",
-    # Consider using the latest flash model for best performance
-    model="gemini-2.0-flash",
+    # Consider using the latest flash model for best performance (ADK_MODEL=stub runs offline)
+    model=hsn_agent_model,
     description="Agent to validate and look up HSN codes using a preloaded master data file.",
     instruction="""
     You are a helpful and efficient assistant for validating HSN codes.
@@ -283,11 +578,19 @@ root_agent = Agent(
     and use the provided 'hsn_code_validation_tool' to check their validity.
     Present the results from the tool to the user in a clear, easy-to-read format.
     If a code is valid, state its description. If invalid, state the reason.
+    If a code is not found, mention its nearest existing ancestor from the tool result.
+    Use 'hsn_code_children_tool' to list the codes under a chapter, heading or subheading.
+    If the user describes goods instead of giving a code, use 'hsn_description_search_tool'
+    and suggest the best matching candidates rather than guessing codes.
+    Rows with reason 'BLOCKED_BY_GUARDRAIL' are restricted by policy: report them as
+    restricted and do not call the tool again for those codes.
     """,
-    tools=[hsn_code_validation_tool],
+    tools=[hsn_code_validation_tool, hsn_code_children_tool, hsn_description_search_tool],
     output_key="hsn_agent_last_response",
-    before_model_callback=block_keyword_model_guardrail, 
-    before_tool_callback=block_hsn_codes_tool_guardrail
+    before_model_callback=[block_keyword_model_guardrail, hsn_fast_path, render_tool_results,
+                           bound_context_window],
+    before_tool_callback=block_hsn_codes_tool_guardrail,
+    after_tool_callback=merge_blocked_hsn_rows_after_tool,
 )
 
 print("\n--- Agent configuration complete. Ready for 'adk web' command. ---")
@@ -0,0 +1,81 @@
+"""
+Cold-start benchmark for loading the HSN master data.
+
+Each sample runs in a fresh Python process so that module imports (pandas,
+openpyxl) are included in the measurement, exactly as they are when a worker
+starts or `adk web` reloads the agent.
+
+Usage (from the repository root):
+    python -m settyl.benchmarks.bench_cold_start [--runs 5]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+HSN_FILE_PATH = os.path.join(REPO_ROOT, "settyl", "HSN_SAC.xlsx")
+
+# The child prints the elapsed load time (including imports) as its last line.
+# The `settyl` package object is registered by hand so that importing the
+# loader does not also execute settyl/__init__.py (which builds the agent and
+# imports google.adk); only the data layer is measured.
+_CHILD_SCRIPT = """
+import contextlib, io, os, sys, time, types
+package = types.ModuleType("settyl")
+package.__path__ = [os.path.join(os.getcwd(), "settyl")]
+sys.modules["settyl"] = package
+start = time.perf_counter()
+from settyl.hsn_validator import load_hsn_data
+with contextlib.redirect_stdout(io.StringIO()):
+    data = load_hsn_data(sys.argv[1], use_snapshot=sys.argv[2] == "1")
+elapsed = time.perf_counter() - start
+assert data, "HSN data failed to load"
+print(len(data))
+print(elapsed)
+"""
+
+
+def time_cold_start(use_snapshot: bool) -> float:
+    """Runs one load in a fresh interpreter and returns its wall time in seconds."""
+    output = subprocess.run(
+        [sys.executable, "-c", _CHILD_SCRIPT, HSN_FILE_PATH, "1" if use_snapshot else "0"],
+        cwd=REPO_ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout.split()
+    return float(output[-1])
+
+
+def run_benchmark(runs: int) -> dict:
+    """
+    Measures cold-start load time for the Excel and snapshot paths.
+
+    Returns:
+        dict: Per-path samples and medians, plus the speed-up of the snapshot path.
+    """
+    # Make sure a fresh snapshot exists before timing the snapshot path.
+    time_cold_start(use_snapshot=True)
+
+    results = {}
+    for name, use_snapshot in (("excel", False), ("snapshot", True)):
+        samples = [time_cold_start(use_snapshot) for _ in range(runs)]
+        results[name] = {"samples_s": samples, "median_s": statistics.median(samples)}
+    results["speedup"] = results["excel"]["median_s"] / results["snapshot"]["median_s"]
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--runs", type=int, default=5, help="Number of cold starts per path.")
+    cli_args = parser.parse_args()
+
+    report = run_benchmark(cli_args.runs)
+    print(f"Excel path    : {report['excel']['median_s'] * 1000:8.1f} ms (median of {cli_args.runs})")
+    print(f"Snapshot path : {report['snapshot']['median_s'] * 1000:8.1f} ms (median of {cli_args.runs})")
+    print(f"Speed-up      : {report['speedup']:.1f}x")
+    print(json.dumps(report))
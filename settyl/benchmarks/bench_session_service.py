@@ -0,0 +1,129 @@
+"""
+Throughput of the session services an agent can run on.
+
+Replays the session traffic of an HSN validation turn as the Runner produces
+it: get_session at the start of the turn, then four events (the user message,
+the model's function call, the tool response carrying a state delta with the
+validation rows, and the final answer). Compared:
+
+  - InMemorySessionService
+  - BoundedSessionService (in memory, capped; get_session does not deep-copy events)
+  - SqliteSessionService with per-turn batched appends (the default)
+  - SqliteSessionService writing every event as it arrives
+  - both wrapped in OffloadingSessionService, which keeps state values over
+    32 KiB in a blob store (run with --rows 10000 to see the difference)
+
+Usage (from the repository root):
+    python -m settyl.benchmarks.bench_session_service --sessions 50 --turns 20
+"""
+
+import argparse
+import asyncio
+import os
+import shutil
+import tempfile
+import time
+from typing import Any, Callable, Dict, List
+
+from google.adk.events.event import Event, EventActions
+from google.adk.sessions import InMemorySessionService
+from google.genai import types
+
+from adk_utils.bounded_session_service import BoundedSessionService
+from adk_utils.sqlite_session_service import SqliteSessionService
+from adk_utils.state_offload import BlobStore, OffloadingSessionService
+
+APP_NAME = "hsn_code_agent"
+
+
+def _turn_events(turn: int, rows: int) -> List[Event]:
+    invocation_id = f"e-{turn}"
+    results = [{"input_hsn": f"{8544 + i:04d}", "is_valid": True, "description": "INSULATED WIRE, CABLE",
+                "message": "HSN code is valid."} for i in range(rows)]
+    return [
+        Event(invocation_id=invocation_id, author="user",
+              content=types.Content(role="user", parts=[types.Part(text=f"Validate these codes, turn {turn}")])),
+        Event(invocation_id=invocation_id, author=APP_NAME,
+              content=types.Content(role="model", parts=[types.Part(function_call=types.FunctionCall(
+                  name="hsn_code_validation_tool", args={"hsn_inputs": [r["input_hsn"] for r in results]}))])),
+        Event(invocation_id=invocation_id, author=APP_NAME,
+              content=types.Content(role="user", parts=[types.Part(function_response=types.FunctionResponse(
+                  name="hsn_code_validation_tool", response={"result": results}))]),
+              actions=EventActions(state_delta={"hsn_tool_last_result": results, "user:turns": turn})),
+        Event(invocation_id=invocation_id, author=APP_NAME,
+              content=types.Content(role="model", parts=[types.Part(text=f"All {rows} codes are valid.")]),
+              actions=EventActions(state_delta={"hsn_agent_last_response": f"All {rows} codes are valid."})),
+    ]
+
+
+async def run_workload(service, sessions: int, turns: int, rows: int) -> Dict[str, Any]:
+    """Runs `turns` turns on each of `sessions` sessions, interleaved, and times them."""
+    session_ids = [f"session-{i}" for i in range(sessions)]
+    for session_id in session_ids:
+        await service.create_session(app_name=APP_NAME, user_id="bench_user", session_id=session_id)
+
+    turn_seconds: List[float] = []
+    start = time.perf_counter()
+    for turn in range(turns):
+        for session_id in session_ids:
+            turn_start = time.perf_counter()
+            session = await service.get_session(app_name=APP_NAME, user_id="bench_user", session_id=session_id)
+            for event in _turn_events(turn, rows):
+                await service.append_event(session, event)
+            turn_seconds.append(time.perf_counter() - turn_start)
+    elapsed = time.perf_counter() - start
+
+    # Reading a long session back, e.g. when a worker picks it up after a restart
+    read_start = time.perf_counter()
+    session = await service.get_session(app_name=APP_NAME, user_id="bench_user", session_id=session_ids[0])
+    read_seconds = time.perf_counter() - read_start
+
+    turn_seconds.sort()
+    return {
+        "turns": len(turn_seconds),
+        "turns_per_s": len(turn_seconds) / elapsed,
+        "events_per_s": 4 * len(turn_seconds) / elapsed,
+        "turn_p50_ms": turn_seconds[len(turn_seconds) // 2] * 1000,
+        "turn_p99_ms": turn_seconds[int(len(turn_seconds) * 0.99)] * 1000,
+        "read_full_session_ms": read_seconds * 1000,
+        "events_in_session": len(session.events),
+    }
+
+
+def run_benchmark(sessions: int = 50, turns: int = 20, rows: int = 20) -> Dict[str, Dict[str, Any]]:
+    """Runs the workload on each service and returns the results keyed by service name."""
+    work_dir = tempfile.mkdtemp(prefix="bench_sessions_")
+    factories: Dict[str, Callable[[], Any]] = {
+        "in_memory": InMemorySessionService,
+        "bounded": BoundedSessionService,
+        "sqlite_batched": lambda: SqliteSessionService(os.path.join(work_dir, "batched.db")),
+        "sqlite_per_event": lambda: SqliteSessionService(os.path.join(work_dir, "per_event.db"), batch_events=False),
+        "in_memory_offload": lambda: OffloadingSessionService(
+            InMemorySessionService(), BlobStore(os.path.join(work_dir, "blobs"))),
+        "sqlite_offload": lambda: OffloadingSessionService(
+            SqliteSessionService(os.path.join(work_dir, "offload.db")), BlobStore(os.path.join(work_dir, "blobs"))),
+    }
+    try:
+        results = {}
+        for name, factory in factories.items():
+            service = factory()
+            results[name] = asyncio.run(run_workload(service, sessions, turns, rows))
+            if hasattr(service, "close"):
+                service.close()
+        return results
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark ADK session services.")
+    parser.add_argument("--sessions", type=int, default=50)
+    parser.add_argument("--turns", type=int, default=20)
+    parser.add_argument("--rows", type=int, default=20, help="Validation rows in each turn's state delta.")
+    cli_args = parser.parse_args()
+
+    print(f"{cli_args.sessions} sessions x {cli_args.turns} turns, {cli_args.rows} rows per tool result\n")
+    print(f"{'service':<18}{'turns/s':>10}{'events/s':>10}{'p50 ms':>9}{'p99 ms':>9}{'read ms':>9}")
+    for service_name, result in run_benchmark(cli_args.sessions, cli_args.turns, cli_args.rows).items():
+        print(f"{service_name:<18}{result['turns_per_s']:>10.0f}{result['events_per_s']:>10.0f}"
+              f"{result['turn_p50_ms']:>9.2f}{result['turn_p99_ms']:>9.2f}{result['read_full_session_ms']:>9.2f}")
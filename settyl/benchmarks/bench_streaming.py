@@ -0,0 +1,100 @@
+"""
+Time to first token: streamed replies vs. waiting for the final response.
+
+Runs the HSN agent turn by turn, twice per query:
+  - final-only: RunConfig() and wait for event.is_final_response(), as
+                call_agent_async in test_agent does; the user sees nothing
+                until then.
+  - streaming:  adk_utils.streaming.stream_agent_reply in SSE mode; the user
+                sees the first text chunk.
+
+By default the model is the StubLlm with a Gemini-like profile (first token
+after ~300 ms, then a 4-word chunk every 30 ms), so the run is offline and
+repeatable. Pass --live to use the agent's configured model instead.
+
+Usage (from the repository root):
+    python -m settyl.benchmarks.bench_streaming --turns 10
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+from typing import Dict, List
+
+from google.adk.agents.run_config import RunConfig
+from google.adk.runners import Runner
+from google.genai import types
+
+from adk_utils.sqlite_session_service import create_session_service
+from adk_utils.streaming import stream_agent_reply
+from adk_utils.stub_llm import StubLlm, use_stub_llm
+
+QUERIES = (
+    "Validate HSN codes 0101 and 8544.",
+    "Is 99887766 a valid HSN code?",
+    "Explain what an HSN code is used for.",
+)
+
+
+async def _final_only_ms(runner: Runner, query: str, user_id: str, session_id: str) -> float:
+    content = types.Content(role="user", parts=[types.Part(text=query)])
+    start = time.perf_counter()
+    async for event in runner.run_async(user_id=user_id, session_id=session_id, new_message=content,
+                                        run_config=RunConfig()):
+        if event.is_final_response():
+            break
+    return (time.perf_counter() - start) * 1000
+
+
+async def _streaming_ms(runner: Runner, query: str, user_id: str, session_id: str) -> Dict[str, float]:
+    async for message in stream_agent_reply(runner, query, user_id, session_id):
+        if message["type"] == "final":
+            return message
+        if message["type"] == "error":
+            raise RuntimeError(message["message"])
+    raise RuntimeError("stream ended without a final message")
+
+
+async def run_benchmark(turns: int = 10, live: bool = False) -> Dict[str, Dict[str, float]]:
+    """Returns median and p95 time to first visible text, in ms, per path."""
+    from settyl.agent import root_agent
+
+    if not live:
+        use_stub_llm(root_agent, StubLlm(latency="normal:300:40", output_tokens=120, chunk_tokens=4,
+                                         chunk_interval_ms=30))
+    runner = Runner(agent=root_agent, app_name="bench_streaming", session_service=create_session_service())
+    await runner.session_service.create_session(app_name=runner.app_name, user_id="bench", session_id="final")
+    await runner.session_service.create_session(app_name=runner.app_name, user_id="bench", session_id="stream")
+
+    final_only: List[float] = []
+    streamed_first: List[float] = []
+    streamed_total: List[float] = []
+    for turn in range(turns):
+        query = QUERIES[turn % len(QUERIES)]
+        final_only.append(await _final_only_ms(runner, query, "bench", "final"))
+        final = await _streaming_ms(runner, query, "bench", "stream")
+        streamed_first.append(final["time_to_first_token_ms"])
+        streamed_total.append(final["total_ms"])
+
+    def summary(values: List[float]) -> Dict[str, float]:
+        ordered = sorted(values)
+        return {"median_ms": statistics.median(ordered), "p95_ms": ordered[max(0, int(len(ordered) * 0.95) - 1)]}
+
+    return {
+        "final_only_first_text": summary(final_only),
+        "streaming_first_text": summary(streamed_first),
+        "streaming_complete": summary(streamed_total),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure time to first token with and without streaming.")
+    parser.add_argument("--turns", type=int, default=10)
+    parser.add_argument("--live", action="store_true", help="Use the agent's real model (needs API access).")
+    cli_args = parser.parse_args()
+
+    results = asyncio.run(run_benchmark(cli_args.turns, cli_args.live))
+    print(f"\n{'time until the user sees text':<34}{'median ms':>12}{'p95 ms':>10}")
+    for label, row in results.items():
+        print(f"{label:<34}{row['median_ms']:>12.1f}{row['p95_ms']:>10.1f}")
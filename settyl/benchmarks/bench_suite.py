@@ -0,0 +1,313 @@
+"""
+Benchmark suite for the HSN validation stack.
+
+Measures data loading, validate_hsn_codes / hsn_code_validation_tool at
+several batch sizes, description search, the agent's two guardrail callbacks
+on realistic request sizes, and the keyword matcher on its own. Results are written as JSON and can be compared against a
+stored baseline to gate releases on throughput and latency.
+
+Usage (from the repository root):
+    python -m settyl.benchmarks.bench_suite --output bench.json
+    python -m settyl.benchmarks.bench_suite --save-baseline
+    python -m settyl.benchmarks.bench_suite --baseline settyl/benchmarks/baseline.json --tolerance 0.2
+
+With --baseline, the process exits with status 1 if any benchmark's median
+latency is more than `tolerance` slower than the baseline.
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from . import bench_cold_start
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_BASELINE_PATH = os.path.join(BENCH_DIR, "baseline.json")
+BATCH_SIZES = (1, 10, 1_000, 100_000)
+
+
+# --- Part 1: Timing Harness ---
+
+def measure(fn: Callable[[], Any], items: int = 1, repeat: int = 7, min_sample_time: float = 0.05) -> Dict[str, Any]:
+    """
+    Times a zero-argument callable.
+
+    The call is repeated enough times per sample to last at least
+    `min_sample_time`, and `repeat` samples are taken. stdout is silenced,
+    since the agent's callbacks and tools print on every call.
+
+    Args:
+        fn (Callable[[], Any]): The operation to time.
+        items (int): Number of items one call processes, for throughput.
+        repeat (int): Number of samples.
+        min_sample_time (float): Minimum duration of one sample in seconds.
+
+    Returns:
+        Dict[str, Any]: Per-call latency statistics in seconds and items/s throughput.
+    """
+    with contextlib.redirect_stdout(io.StringIO()) as sink:
+        fn()  # warm-up
+        loops = 1
+        while True:
+            start = time.perf_counter()
+            for _ in range(loops):
+                fn()
+            elapsed = time.perf_counter() - start
+            if elapsed >= min_sample_time or loops >= 1 << 20:
+                break
+            loops *= 2
+
+        samples = [elapsed / loops]
+        for _ in range(repeat - 1):
+            start = time.perf_counter()
+            for _ in range(loops):
+                fn()
+            samples.append((time.perf_counter() - start) / loops)
+            sink.seek(0)
+            sink.truncate()
+
+    samples.sort()
+    median = statistics.median(samples)
+    return {
+        "median_s": median,
+        "min_s": samples[0],
+        "p95_s": samples[min(len(samples) - 1, int(round(0.95 * (len(samples) - 1))))],
+        "items": items,
+        "items_per_s": items / median if median else None,
+        "loops": loops,
+        "repeat": repeat,
+    }
+
+
+# --- Part 2: Fixtures ---
+
+def _make_contexts(root_agent):
+    """Builds real CallbackContext/ToolContext objects around an in-memory session."""
+    from google.adk.agents.callback_context import CallbackContext
+    from google.adk.agents.invocation_context import InvocationContext
+    from google.adk.sessions import InMemorySessionService, Session
+    from google.adk.tools.tool_context import ToolContext
+
+    session = Session(id="bench_session", app_name="hsn_code_agent", user_id="bench_user", state={}, events=[])
+    invocation_context = InvocationContext(
+        session_service=InMemorySessionService(),
+        invocation_id="e-bench",
+        agent=root_agent,
+        session=session,
+    )
+    return CallbackContext(invocation_context), ToolContext(invocation_context)
+
+
+def _make_llm_request(turns: int, words_per_message: int, rng: random.Random):
+    """Builds an LlmRequest holding a conversation of `turns` user/model exchanges."""
+    from google.adk.models.llm_request import LlmRequest
+    from google.genai import types
+
+    vocabulary = ("please validate hsn code for copper wire invoice line item shipment "
+                  "rice laptop horses batch export import tariff").split()
+    contents = []
+    for _ in range(turns):
+        text = " ".join(rng.choice(vocabulary) for _ in range(words_per_message))
+        contents.append(types.Content(role="user", parts=[types.Part(text=text)]))
+        contents.append(types.Content(role="model", parts=[types.Part(text="Here are the results.")]))
+    return LlmRequest(model="gemini-2.0-flash", contents=contents)
+
+
+# --- Part 3: Benchmarks ---
+
+def run_suite(cold_start_runs: int = 3, seed: int = 1234) -> Dict[str, Dict[str, Any]]:
+    """
+    Runs every benchmark and returns the results keyed by benchmark name.
+
+    Args:
+        cold_start_runs (int): Fresh-process samples per load path (0 to skip).
+        seed (int): Seed for the generated inputs, so runs are comparable.
+    """
+    with contextlib.redirect_stdout(io.StringIO()):
+        from settyl import agent
+        from settyl.hsn_validator import validate_hsn_codes
+        from settyl.structured_logging import configure_logging
+
+        # Keep the cost of logging in the measurements, but not the lines on the terminal.
+        configure_logging(stream=open(os.devnull, "w"))
+
+        hsn_map = agent.hsn_data_store.get()
+        agent.hsn_data_store.get_index()
+
+    rng = random.Random(seed)
+    results: Dict[str, Dict[str, Any]] = {}
+
+    # Data loading, each sample in a fresh interpreter.
+    if cold_start_runs > 0:
+        cold = bench_cold_start.run_benchmark(cold_start_runs)
+        for path in ("excel", "snapshot"):
+            samples = sorted(cold[path]["samples_s"])
+            results[f"load_hsn_data.cold_start.{path}"] = {
+                "median_s": cold[path]["median_s"], "min_s": samples[0], "p95_s": samples[-1],
+                "items": 1, "items_per_s": 1 / cold[path]["median_s"], "loops": 1, "repeat": cold_start_runs,
+            }
+
+    # Inputs: mostly valid codes, with a realistic sprinkling of bad ones.
+    valid_codes = [code for code in hsn_map if code.isdigit()]
+    invalid_codes = ["99999999", "12345", "ABCD", " 0101 ", "847199"]
+    batches: Dict[int, List[str]] = {}
+    for size in BATCH_SIZES:
+        batches[size] = [rng.choice(invalid_codes) if rng.random() < 0.05 else rng.choice(valid_codes)
+                         for _ in range(size)]
+
+    callback_context, tool_context = _make_contexts(agent.root_agent)
+    repeat_for = lambda size: 3 if size >= 100_000 else 7
+
+    # The tool is async; one loop runs every call, so only the tool's own time is measured.
+    loop = asyncio.new_event_loop()
+    for size, codes in batches.items():
+        results[f"validate_hsn_codes.{size}"] = measure(
+            lambda: validate_hsn_codes(codes, hsn_map), items=size, repeat=repeat_for(size))
+        results[f"hsn_code_validation_tool.{size}"] = measure(
+            lambda: loop.run_until_complete(agent.hsn_code_validation_tool(codes, tool_context)),
+            items=size, repeat=repeat_for(size))
+    loop.close()
+
+    # Description search: a rare term, and common ones with long posting lists.
+    search_index = agent.hsn_data_store.get_search_index()
+    for name, query in (("rare", "basmati rice"), ("common", "articles of iron or steel")):
+        results[f"hsn_description_search.{name}"] = measure(lambda: search_index.search(query, top_k=10), items=1)
+
+    # Model guardrail: a short chat and a long conversation history. The session's
+    # scan cache is cleared before every call, so each call really scans the
+    # message; the .cached cases time the repeat calls of one turn.
+    session_id = agent._session_id(callback_context)
+
+    def guardrail_uncached(llm_request):
+        agent.keyword_scan_cache.forget(session_id)
+        return agent.block_keyword_model_guardrail(callback_context, llm_request)
+
+    for turns, words in ((1, 20), (50, 60)):
+        llm_request = _make_llm_request(turns, words, rng)
+        results[f"block_keyword_model_guardrail.{turns}_turns"] = measure(
+            lambda: guardrail_uncached(llm_request), items=1)
+        results[f"block_keyword_model_guardrail.{turns}_turns.cached"] = measure(
+            lambda: agent.block_keyword_model_guardrail(callback_context, llm_request), items=1)
+
+    # Keyword matching on its own, without the session cache: the shipped term
+    # list and a list of 5,000 terms, over a short and a long message.
+    from settyl.keyword_matcher import KeywordMatcher, get_keyword_matcher
+    letters = "abcdefghijklmnopqrstuvwxyz"
+    large_terms = ["".join(rng.choice(letters) for _ in range(rng.randint(4, 10))) for _ in range(5_000)]
+    matchers = {"default_terms": get_keyword_matcher(), "5000_terms": KeywordMatcher(large_terms)}
+    vocabulary = "please validate hsn code for copper wire invoice line item shipment rice laptop".split()
+    for words in (20, 400):
+        message = " ".join(rng.choice(vocabulary) for _ in range(words))
+        for name, matcher in matchers.items():
+            results[f"keyword_matcher.{name}.{words}_words"] = measure(lambda: matcher.search(message), items=1)
+
+    # Tool guardrail: allowed batches of growing size.
+    from google.adk.tools.function_tool import FunctionTool
+    hsn_tool = FunctionTool(agent.hsn_code_validation_tool)
+    for size in (10, 1_000):
+        allowed = [code for code in batches[size] if not code.strip().startswith("99")]
+        args = {"hsn_inputs": allowed}
+        results[f"block_hsn_codes_tool_guardrail.{size}"] = measure(
+            lambda: agent.block_hsn_codes_tool_guardrail(hsn_tool, args, tool_context), items=len(allowed))
+
+    return results
+
+
+# --- Part 4: Reporting and Baselines ---
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=BENCH_DIR,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def build_report(results: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+    return {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "git_commit": _git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+        },
+        "results": results,
+    }
+
+
+def compare_to_baseline(report: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> List[Dict[str, Any]]:
+    """
+    Compares median latencies against a baseline report.
+
+    Returns:
+        List[Dict[str, Any]]: One row per benchmark present in both reports, with
+                              the ratio current/baseline and a 'regressed' flag.
+    """
+    rows = []
+    for name, current in report["results"].items():
+        previous = baseline.get("results", {}).get(name)
+        if not previous:
+            continue
+        ratio = current["median_s"] / previous["median_s"] if previous["median_s"] else float("inf")
+        rows.append({
+            "name": name,
+            "baseline_s": previous["median_s"],
+            "current_s": current["median_s"],
+            "ratio": ratio,
+            "regressed": ratio > 1 + tolerance,
+        })
+    return rows
+
+
+def _format_seconds(seconds: float) -> str:
+    if seconds >= 1:
+        return f"{seconds:8.2f} s "
+    if seconds >= 1e-3:
+        return f"{seconds * 1e3:8.2f} ms"
+    return f"{seconds * 1e6:8.2f} us"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the HSN validation stack.")
+    parser.add_argument("--output", "-o", default=None, help="Write the JSON report to this file.")
+    parser.add_argument("--baseline", default=None, help="Baseline report to compare against.")
+    parser.add_argument("--save-baseline", action="store_true", help=f"Save this run as {DEFAULT_BASELINE_PATH}.")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed slowdown vs. baseline (default: 0.2 = 20%%).")
+    parser.add_argument("--cold-start-runs", type=int, default=3, help="Fresh-process load samples per path (0 to skip).")
+    cli_args = parser.parse_args()
+
+    report = build_report(run_suite(cold_start_runs=cli_args.cold_start_runs))
+
+    for name, result in report["results"].items():
+        throughput = f"{result['items_per_s']:>14,.0f} items/s" if result["items"] > 1 else ""
+        print(f"{name:<48} {_format_seconds(result['median_s'])} {throughput}")
+
+    if cli_args.output:
+        with open(cli_args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    if cli_args.save_baseline:
+        with open(DEFAULT_BASELINE_PATH, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"Saved baseline to {DEFAULT_BASELINE_PATH}")
+
+    if cli_args.baseline:
+        with open(cli_args.baseline, encoding="utf-8") as f:
+            baseline_report = json.load(f)
+        comparison = compare_to_baseline(report, baseline_report, cli_args.tolerance)
+        print("\nComparison with baseline:")
+        for row in comparison:
+            flag = "REGRESSION" if row["regressed"] else "ok"
+            print(f"{row['name']:<48} {row['ratio']:6.2f}x  {flag}")
+        if any(row["regressed"] for row in comparison):
+            sys.exit(1)
@@ -0,0 +1,235 @@
+"""
+Answers messages that only list HSN codes without asking the model.
+
+Most messages to the HSN agent look like "validate 01012100, 8471, 99". For
+these the model only extracts the codes, calls hsn_code_validation_tool and
+then writes the tool's rows out as text, which takes two model round trips.
+HsnFastPath is a before_model_callback that handles both steps itself:
+
+  1. On the turn's first model call, the latest user message is tokenized with
+     a compiled pattern. If it is made of HSN-like numbers (also written with
+     dots, as in 0101.21.00) and filler words from FILLER_WORDS ("validate",
+     "check", "hsn", "codes", "and", ...), the callback answers with a function
+     call to hsn_code_validation_tool for those codes. ADK then runs the tool as
+     usual, so block_hsn_codes_tool_guardrail and the after-tool merge still apply.
+  2. On the next model call, if the turn consists of exactly that call and its
+     result, the reply is rendered from the rows by render_validation_reply().
+
+Anything else goes to the model unchanged: other words ("describe", "under",
+"copper"), single digits, codes next to other punctuation ("8471-8473"),
+non-text parts, or tool results that are not the expected rows. Put the
+callback after the keyword guardrail so blocked terms are still rejected first.
+
+Routed and fallback counts are recorded as the counter hsn.fast_path.requests
+(attribute hsn.fast_path.result), see adk_utils.telemetry.
+"""
+
+import re
+from typing import Any, Dict, List, Optional
+
+from google.adk.agents.callback_context import CallbackContext
+from google.adk.models.llm_request import LlmRequest
+from google.adk.models.llm_response import LlmResponse
+from google.genai import types
+
+from adk_utils.telemetry import add_to_counter, set_span_attributes
+from adk_utils.tool_rendering import result_rows
+
+VALIDATION_TOOL_NAME = "hsn_code_validation_tool"
+REQUESTS_COUNTER = "hsn.fast_path.requests"
+
+# Batches up to this size are listed code by code; larger ones list only the codes that are not valid.
+FULL_LISTING_ROWS = 20
+
+# Words that may surround the codes in a message the fast path answers (case-folded).
+FILLER_WORDS = frozenset("""
+    validate validation validity check verify confirm lookup look up hsn sac code codes number numbers
+    is are these this the following and or also too please pls kindly can could would you valid if whether
+    for of a an me my about what s hi hello thanks thank ok
+""".split())
+
+# Numbers (with dots between digit groups), words, or single other characters.
+_TOKEN = re.compile(r"\d+(?:\.\d+)*|[^\W\d_]+|\S")
+
+# Punctuation that may sit next to a code ("codes: 0101, 8471."). Any other mark
+# next to a code, with or without spaces ("8471-8473", "8471 / 72", "(8471)"),
+# changes what the codes mean, so the message goes to the model.
+_SEPARATORS = frozenset(",;:.?!")
+
+
+# --- Part 1: Recognizing Code-Only Messages ---
+
+def extract_codes(text: str) -> Optional[List[str]]:
+    """
+    Returns the codes of a code-only message, in order and without duplicates.
+
+    Returns None when the message needs the model: it has a word outside
+    FILLER_WORDS, a single-digit number, a number next to letters or to
+    punctuation outside _SEPARATORS (a range like '8471-8473'), or no number
+    at all. Numbers of the wrong length are returned too; the tool
+    reports their format.
+    """
+    codes: List[str] = []
+    seen = set()
+    previous = None  # "code", "word", "mark" (punctuation outside _SEPARATORS) or "separator"
+    for match in _TOKEN.finditer(text):
+        token = match.group()
+        if token[0].isdigit():
+            code = token.replace(".", "")
+            if len(code) < 2 or previous == "mark":
+                return None
+            # A code glued to letters ("HS8471", "8471a") is not a code on its own.
+            if text[match.start() - 1:match.start()].isalpha() or text[match.end():match.end() + 1].isalpha():
+                return None
+            if code not in seen:
+                seen.add(code)
+                codes.append(code)
+            previous = "code"
+        elif token[0].isalpha() or token[0] == "_":
+            if token.casefold() not in FILLER_WORDS:
+                return None
+            previous = "word"
+        elif token in _SEPARATORS:
+            previous = "separator"
+        else:
+            if previous == "code":
+                return None
+            previous = "mark"
+    return codes or None
+
+
+def _message_text(content: types.Content) -> Optional[str]:
+    """The text of a user message, or None if it has anything besides text."""
+    texts = []
+    for part in content.parts or ():
+        if part.text is None or part.thought:
+            return None
+        texts.append(part.text)
+    return "\n".join(texts)
+
+
+def _latest_user_message(contents: List[types.Content]) -> int:
+    """Index of the latest user text message (the start of the current turn), or -1."""
+    for index in range(len(contents) - 1, -1, -1):
+        content = contents[index]
+        if content.role == "user" and any(part.text for part in content.parts or ()):
+            return index
+    return -1
+
+
+# --- Part 2: Rendering the Reply ---
+
+def _describe_row(row: Dict[str, Any]) -> str:
+    code = row.get("input_hsn", "?")
+    if row.get("is_valid"):
+        return f"- {code}: valid. {row.get('description', '')}".rstrip()
+    reason = row.get("reason_code")
+    if reason == "NOT_FOUND":
+        line = f"- {code}: not found in the HSN master data."
+        ancestor = row.get("nearest_ancestor")
+        if ancestor:
+            line += f" Nearest existing {ancestor.get('level', 'code')}: {ancestor.get('hsn')} ({ancestor.get('description')})."
+        return line
+    if reason == "BLOCKED_BY_GUARDRAIL":
+        return f"- {code}: restricted by policy. {row.get('message', '')}".rstrip()
+    return f"- {code}: not valid. {row.get('message', '')}".rstrip()
+
+
+def render_validation_reply(rows: List[Dict[str, Any]], full_listing_rows: int = FULL_LISTING_ROWS) -> str:
+    """
+    The user-facing answer for the rows of hsn_code_validation_tool.
+
+    Up to `full_listing_rows` codes are all listed; for larger batches only the
+    codes that are not valid are, after the count line.
+    """
+    if len(rows) == 1 and rows[0].get("reason_code") == "DATASTORE_UNAVAILABLE":
+        return rows[0].get("message", "The HSN master data is not available right now.")
+    valid = sum(1 for row in rows if row.get("is_valid"))
+    noun = "code" if len(rows) == 1 else "codes"
+    lines = [f"I checked {len(rows)} HSN {noun}: {valid} valid, {len(rows) - valid} not valid."]
+    if len(rows) <= full_listing_rows:
+        lines.extend(_describe_row(row) for row in rows)
+    else:
+        lines.extend(_describe_row(row) for row in rows if not row.get("is_valid"))
+    return "\n".join(lines)
+
+
+def _as_rows(result: Any) -> Optional[List[Dict[str, Any]]]:
+    """The rows in a hsn_code_validation_tool result (as ADK wraps it: {'result': [...]}), or None."""
+    rows = result_rows(result)
+    if rows is None or not all("input_hsn" in row for row in rows):
+        return None
+    return rows
+
+
+def format_validation_result(result: Any) -> Optional[str]:
+    """Formatter for adk_utils.tool_rendering: the reply for a hsn_code_validation_tool result, or None."""
+    rows = _as_rows(result)
+    return render_validation_reply(rows) if rows is not None else None
+
+
+def _validation_rows(content: types.Content) -> Optional[List[Dict[str, Any]]]:
+    """The rows of a hsn_code_validation_tool response content, or None."""
+    parts = content.parts or ()
+    if len(parts) != 1 or parts[0].function_response is None:
+        return None
+    response = parts[0].function_response
+    if response.name != VALIDATION_TOOL_NAME:
+        return None
+    return _as_rows(response.response)
+
+
+def _single_validation_call(content: types.Content) -> bool:
+    parts = content.parts or ()
+    return (content.role == "model" and len(parts) == 1 and parts[0].function_call is not None
+            and parts[0].function_call.name == VALIDATION_TOOL_NAME)
+
+
+# --- Part 3: The Callback ---
+
+class HsnFastPath:
+    """
+    before_model_callback that answers code-only messages without the model
+    (see the module docstring).
+
+    Args:
+        enabled (bool): When False, every request goes to the model.
+    """
+
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self.__name__ = "hsn_fast_path"  # span name when wrapped with adk_utils.telemetry.traced
+
+    def _record(self, result: str) -> None:
+        add_to_counter(REQUESTS_COUNTER, 1, {"hsn.fast_path.result": result},
+                       description="HSN agent model calls by fast-path result.")
+        set_span_attributes(fast_path=result)
+
+    def __call__(self, callback_context: CallbackContext, llm_request: LlmRequest) -> Optional[LlmResponse]:
+        if not self.enabled:
+            return None
+        contents = llm_request.contents
+        start = _latest_user_message(contents)
+        text = _message_text(contents[start]) if start >= 0 else None
+        codes = extract_codes(text) if text else None
+        if codes is None:
+            self._record("fallback")
+            return None
+
+        turn = contents[start + 1:]
+        if not turn:
+            # First call of the turn: call the tool ourselves.
+            self._record("tool_call")
+            return LlmResponse(content=types.Content(role="model", parts=[
+                types.Part(function_call=types.FunctionCall(name=VALIDATION_TOOL_NAME, args={"hsn_inputs": codes}))
+            ]))
+
+        if len(turn) == 2 and _single_validation_call(turn[0]):
+            rows = _validation_rows(turn[1])
+            if rows is not None:
+                self._record("rendered")
+                return LlmResponse(content=types.Content(role="model", parts=[
+                    types.Part(text=render_validation_reply(rows))
+                ]))
+        self._record("fallback")
+        return None
@@ -0,0 +1,197 @@
+from typing import Any, Dict, Iterable, List, Mapping, Optional
+
+import numpy as np
+import pandas as pd
+
+from .hsn_index import HsnPrefixIndex
+
+# --- Part 1: Reason Codes ---
+#
+# Bulk results are columnar: each row's outcome is a small integer indexing
+# REASON_CODES, so a 500k-row batch is a handful of NumPy arrays rather than
+# 500k dictionaries.
+
+REASON_VALID = 0
+REASON_INVALID_ITEM_TYPE = 1
+REASON_INVALID_FORMAT = 2
+REASON_NOT_FOUND = 3
+
+REASON_CODES = ("VALID", "INVALID_ITEM_TYPE", "INVALID_FORMAT", "NOT_FOUND")
+
+# The same messages validate_hsn_codes() uses, for the list-of-dicts adapter.
+DEFAULT_MESSAGES: Dict[str, str] = {
+    "VALID": "HSN code is valid.",
+    "INVALID_ITEM_TYPE": "Error: All items in the list must be strings.",
+    "INVALID_FORMAT": "Invalid format. HSN code must be 2, 4, 6, or 8 digits.",
+    "NOT_FOUND": "HSN code not found in the master data.",
+}
+
+
+class HsnCodeTable:
+    """
+    Sorted array form of the HSN master data for vectorized lookups.
+
+    `codes` is a sorted NumPy string array and `descriptions` holds the
+    description for `codes[i]` at index i.
+    """
+
+    def __init__(self, hsn_map: Mapping[str, str]):
+        codes = sorted(hsn_map)
+        self.codes = np.array(codes, dtype=str)
+        self.descriptions = np.array([hsn_map[code] for code in codes], dtype=object)
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+
+class BulkValidationResult:
+    """
+    Columnar result of validate_hsn_codes_bulk().
+
+    Attributes:
+        input_hsn (np.ndarray): The inputs, as given.
+        is_valid (np.ndarray): bool, True where the code exists in the master data.
+        reason (np.ndarray): int8 index into REASON_CODES for each row.
+        description_index (np.ndarray): int32 index into the table's descriptions,
+                                        or -1 where the code is not valid.
+    """
+
+    def __init__(self, input_hsn: np.ndarray, reason: np.ndarray, description_index: np.ndarray,
+                 table: HsnCodeTable):
+        self.input_hsn = input_hsn
+        self.reason = reason
+        self.is_valid = reason == REASON_VALID
+        self.description_index = description_index
+        self.table = table
+
+    def __len__(self) -> int:
+        return len(self.reason)
+
+    @property
+    def reason_code(self) -> np.ndarray:
+        """The reason codes as strings (e.g. 'NOT_FOUND'), one per row."""
+        return np.asarray(REASON_CODES, dtype=object)[self.reason]
+
+    @property
+    def description(self) -> np.ndarray:
+        """The description of each valid row, None elsewhere."""
+        out = np.full(len(self), None, dtype=object)
+        valid = self.description_index >= 0
+        out[valid] = self.table.descriptions[self.description_index[valid]]
+        return out
+
+    def counts(self) -> Dict[str, int]:
+        """Number of rows per reason code."""
+        counts = np.bincount(self.reason, minlength=len(REASON_CODES))
+        return {name: int(count) for name, count in zip(REASON_CODES, counts)}
+
+    def to_frame(self) -> pd.DataFrame:
+        """Returns the result as a DataFrame with one column per field."""
+        return pd.DataFrame({
+            "input_hsn": self.input_hsn,
+            "is_valid": self.is_valid,
+            "reason_code": self.reason_code,
+            "description": self.description,
+        })
+
+    def to_records(
+        self,
+        messages: Optional[Dict[str, str]] = None,
+        prefix_index: Optional[HsnPrefixIndex] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Converts the columnar result to the list-of-dicts format of validate_hsn_codes().
+
+        Args:
+            messages (Optional[Dict[str, str]]): Message text per reason code.
+                                                 Defaults to DEFAULT_MESSAGES.
+            prefix_index (Optional[HsnPrefixIndex]): If given, NOT_FOUND rows
+                                                     include their nearest ancestor.
+
+        Returns:
+            List[Dict[str, Any]]: One result dictionary per input code.
+        """
+        messages = messages or DEFAULT_MESSAGES
+        descriptions = self.table.descriptions
+        records = []
+        for code, reason, desc_idx in zip(self.input_hsn.tolist(), self.reason.tolist(),
+                                          self.description_index.tolist()):
+            if reason == REASON_VALID:
+                records.append({"input_hsn": code, "is_valid": True,
+                                "description": descriptions[desc_idx], "message": messages["VALID"]})
+                continue
+
+            reason_code = REASON_CODES[reason]
+            record = {
+                "input_hsn": code if reason != REASON_INVALID_ITEM_TYPE else str(code),
+                "is_valid": False,
+                "reason_code": reason_code,
+                "message": messages[reason_code],
+            }
+            if reason == REASON_NOT_FOUND and prefix_index is not None:
+                record["nearest_ancestor"] = prefix_index.nearest_ancestor(code.strip())
+            records.append(record)
+        return records
+
+
+# --- Part 2: The Bulk Validation Function ---
+
+def validate_hsn_codes_bulk(hsn_inputs: Iterable[Any], table: HsnCodeTable) -> BulkValidationResult:
+    """
+    Validates a large batch of HSN codes with vectorized NumPy/pandas operations.
+
+    Applies the same rules as validate_hsn_codes(): items must be strings,
+    stripped codes must be 2, 4, 6 or 8 digits, and must exist in the master
+    data. Each distinct code is checked only once; lookups are a binary
+    search against the table's sorted code array.
+
+    Args:
+        hsn_inputs (Iterable[Any]): The codes to validate, e.g. a list, NumPy
+                                    array or a pandas column.
+        table (HsnCodeTable): The master data in sorted array form.
+
+    Returns:
+        BulkValidationResult: Columnar results in the same order as the input.
+    """
+    inputs = pd.Series(hsn_inputs, dtype=object) if not isinstance(hsn_inputs, pd.Series) else hsn_inputs.astype(object)
+
+    # --- Dedup ---
+    # Hash the raw inputs first so every later step runs once per distinct value;
+    # `inverse` maps each row back to its distinct value (-1 for None/NaN).
+    try:
+        inverse, uniques = pd.factorize(inputs)
+    except TypeError:
+        # Unhashable items (e.g. a nested list) are not strings either; factorize them as missing.
+        inverse, uniques = pd.factorize(inputs.where(inputs.map(lambda value: isinstance(value, str)), None))
+    uniques = pd.Series(uniques, dtype=object)
+
+    # --- Normalization ---
+    # .str methods yield NaN for anything that is not a string.
+    stripped = uniques.str.strip()
+    is_str = stripped.notna().to_numpy()
+    stripped = stripped.where(is_str, "")
+
+    # --- Format Validation ---
+    format_ok = (stripped.str.isdigit() & stripped.str.len().isin((2, 4, 6, 8))).to_numpy(dtype=bool)
+
+    # --- Existence Validation ---
+    unique_reason = np.where(format_ok, REASON_NOT_FOUND, REASON_INVALID_FORMAT).astype(np.int8)
+    unique_reason[~is_str] = REASON_INVALID_ITEM_TYPE
+    unique_desc = np.full(len(uniques), -1, dtype=np.int32)
+    if format_ok.any() and len(table):
+        candidates = np.array(stripped[format_ok].tolist(), dtype=str)
+        positions = np.searchsorted(table.codes, candidates)
+        positions = np.minimum(positions, len(table.codes) - 1)
+        found = table.codes[positions] == candidates
+
+        candidate_rows = np.flatnonzero(format_ok)
+        unique_reason[candidate_rows[found]] = REASON_VALID
+        unique_desc[candidate_rows[found]] = positions[found]
+
+    # Append a slot for inverse == -1 (missing values), which are not strings.
+    unique_reason = np.append(unique_reason, np.int8(REASON_INVALID_ITEM_TYPE))
+    unique_desc = np.append(unique_desc, np.int32(-1))
+    reason = unique_reason[inverse]
+    description_index = unique_desc[inverse]
+
+    return BulkValidationResult(inputs.to_numpy(), reason, description_index, table)
@@ -0,0 +1,426 @@
+"""
+Streaming validation of invoice files against the HSN master data.
+
+Reads a CSV or XLSX invoice dump in fixed-size chunks, validates the HSN
+column of each chunk, and appends the results to a JSONL or CSV file as it
+goes, so memory stays flat no matter how large the input is. Progress is
+checkpointed after every chunk; rerun with --resume to continue an
+interrupted job.
+
+Usage (from the repository root):
+    python -m settyl.hsn_cli invoices.csv -o results.jsonl --column HSNCode
+    python -m settyl.hsn_cli invoices.xlsx -o results.csv --workers 4 --resume
+"""
+
+import argparse
+import csv
+import io
+import json
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Deque, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from .hsn_bulk import REASON_CODES, HsnCodeTable, validate_hsn_codes_bulk
+from .hsn_validator import load_hsn_data
+
+DEFAULT_MASTER_PATH = os.path.join(os.path.dirname(__file__), "HSN_SAC.xlsx")
+OUTPUT_FIELDS = ["row", "input_hsn", "is_valid", "reason_code", "description"]
+
+# A quoted CSV field may span lines, but no more than this many.
+MAX_RECORD_LINES = 100
+# Reported for a CSV line whose quotes never balance; it has no readable HSN cell.
+MALFORMED_ROW = "MALFORMED_ROW"
+
+# A chunk is (index of its first data row, the HSN cells, byte offset just past
+# its last row). The offset is None for inputs that cannot be seeked (XLSX).
+Chunk = Tuple[int, List[Any], Optional[int]]
+
+# Stands in for the HSN cell of a malformed CSV row. The validator sees a
+# non-string; run_validation() reports the row as MALFORMED_ROW.
+_MALFORMED = object()
+
+
+# --- Part 1: Streaming Readers ---
+
+def _iter_csv_records(
+    f, encoding: str, max_record_lines: int = MAX_RECORD_LINES
+) -> Iterator[Tuple[Optional[List[str]], int]]:
+    """
+    Yields (fields, offset after the record) for each CSV record from a binary file.
+
+    Physical lines are joined until their quotes balance, so quoted fields
+    containing newlines are read as one record. If the quotes are still
+    unbalanced after `max_record_lines` lines (or at the end of the file), the
+    first line is yielded on its own as a malformed record (fields None) and
+    reading resumes from the line after it, so one stray quote cannot swallow
+    the rest of the file.
+    """
+    lines = iter(f)
+    replay: Deque[bytes] = deque()
+    pending: List[bytes] = []
+    quotes = 0
+    offset = f.tell()
+    while True:
+        line = replay.popleft() if replay else next(lines, None)
+        if line is not None:
+            pending.append(line)
+            quotes += line.count(b'"')
+            if not quotes % 2:
+                record = b"".join(pending)
+                pending, quotes = [], 0
+                offset += len(record)
+                if record.strip():
+                    yield next(csv.reader(io.StringIO(record.decode(encoding)))), offset
+                continue
+            if len(pending) < max_record_lines:
+                continue
+        if not pending:
+            break
+        # The quotes never balanced: report the first line, then reread the rest.
+        offset += len(pending[0])
+        replay.extendleft(reversed(pending[1:]))
+        pending, quotes = [], 0
+        yield None, offset
+
+
+def iter_csv_chunks(
+    path: str, column: str, chunk_size: int, start_row: int = 0,
+    start_offset: Optional[int] = None, encoding: str = "utf-8-sig",
+) -> Iterator[Chunk]:
+    """
+    Streams the HSN column of a CSV file in chunks.
+
+    Args:
+        path (str): The CSV file.
+        column (str): Header name of the HSN code column.
+        chunk_size (int): Rows per chunk.
+        start_row (int): Index of the first data row to return (for resuming).
+        start_offset (Optional[int]): Byte offset of `start_row`, if known. When
+                                      given, the reader seeks straight to it.
+        encoding (str): Text encoding of the file.
+
+    Yields:
+        Chunk: (first row index, HSN cells, byte offset after the chunk).
+    """
+    with open(path, "rb", buffering=1 << 20) as f:
+        header = next(csv.reader([f.readline().decode(encoding)]), [])
+        if column not in header:
+            raise ValueError(f"Column '{column}' not found in {path}. Available columns: {header}")
+        column_index = header.index(column)
+
+        row = 0
+        if start_offset is not None:
+            f.seek(start_offset)
+            row = start_row
+
+        codes: List[Any] = []
+        first_row = max(row, start_row)
+        for fields, offset in _iter_csv_records(f, encoding):
+            if row >= start_row:
+                if fields is None:
+                    print(f"--- WARNING: Row {row} has unbalanced quotes; reporting it as {MALFORMED_ROW}. ---",
+                          file=sys.stderr)
+                    codes.append(_MALFORMED)
+                else:
+                    codes.append(fields[column_index] if column_index < len(fields) else None)
+                if len(codes) == chunk_size:
+                    yield first_row, codes, offset
+                    first_row, codes = row + 1, []
+            row += 1
+        if codes:
+            yield first_row, codes, f.tell()
+
+
+def _cell_text(cell: Any) -> Any:
+    """
+    An HSN cell as text. A code typed into a numeric cell has already lost its
+    leading zeros (0101 is stored as 101), and how many there were cannot be
+    known, so the digits are passed on as they are and the validator reports
+    the code. Integral floats (1012100.0) are written without the '.0'.
+    """
+    if cell is None or isinstance(cell, str):
+        return cell
+    if isinstance(cell, float) and cell.is_integer():
+        return str(int(cell))
+    return str(cell)
+
+
+def iter_xlsx_chunks(path: str, column: str, chunk_size: int, start_row: int = 0) -> Iterator[Chunk]:
+    """
+    Streams the HSN column of an XLSX file in chunks using openpyxl's read-only mode.
+
+    Args:
+        path (str): The workbook; the first sheet is read.
+        column (str): Header name of the HSN code column.
+        chunk_size (int): Rows per chunk.
+        start_row (int): Index of the first data row to return (for resuming).
+
+    Yields:
+        Chunk: (first row index, HSN cells, None).
+    """
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(path, read_only=True, data_only=True)
+    try:
+        rows = workbook.worksheets[0].iter_rows(values_only=True)
+        header = [str(cell) if cell is not None else "" for cell in next(rows, ())]
+        if column not in header:
+            raise ValueError(f"Column '{column}' not found in {path}. Available columns: {header}")
+        column_index = header.index(column)
+
+        codes: List[Any] = []
+        first_row = start_row
+        for row, values in enumerate(rows):
+            if row < start_row:
+                continue
+            cell = values[column_index] if column_index < len(values) else None
+            codes.append(_cell_text(cell))
+            if len(codes) == chunk_size:
+                yield first_row, codes, None
+                first_row, codes = row + 1, []
+        if codes:
+            yield first_row, codes, None
+    finally:
+        workbook.close()
+
+
+# --- Part 2: Validation Workers ---
+
+_worker_table: Optional[HsnCodeTable] = None
+
+
+def _init_worker(master_path: str) -> None:
+    """Loads the master data once per worker process (from the snapshot when fresh)."""
+    global _worker_table
+    _worker_table = HsnCodeTable(load_hsn_data(master_path))
+
+
+def _validate_chunk(codes: List[Any]) -> Tuple[bytes, bytes]:
+    """Validates one chunk and returns its reason and description-index arrays as raw bytes."""
+    result = validate_hsn_codes_bulk(codes, _worker_table)
+    return result.reason.tobytes(), result.description_index.tobytes()
+
+
+# --- Part 3: Output and Checkpoints ---
+
+class ResultWriter:
+    """Appends validation results to a JSONL or CSV file."""
+
+    def __init__(self, path: str, fmt: str, resume_size: Optional[int]):
+        self.path = path
+        self.fmt = fmt
+        if resume_size is not None and os.path.exists(path):
+            # Drop anything written after the last checkpoint, so resumed rows are not duplicated.
+            with open(path, "r+b") as f:
+                f.truncate(resume_size)
+            self._file = open(path, "a", newline="", encoding="utf-8")
+        else:
+            self._file = open(path, "w", newline="", encoding="utf-8")
+        self._csv = csv.writer(self._file) if fmt == "csv" else None
+        if self._csv is not None and self._file.tell() == 0:
+            self._csv.writerow(OUTPUT_FIELDS)
+
+    def write_rows(self, rows: List[Dict[str, Any]]) -> int:
+        """Writes rows, flushes them to disk and returns the new file size."""
+        if self._csv is not None:
+            self._csv.writerows([[row[field] for field in OUTPUT_FIELDS] for row in rows])
+        else:
+            self._file.writelines(json.dumps(row, ensure_ascii=False) + "\n" for row in rows)
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        return self._file.tell()
+
+    def close(self) -> None:
+        self._file.close()
+
+
+def _source_fingerprint(path: str) -> Dict[str, Any]:
+    stat = os.stat(path)
+    return {"input": os.path.abspath(path), "input_size": stat.st_size, "input_mtime_ns": stat.st_mtime_ns}
+
+
+def load_checkpoint(checkpoint_path: str, input_path: str) -> Optional[Dict[str, Any]]:
+    """
+    Reads a checkpoint if it belongs to the given input file.
+
+    Returns:
+        Optional[Dict[str, Any]]: The checkpoint, or None if there is none or the
+                                  input has changed since it was written.
+    """
+    try:
+        with open(checkpoint_path, encoding="utf-8") as f:
+            checkpoint = json.load(f)
+    except (OSError, ValueError):
+        return None
+    fingerprint = _source_fingerprint(input_path)
+    if any(checkpoint.get(key) != value for key, value in fingerprint.items()):
+        print("--- Checkpoint does not match the input file. Starting from the beginning. ---", file=sys.stderr)
+        return None
+    return checkpoint
+
+
+def save_checkpoint(checkpoint_path: str, checkpoint: Dict[str, Any]) -> None:
+    """Writes a checkpoint atomically."""
+    tmp_path = checkpoint_path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(checkpoint, f)
+    os.replace(tmp_path, checkpoint_path)
+
+
+# --- Part 4: The Pipeline ---
+
+def run_validation(
+    input_path: str,
+    output_path: str,
+    column: str = "HSNCode",
+    master_path: str = DEFAULT_MASTER_PATH,
+    chunk_size: int = 50_000,
+    workers: int = 1,
+    output_format: Optional[str] = None,
+    checkpoint_path: Optional[str] = None,
+    resume: bool = False,
+    progress: bool = True,
+) -> Dict[str, Any]:
+    """
+    Validates every HSN code in an invoice file and streams the results to disk.
+
+    Args:
+        input_path (str): A .csv or .xlsx invoice file.
+        output_path (str): Where to write the results.
+        column (str): Header name of the HSN code column.
+        master_path (str): The HSN master workbook.
+        chunk_size (int): Rows read and validated at a time.
+        workers (int): Number of worker processes. 1 validates in-process.
+        output_format (Optional[str]): 'jsonl' or 'csv'. Inferred from output_path if omitted.
+        checkpoint_path (Optional[str]): Checkpoint file. Defaults to <output>.checkpoint.json.
+        resume (bool): Continue from the checkpoint instead of starting over.
+        progress (bool): Print progress to stderr after every chunk.
+
+    Returns:
+        Dict[str, Any]: Run statistics (rows, counts per reason code, elapsed time, throughput).
+    """
+    output_format = output_format or ("csv" if output_path.lower().endswith(".csv") else "jsonl")
+    checkpoint_path = checkpoint_path or output_path + ".checkpoint.json"
+    is_xlsx = input_path.lower().endswith((".xlsx", ".xlsm"))
+
+    checkpoint = load_checkpoint(checkpoint_path, input_path) if resume else None
+    start_row = checkpoint["rows_done"] if checkpoint else 0
+    counts = checkpoint["counts"] if checkpoint else {name: 0 for name in REASON_CODES + (MALFORMED_ROW,)}
+    writer = ResultWriter(output_path, output_format, checkpoint["output_size"] if checkpoint else None)
+    if checkpoint:
+        print(f"--- Resuming from row {start_row}. ---", file=sys.stderr)
+
+    if is_xlsx:
+        chunks = iter_xlsx_chunks(input_path, column, chunk_size, start_row)
+    else:
+        chunks = iter_csv_chunks(input_path, column, chunk_size, start_row,
+                                 checkpoint.get("byte_offset") if checkpoint else None)
+
+    table = HsnCodeTable(load_hsn_data(master_path))
+    if not len(table):
+        raise RuntimeError(f"HSN master data could not be loaded from '{master_path}'.")
+
+    input_size = os.path.getsize(input_path)
+    rows_done = start_row
+    rows_this_run = 0
+    start = time.perf_counter()
+
+    def handle(chunk: Chunk, reason_bytes: bytes, desc_bytes: bytes) -> None:
+        nonlocal rows_done, rows_this_run
+        first_row, codes, end_offset = chunk
+        reason = np.frombuffer(reason_bytes, dtype=np.int8)
+        desc_index = np.frombuffer(desc_bytes, dtype=np.int32)
+        rows = []
+        for i, (code, r, d) in enumerate(zip(codes, reason.tolist(), desc_index.tolist())):
+            reason_code = MALFORMED_ROW if code is _MALFORMED else REASON_CODES[r]
+            rows.append({
+                "row": first_row + i,
+                "input_hsn": None if code is _MALFORMED else code,
+                "is_valid": r == 0,
+                "reason_code": reason_code,
+                "description": table.descriptions[d] if d >= 0 else None,
+            })
+            counts[reason_code] = counts.get(reason_code, 0) + 1
+        output_size = writer.write_rows(rows)
+
+        rows_done = first_row + len(codes)
+        rows_this_run += len(codes)
+        save_checkpoint(checkpoint_path, {
+            **_source_fingerprint(input_path),
+            "rows_done": rows_done,
+            "byte_offset": end_offset,
+            "output": os.path.abspath(output_path),
+            "output_size": output_size,
+            "counts": counts,
+        })
+
+        if progress:
+            elapsed = time.perf_counter() - start
+            done = f" ({end_offset / input_size:.1%})" if end_offset is not None and input_size else ""
+            print(f"--- {rows_done} rows{done} | {rows_this_run / elapsed:,.0f} rows/s | "
+                  f"valid {counts['VALID']} | invalid {rows_done - counts['VALID']} ---", file=sys.stderr)
+
+    try:
+        if workers <= 1:
+            for chunk in chunks:
+                result = validate_hsn_codes_bulk(chunk[1], table)
+                handle(chunk, result.reason.tobytes(), result.description_index.tobytes())
+        else:
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                     initargs=(master_path,)) as pool:
+                # Keep a bounded number of chunks in flight and write them in input
+                # order, so memory stays flat and checkpoints stay contiguous.
+                in_flight = []
+                for chunk in chunks:
+                    in_flight.append((chunk, pool.submit(_validate_chunk, chunk[1])))
+                    if len(in_flight) >= workers * 2:
+                        done_chunk, future = in_flight.pop(0)
+                        handle(done_chunk, *future.result())
+                for done_chunk, future in in_flight:
+                    handle(done_chunk, *future.result())
+    finally:
+        writer.close()
+
+    elapsed = time.perf_counter() - start
+    return {
+        "rows": rows_done,
+        "rows_this_run": rows_this_run,
+        "counts": counts,
+        "elapsed_s": round(elapsed, 3),
+        "rows_per_s": round(rows_this_run / elapsed, 1) if elapsed else None,
+        "output": output_path,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Validate the HSN codes in a CSV/XLSX invoice file.")
+    parser.add_argument("input", help="Invoice file (.csv or .xlsx).")
+    parser.add_argument("--output", "-o", required=True, help="Results file (.jsonl or .csv).")
+    parser.add_argument("--column", default="HSNCode", help="Name of the HSN code column (default: HSNCode).")
+    parser.add_argument("--master", default=DEFAULT_MASTER_PATH, help="HSN master workbook.")
+    parser.add_argument("--chunk-size", type=int, default=50_000, help="Rows per chunk (default: 50000).")
+    parser.add_argument("--workers", type=int, default=1, help="Worker processes (default: 1, in-process).")
+    parser.add_argument("--format", choices=["jsonl", "csv"], default=None, help="Output format (default: from extension).")
+    parser.add_argument("--checkpoint", default=None, help="Checkpoint file (default: <output>.checkpoint.json).")
+    parser.add_argument("--resume", action="store_true", help="Continue from the last checkpoint.")
+    parser.add_argument("--quiet", action="store_true", help="Do not print per-chunk progress.")
+    cli_args = parser.parse_args()
+
+    stats = run_validation(
+        cli_args.input,
+        cli_args.output,
+        column=cli_args.column,
+        master_path=cli_args.master,
+        chunk_size=cli_args.chunk_size,
+        workers=cli_args.workers,
+        output_format=cli_args.format,
+        checkpoint_path=cli_args.checkpoint,
+        resume=cli_args.resume,
+        progress=not cli_args.quiet,
+    )
+    print(json.dumps(stats))
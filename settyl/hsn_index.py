@@ -0,0 +1,156 @@
+from array import array
+from bisect import bisect_left
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Tuple
+
+from .hsn_snapshot import CompactHsnMap, pack_code, unpack_code
+
+# --- Part 1: The HSN Hierarchy ---
+#
+# HSN codes are hierarchical: a 2-digit chapter contains 4-digit headings, which
+# contain 6-digit subheadings, which contain 8-digit tariff lines. Not every
+# level is present in the master data (e.g. 0101 -> 01011010 has no 6-digit
+# subheading in between), so a code's parent is its longest existing prefix.
+
+HSN_LEVELS: Tuple[int, ...] = (2, 4, 6, 8)
+HSN_LEVEL_NAMES: Dict[int, str] = {2: "chapter", 4: "heading", 6: "subheading", 8: "tariff_line"}
+
+
+class HsnPrefixIndex:
+    """
+    Prefix index over the 2/4/6/8-digit HSN hierarchy.
+
+    Codes are held as the snapshot's packed integer keys (see
+    hsn_snapshot.pack_code), which sort exactly like the code strings, so any
+    prefix maps to a contiguous key range found by binary search. Over a
+    CompactHsnMap the keys are the snapshot's own memory-mapped array, so the
+    index adds almost nothing to the process heap; over a dict they are one
+    4-byte array. Direct children are found by walking a range and jumping
+    over each child's subtree, one binary search per child.
+
+    The snapshot also holds a few malformed codes of odd length (e.g. '30559');
+    their positions are kept in a short list and skipped.
+    """
+
+    def __init__(self, hsn_map: Mapping[str, str]):
+        self._map = hsn_map
+        # Only well-formed numeric codes take part in the hierarchy.
+        if isinstance(hsn_map, CompactHsnMap):
+            keys: Sequence[int] = hsn_map.packed_keys()
+        else:
+            keys = array("I", sorted(
+                pack_code(code) for code in hsn_map
+                if code.isascii() and code.isdigit() and len(code) in HSN_LEVELS
+            ))
+        self._keys = keys
+        self._skipped: List[int] = [i for i, key in enumerate(keys) if key & 15 not in HSN_LEVELS]
+
+    def __len__(self) -> int:
+        return len(self._keys) - len(self._skipped)
+
+    def _range(self, prefix: str, lo: int = 0) -> Tuple[int, int]:
+        """Positions [start, end) of the keys of the codes starting with `prefix` (the prefix itself included)."""
+        padded = int(prefix.ljust(8, "0") or 0)
+        start = bisect_left(self._keys, padded * 16 + len(prefix), lo)
+        end = bisect_left(self._keys, (padded + 10 ** (8 - len(prefix))) * 16, start)
+        return start, end
+
+    def _direct_children(self, prefix: str) -> List[str]:
+        """
+        The codes below `prefix` whose longest existing proper prefix is `prefix`'s
+        nearest existing ancestor (the prefix itself if it is a code).
+        """
+        start, end = self._range(prefix)
+        if start < end and len(prefix) == self._keys[start] & 15:
+            start += 1  # the prefix itself
+        children = []
+        while start < end:
+            if self._keys[start] & 15 not in HSN_LEVELS:
+                start += 1
+                continue
+            # The first code of a range is a child: anything between it and the
+            # prefix would be a shorter prefix of it, which sorts before it.
+            child = unpack_code(self._keys[start])
+            children.append(child)
+            start = self._range(child, start)[1]
+        return children
+
+    # --- Part 2: Lookups ---
+
+    def nearest_ancestor(self, code: str) -> Optional[Dict[str, str]]:
+        """
+        Finds the deepest existing code on the path from `code` to its chapter.
+
+        The code itself counts as its own nearest ancestor if it exists, so one
+        walk of at most four lookups answers both "does it exist" and "what is
+        the closest match".
+
+        Args:
+            code (str): A cleaned, numeric HSN code of 2, 4, 6 or 8 digits.
+
+        Returns:
+            Optional[Dict[str, str]]: The ancestor's 'hsn', 'level' and
+                                      'description', or None if not even the
+                                      chapter exists.
+        """
+        for level in reversed(HSN_LEVELS):
+            if level > len(code):
+                continue
+            prefix = code[:level]
+            description = self._map.get(prefix)
+            if description is not None:
+                return {"hsn": prefix, "level": HSN_LEVEL_NAMES[level], "description": description}
+        return None
+
+    def children(
+        self, prefix: str, direct_only: bool = True, offset: int = 0, limit: int = 50
+    ) -> Dict[str, Any]:
+        """
+        Lists the codes below a prefix, one page at a time.
+
+        Args:
+            prefix (str): The parent code, e.g. '8471'. An empty string lists the chapters.
+            direct_only (bool): If True, return only the next existing level below
+                                `prefix`; otherwise return every descendant.
+            offset (int): Index of the first item to return.
+            limit (int): Maximum number of items to return.
+
+        Returns:
+            Dict[str, Any]: The 'items' on this page (each with 'hsn' and
+                            'description'), the 'total' number of matches, and
+                            'next_offset' (None on the last page).
+        """
+        offset = max(offset, 0)
+        limit = max(limit, 0)
+
+        if prefix and not (prefix.isascii() and prefix.isdigit() and len(prefix) <= 8):
+            total, page = 0, []
+        elif direct_only:
+            # For a prefix that is not a code itself (e.g. '847100') these are the
+            # children of its nearest existing ancestor that start with it.
+            matches = self._direct_children(prefix)
+            total = len(matches)
+            page = matches[offset:offset + limit]
+        else:
+            start, end = self._range(prefix)
+            if start < end and len(prefix) == self._keys[start] & 15:
+                start += 1  # a prefix is not its own descendant
+            skipped = self._skipped[bisect_left(self._skipped, start):bisect_left(self._skipped, end)]
+            total = end - start - len(skipped)
+            position = start + offset
+            for skipped_position in skipped:
+                if skipped_position <= position:
+                    position += 1
+            page = []
+            while position < end and len(page) < limit:
+                key = self._keys[position]
+                if key & 15 in HSN_LEVELS:
+                    page.append(unpack_code(key))
+                position += 1
+
+        next_offset = offset + len(page)
+        return {
+            "prefix": prefix,
+            "items": [{"hsn": code, "description": self._map[code]} for code in page],
+            "total": total,
+            "next_offset": next_offset if next_offset < total else None,
+        }
@@ -0,0 +1,224 @@
+import json
+import os
+import threading
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+DEFAULT_POLICY_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "hsn_policy.json")
+
+# Used when the policy file cannot be read: the rule the guardrail has always applied.
+DEFAULT_POLICY: Dict[str, Any] = {"default": "allow", "deny": {"prefixes": ["99"]}}
+
+ALLOW = "allow"
+DENY = "deny"
+
+# Ranges are expanded into prefixes when the policy is compiled; refuse absurdly wide ones.
+MAX_RANGE_SIZE = 100_000
+
+
+class PolicyDecision(NamedTuple):
+    allowed: bool
+    rule: Optional[str]  # e.g. 'deny prefix 99'; None when the default applied
+
+
+# --- Part 1: The Compiled Policy ---
+
+class HsnCodePolicy:
+    """
+    Allow/deny rules for HSN codes, compiled into a prefix index.
+
+    Rules come in three kinds, each under 'allow' and 'deny':
+      - prefixes: '99' matches every code starting with 99.
+      - ranges:   ['2401', '2403'] matches codes starting with 2401, 2402 or 2403.
+                  Both bounds must have the same number of digits.
+      - codes:    '85444999' matches that exact code only.
+
+    When several rules match a code, the most specific one wins: an exact code
+    beats any prefix, and a longer prefix beats a shorter one. So a policy can
+    deny chapter 99 but allow heading 9954. At equal specificity deny wins.
+    Codes no rule matches get the policy's default action.
+
+    Every rule is stored in one dictionary keyed by prefix, so evaluating a
+    code is at most one lookup per prefix length, however many rules there are.
+    """
+
+    def __init__(self, config: Dict[str, Any]):
+        default = config.get("default", ALLOW)
+        if default not in (ALLOW, DENY):
+            raise ValueError(f"Policy default must be '{ALLOW}' or '{DENY}', got {default!r}.")
+        self.default_allowed = default == ALLOW
+
+        # prefix -> (allowed, rule description); exact codes live in their own dict.
+        self._prefixes: Dict[str, Tuple[bool, str]] = {}
+        self._codes: Dict[str, Tuple[bool, str]] = {}
+        # Deny rules are added last so they win ties.
+        for action in (ALLOW, DENY):
+            rules = config.get(action) or {}
+            allowed = action == ALLOW
+            for prefix in rules.get("prefixes", ()):
+                self._add(self._prefixes, _check_digits(prefix), allowed, f"{action} prefix {prefix}")
+            for bounds in rules.get("ranges", ()):
+                low, high = bounds
+                rule = f"{action} range {low}-{high}"
+                for prefix in _expand_range(_check_digits(low), _check_digits(high)):
+                    self._add(self._prefixes, prefix, allowed, rule)
+            for code in rules.get("codes", ()):
+                self._add(self._codes, _check_digits(code), allowed, f"{action} code {code}")
+
+        self._lengths = sorted({len(prefix) for prefix in self._prefixes}, reverse=True)
+
+    @staticmethod
+    def _add(table: Dict[str, Tuple[bool, str]], key: str, allowed: bool, rule: str) -> None:
+        existing = table.get(key)
+        if existing is not None and not existing[0] and allowed:
+            return  # deny already registered for the same key
+        table[key] = (allowed, rule)
+
+    def __len__(self) -> int:
+        return len(self._prefixes) + len(self._codes)
+
+    def evaluate(self, code: str) -> PolicyDecision:
+        """
+        Decides whether a code may be validated.
+
+        Args:
+            code (str): An HSN code. Surrounding whitespace is ignored.
+
+        Returns:
+            PolicyDecision: Whether the code is allowed, and the rule that decided it.
+        """
+        code = code.strip()
+        hit = self._codes.get(code)
+        if hit is None:
+            for length in self._lengths:
+                if length <= len(code):
+                    hit = self._prefixes.get(code[:length])
+                    if hit is not None:
+                        break
+        if hit is None:
+            return PolicyDecision(self.default_allowed, None)
+        return PolicyDecision(hit[0], hit[1])
+
+    def is_allowed(self, code: str) -> bool:
+        return self.evaluate(code).allowed
+
+    def partition(self, hsn_inputs: Iterable[Any]) -> Tuple[List[Any], List[Tuple[int, Any, str]]]:
+        """
+        Splits a batch into the codes the policy permits and those it blocks.
+
+        Items that are not strings are passed through as permitted, so the tool
+        reports them with its usual INVALID_ITEM_TYPE result.
+
+        Args:
+            hsn_inputs (Iterable[Any]): The codes from the tool call, in order.
+
+        Returns:
+            Tuple[List[Any], List[Tuple[int, Any, str]]]: The permitted codes in
+                their original order, and (position, code, rule) for each blocked code.
+        """
+        permitted: List[Any] = []
+        blocked: List[Tuple[int, Any, str]] = []
+        for position, code in enumerate(hsn_inputs):
+            if isinstance(code, str):
+                decision = self.evaluate(code)
+                if not decision.allowed:
+                    blocked.append((position, code, decision.rule or "default deny"))
+                    continue
+            permitted.append(code)
+        return permitted, blocked
+
+
+def _check_digits(value: str) -> str:
+    value = str(value).strip()
+    if not value.isdigit():
+        raise ValueError(f"Policy rules must be digit strings, got {value!r}.")
+    return value
+
+
+def _expand_range(low: str, high: str) -> List[str]:
+    if len(low) != len(high):
+        raise ValueError(f"Range bounds must have the same number of digits: {low!r}-{high!r}.")
+    if int(high) < int(low):
+        raise ValueError(f"Range is empty: {low!r}-{high!r}.")
+    if int(high) - int(low) + 1 > MAX_RANGE_SIZE:
+        raise ValueError(f"Range {low!r}-{high!r} is too wide; use shorter bounds.")
+    return [str(value).zfill(len(low)) for value in range(int(low), int(high) + 1)]
+
+
+# --- Part 2: Merging Results ---
+
+def merge_blocked_rows(results: List[Dict[str, Any]], blocked_rows: List[Tuple[int, Dict[str, Any]]],
+                       total: int) -> List[Dict[str, Any]]:
+    """
+    Puts the rows for blocked codes back among the tool's results, in input order.
+
+    Args:
+        results (List[Dict[str, Any]]): The tool's results for the permitted codes, in order.
+        blocked_rows (List[Tuple[int, Dict[str, Any]]]): (original position, row) per blocked code.
+        total (int): Number of codes in the original call.
+
+    Returns:
+        List[Dict[str, Any]]: One row per original code. If the tool did not
+                              return one row per permitted code (e.g. the data
+                              store was unavailable), its rows come first and the
+                              blocked rows are appended.
+    """
+    if len(results) + len(blocked_rows) != total:
+        return list(results) + [row for _, row in blocked_rows]
+
+    merged: List[Dict[str, Any]] = []
+    result_iter = iter(results)
+    blocked_iter = iter(blocked_rows)
+    next_blocked = next(blocked_iter, None)
+    for position in range(total):
+        if next_blocked is not None and next_blocked[0] == position:
+            merged.append(next_blocked[1])
+            next_blocked = next(blocked_iter, None)
+        else:
+            merged.append(next(result_iter))
+    return merged
+
+
+# --- Part 3: Loading the Policy ---
+
+_cache_lock = threading.Lock()
+_cache: Dict[str, Tuple[Optional[Tuple[int, int]], HsnCodePolicy]] = {}
+
+
+def get_hsn_policy(path: Optional[str] = None) -> HsnCodePolicy:
+    """
+    Returns the compiled policy from a JSON file, recompiling it only when the file changes.
+
+    If the file is missing or invalid, DEFAULT_POLICY (deny chapter 99) is used.
+
+    Args:
+        path (Optional[str]): The policy file. Defaults to the HSN_POLICY_FILE
+                              environment variable, then settyl/hsn_policy.json.
+
+    Returns:
+        HsnCodePolicy: The compiled policy.
+    """
+    path = path or os.getenv("HSN_POLICY_FILE") or DEFAULT_POLICY_PATH
+    key = os.path.abspath(path)
+    try:
+        stat = os.stat(path)
+        signature = (stat.st_size, stat.st_mtime_ns)
+    except OSError:
+        signature = None
+
+    cached = _cache.get(key)
+    if cached is not None and cached[0] == signature:
+        return cached[1]
+
+    with _cache_lock:
+        cached = _cache.get(key)
+        if cached is not None and cached[0] == signature:
+            return cached[1]
+        try:
+            with open(path, encoding="utf-8") as f:
+                policy = HsnCodePolicy(json.load(f))
+        except (OSError, ValueError, TypeError) as e:
+            print(f"--- WARNING: Could not load the HSN policy from '{path}' ({e}). Using the built-in policy. ---")
+            policy = HsnCodePolicy(DEFAULT_POLICY)
+        _cache[key] = (signature, policy)
+        print(f"--- Compiled HSN policy: {len(policy)} rules from '{path}' ---")
+        return policy
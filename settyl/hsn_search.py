@@ -0,0 +1,166 @@
+import re
+from typing import Any, Dict, List, Mapping, Tuple
+
+import numpy as np
+
+from .hsn_index import HSN_LEVELS
+
+# --- Part 1: Text Analysis ---
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+STOPWORDS = frozenset(
+    "a an and are as at be by for from in into is it its not of on or other others "
+    "than that the their thereof this those to whether with without".split()
+)
+
+
+def stem(token: str) -> str:
+    """
+    Light English suffix stripping, enough to match 'wires' with 'wire' or
+    'enamelled' with 'enamel'. Numbers and short words are left alone.
+    """
+    if token.isdigit() or len(token) <= 3:
+        return token
+
+    # Plurals
+    if token.endswith("ies") and len(token) > 4:
+        token = token[:-3] + "y"
+    elif token.endswith(("sses", "xes", "ches", "shes", "zes")):
+        token = token[:-2]
+    elif token.endswith("s") and not token.endswith(("ss", "us", "is")):
+        token = token[:-1]
+
+    # Verb forms, undoubling a final consonant ('enamelled' -> 'enamell' -> 'enamel')
+    for suffix in ("ing", "ed"):
+        if token.endswith(suffix) and len(token) - len(suffix) >= 3:
+            token = token[:-len(suffix)]
+            if len(token) >= 4 and token[-1] == token[-2] and token[-1] != "s":
+                token = token[:-1]
+            break
+    return token
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercases, splits, drops stopwords and stems a piece of text."""
+    return [stem(token) for token in _TOKEN_RE.findall(text.lower()) if token not in STOPWORDS]
+
+
+# --- Part 2: The Inverted Index ---
+
+class HsnSearchIndex:
+    """
+    BM25-ranked inverted index over the HSN descriptions.
+
+    Many tariff-line descriptions only make sense together with their parents
+    (e.g. 854411 is just 'OF COPPER:' under 8544 'INSULATED ... WINDING WIRE'),
+    so each code is indexed with its own description plus the descriptions of
+    its existing ancestors, the latter at a reduced weight.
+
+    Postings are stored CSR-style: one NumPy array of document ids and one of
+    precomputed BM25 weights, with each term owning a contiguous slice. A query
+    adds its terms' slices into a score array and selects the top k among the
+    documents it touched, so even terms found in thousands of descriptions
+    ('parts', 'iron') cost vectorized work rather than a Python loop.
+    """
+
+    def __init__(self, hsn_map: Mapping[str, str], k1: float = 1.2, b: float = 0.75,
+                 ancestor_weight: float = 0.5):
+        self._codes: List[str] = []
+        self._descriptions: List[str] = []
+
+        # Tokenize every description once; ancestors are shared by many codes.
+        tokens = {code: tokenize(description or "") for code, description in hsn_map.items()}
+
+        term_ids: Dict[str, int] = {}
+        posting_terms: List[int] = []
+        posting_docs: List[int] = []
+        posting_tfs: List[float] = []
+        for code, description in hsn_map.items():
+            if not code.isdigit():
+                continue
+            terms: Dict[str, float] = {}
+            for token in tokens[code]:
+                terms[token] = terms.get(token, 0.0) + 1.0
+            for level in HSN_LEVELS:
+                if level >= len(code):
+                    break
+                ancestor_tokens = tokens.get(code[:level])
+                if ancestor_tokens:
+                    for token in set(ancestor_tokens):
+                        terms[token] = terms.get(token, 0.0) + ancestor_weight
+            if not terms:
+                continue
+            doc_id = len(self._codes)
+            self._codes.append(code)
+            self._descriptions.append(description)
+            for token, tf in terms.items():
+                posting_terms.append(term_ids.setdefault(token, len(term_ids)))
+                posting_docs.append(doc_id)
+                posting_tfs.append(tf)
+
+        n_docs = len(self._codes)
+        terms_array = np.array(posting_terms, dtype=np.int32)
+        docs = np.array(posting_docs, dtype=np.int32)
+        tfs = np.array(posting_tfs, dtype=np.float64)
+
+        lengths = np.bincount(docs, weights=tfs, minlength=n_docs)
+        avg_length = lengths.mean() if n_docs else 1.0
+        document_frequency = np.bincount(terms_array, minlength=len(term_ids))
+        idf = np.log(1 + (n_docs - document_frequency + 0.5) / (document_frequency + 0.5))
+        norm = k1 * (1 - b + b * lengths / avg_length)
+        weights = idf[terms_array] * tfs * (k1 + 1) / (tfs + norm[docs])
+
+        # Group the postings by term (documents stay in id order within a term).
+        order = np.argsort(terms_array, kind="stable")
+        self._posting_docs = docs[order]
+        self._posting_weights = weights[order]
+        ends = np.cumsum(document_frequency)
+        self._term_slices: Dict[str, Tuple[int, int]] = {
+            token: (int(ends[term_id] - document_frequency[term_id]), int(ends[term_id]))
+            for token, term_id in term_ids.items()
+        }
+        # Ties go to the more specific (longer) code.
+        self._code_lengths = np.array([len(code) for code in self._codes], dtype=np.int8)
+
+    def __len__(self) -> int:
+        return len(self._codes)
+
+    def search(self, query: str, top_k: int = 10) -> List[Dict[str, Any]]:
+        """
+        Returns the codes whose descriptions best match a free-text query.
+
+        Args:
+            query (str): e.g. 'copper winding wire'.
+            top_k (int): Maximum number of results.
+
+        Returns:
+            List[Dict[str, Any]]: Up to top_k results, best first, each with
+                                  'hsn', 'description' and 'score'.
+        """
+        slices = [self._term_slices[token] for token in set(tokenize(query)) if token in self._term_slices]
+        if not slices or top_k <= 0:
+            return []
+
+        if len(slices) == 1:
+            start, end = slices[0]
+            candidates = self._posting_docs[start:end]
+            candidate_scores = self._posting_weights[start:end]
+        else:
+            scores = np.zeros(len(self._codes))
+            for start, end in slices:
+                # A document appears once per term, so plain fancy-index addition is exact.
+                scores[self._posting_docs[start:end]] += self._posting_weights[start:end]
+            candidates = np.flatnonzero(scores)
+            candidate_scores = scores[candidates]
+
+        if len(candidates) > top_k:
+            # Keep everything scoring at least the k-th best, so ties are broken below.
+            threshold = np.partition(candidate_scores, len(candidate_scores) - top_k)[-top_k]
+            keep = candidate_scores >= threshold
+            candidates, candidate_scores = candidates[keep], candidate_scores[keep]
+        order = np.lexsort((candidates, -self._code_lengths[candidates], -candidate_scores))[:top_k]
+        return [
+            {"hsn": self._codes[doc_id], "description": self._descriptions[doc_id], "score": round(score, 3)}
+            for doc_id, score in zip(candidates[order].tolist(), candidate_scores[order].tolist())
+        ]
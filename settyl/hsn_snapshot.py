@@ -0,0 +1,347 @@
+import hashlib
+import json
+import mmap
+import os
+import struct
+import sys
+from bisect import bisect_left
+from typing import Dict, Iterator, Mapping, Optional, Tuple
+
+# --- Part 1: Snapshot File Format ---
+#
+# A snapshot is a compiled, read-only copy of the HSN master workbook that can be
+# loaded without importing pandas or parsing Excel. All integers are little-endian.
+#
+#   header        : magic, format version, key count, source size, source mtime (ns),
+#                   SHA-256 of the source file, length of the extras blob
+#   keys          : count x uint32, sorted. A numeric code is packed as
+#                   int(code padded to 8 digits) * 16 + len(code), so '01' and
+#                   '0100' stay distinct and a code's parents sort before it.
+#   desc offsets  : (count + 1) x uint32, offsets into the description blob
+#   desc blob     : UTF-8 descriptions, in key order
+#   extras        : JSON object holding the few codes that are not purely numeric
+#                   (e.g. '2307 00'), which cannot be packed as integers
+#
+# The sections are 4-byte aligned, so the key and offset arrays can be used in
+# place from a memory map (see CompactHsnMap).
+
+SNAPSHOT_MAGIC = b"HSNSNAP2"
+SNAPSHOT_FORMAT_VERSION = 2
+SNAPSHOT_SUFFIX = ".hsnsnap"
+
+_HEADER = struct.Struct("<8sIIQq32sI4x")
+
+
+def pack_code(code: str) -> Optional[int]:
+    """
+    Packs a numeric HSN code of up to 8 digits into a sortable integer key.
+
+    Returns:
+        Optional[int]: The key, or None if the code cannot be packed.
+    """
+    if not code.isascii() or not code.isdigit() or not 1 <= len(code) <= 8:
+        return None
+    return int(code.ljust(8, "0")) * 16 + len(code)
+
+
+def unpack_code(key: int) -> str:
+    """Reverses pack_code()."""
+    return f"{key >> 4:08d}"[: key & 15]
+
+
+def default_snapshot_path(source_path: str) -> str:
+    """
+    Returns the snapshot path used for a given HSN master workbook.
+
+    Args:
+        source_path (str): The path to the HSN master Excel file.
+
+    Returns:
+        str: The path of the snapshot file that sits next to the workbook.
+    """
+    return os.path.splitext(source_path)[0] + SNAPSHOT_SUFFIX
+
+
+def file_sha256(file_path: str) -> bytes:
+    """Returns the SHA-256 digest of a file's contents."""
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.digest()
+
+
+# --- Part 2: Writing Snapshots ---
+
+def write_snapshot(hsn_map: Dict[str, str], source_path: str, snapshot_path: Optional[str] = None) -> str:
+    """
+    Compiles an HSN code -> description map into a binary snapshot file.
+
+    The snapshot records the size, modification time and content hash of the
+    source workbook so that a later load can tell whether it is still fresh.
+    The file is written to a temporary name and then atomically renamed, so a
+    concurrent reader never sees a half-written snapshot.
+
+    Args:
+        hsn_map (Dict[str, str]): The map produced by parsing the workbook.
+        source_path (str): The workbook the map was built from.
+        snapshot_path (Optional[str]): Where to write the snapshot. Defaults to
+                                       the path returned by default_snapshot_path().
+
+    Returns:
+        str: The path of the written snapshot.
+    """
+    snapshot_path = snapshot_path or default_snapshot_path(source_path)
+    stat = os.stat(source_path)
+    source_hash = file_sha256(source_path)
+
+    packed = []
+    extras = {}
+    for code, description in hsn_map.items():
+        key = pack_code(code)
+        if key is None:
+            extras[code] = description or ""
+        else:
+            packed.append((key, description or ""))
+    packed.sort()
+
+    keys = [key for key, _ in packed]
+    desc_blob = bytearray()
+    desc_offsets = [0]
+    for _, description in packed:
+        desc_blob += description.encode("utf-8")
+        desc_offsets.append(len(desc_blob))
+    extras_blob = json.dumps(extras, ensure_ascii=False).encode("utf-8")
+
+    header = _HEADER.pack(
+        SNAPSHOT_MAGIC,
+        SNAPSHOT_FORMAT_VERSION,
+        len(keys),
+        stat.st_size,
+        stat.st_mtime_ns,
+        source_hash,
+        len(extras_blob),
+    )
+
+    tmp_path = f"{snapshot_path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp_path, "wb") as f:
+            f.write(header)
+            f.write(struct.pack(f"<{len(keys)}I", *keys))
+            f.write(struct.pack(f"<{len(desc_offsets)}I", *desc_offsets))
+            f.write(desc_blob)
+            f.write(extras_blob)
+        os.replace(tmp_path, snapshot_path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+    return snapshot_path
+
+
+# --- Part 3: Reading Snapshots ---
+
+def read_snapshot_header(buf) -> Tuple[int, int, int, bytes, int]:
+    """
+    Parses and checks a snapshot header.
+
+    Args:
+        buf: A bytes-like object (typically an mmap) holding the snapshot.
+
+    Returns:
+        Tuple[int, int, int, bytes, int]: The key count, source size, source
+                                          mtime in nanoseconds, source SHA-256
+                                          and length of the extras blob.
+
+    Raises:
+        ValueError: If the buffer is not a snapshot of a supported version.
+    """
+    if len(buf) < _HEADER.size:
+        raise ValueError("Snapshot is truncated.")
+    magic, version, count, size, mtime_ns, sha, extras_len = _HEADER.unpack_from(buf, 0)
+    if magic != SNAPSHOT_MAGIC or version != SNAPSHOT_FORMAT_VERSION:
+        raise ValueError("Unsupported snapshot format.")
+    return count, size, mtime_ns, sha, extras_len
+
+
+def is_snapshot_fresh(snapshot_path: str, source_path: str) -> bool:
+    """
+    Checks whether a snapshot still matches its source workbook.
+
+    The source size and modification time are compared first. If only the
+    modification time differs (e.g. the file was copied or touched), the
+    content hash decides.
+
+    Args:
+        snapshot_path (str): The snapshot to check.
+        source_path (str): The workbook the snapshot should describe.
+
+    Returns:
+        bool: True if the snapshot can be used in place of the workbook.
+    """
+    try:
+        with open(snapshot_path, "rb") as f:
+            _, size, mtime_ns, sha, _ = read_snapshot_header(f.read(_HEADER.size))
+        stat = os.stat(source_path)
+    except (OSError, ValueError):
+        return False
+
+    if stat.st_size != size:
+        return False
+    if stat.st_mtime_ns == mtime_ns:
+        return True
+    return file_sha256(source_path) == sha
+
+
+class CompactHsnMap(Mapping):
+    """
+    Read-only HSN code -> description mapping served directly from a snapshot.
+
+    The snapshot is memory-mapped and its key and offset arrays are used in
+    place: a lookup is a binary search over the packed integer keys followed
+    by decoding one description. Nothing is copied onto the Python heap up
+    front, and every process that maps the same file shares its physical
+    pages through the OS page cache.
+    """
+
+    def __init__(self, snapshot_path: str):
+        if sys.byteorder != "little":
+            raise ValueError("CompactHsnMap requires a little-endian host.")
+        self.snapshot_path = snapshot_path
+        with open(snapshot_path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        count, _, _, _, extras_len = read_snapshot_header(self._mmap)
+
+        keys_start = _HEADER.size
+        offsets_start = keys_start + count * 4
+        blob_start = offsets_start + (count + 1) * 4
+        view = memoryview(self._mmap)
+        self._keys = view[keys_start:offsets_start].cast("I")
+        self._offsets = view[offsets_start:blob_start].cast("I")
+        self._blob_start = blob_start
+        extras_start = blob_start + self._offsets[count]
+        self._extras: Dict[str, str] = json.loads(
+            bytes(self._mmap[extras_start:extras_start + extras_len]).decode("utf-8")
+        )
+        self._count = count
+
+    def packed_keys(self) -> memoryview:
+        """The sorted packed keys of the numeric codes (see pack_code), read in place from the snapshot."""
+        return self._keys
+
+    def _find(self, code: str) -> int:
+        key = pack_code(code)
+        if key is None:
+            return -1
+        i = bisect_left(self._keys, key)
+        return i if i < self._count and self._keys[i] == key else -1
+
+    def __getitem__(self, code: str) -> str:
+        if not isinstance(code, str):
+            raise KeyError(code)
+        i = self._find(code)
+        if i < 0:
+            return self._extras[code]
+        start = self._blob_start + self._offsets[i]
+        end = self._blob_start + self._offsets[i + 1]
+        return self._mmap[start:end].decode("utf-8")
+
+    def __contains__(self, code: object) -> bool:
+        return isinstance(code, str) and (self._find(code) >= 0 or code in self._extras)
+
+    def __iter__(self) -> Iterator[str]:
+        for key in self._keys:
+            yield unpack_code(key)
+        yield from self._extras
+
+    def __len__(self) -> int:
+        return self._count + len(self._extras)
+
+    def __repr__(self) -> str:
+        return f"CompactHsnMap({self.snapshot_path!r}, {len(self)} codes)"
+
+
+def load_snapshot(snapshot_path: str, compact: bool = False) -> Mapping[str, str]:
+    """
+    Loads an HSN snapshot.
+
+    Args:
+        snapshot_path (str): The snapshot to load.
+        compact (bool): If True, return a CompactHsnMap served from the memory
+                        map; otherwise copy the entries into a plain dictionary.
+
+    Returns:
+        Mapping[str, str]: A mapping of HSN codes to their descriptions.
+
+    Raises:
+        OSError: If the file cannot be opened.
+        ValueError: If the file is not a valid snapshot.
+    """
+    compact_map = CompactHsnMap(snapshot_path)
+    if compact:
+        return compact_map
+    return dict(compact_map.items())
+
+
+def load_fresh_snapshot(
+    source_path: str, snapshot_path: Optional[str] = None, compact: bool = False
+) -> Optional[Mapping[str, str]]:
+    """
+    Loads the snapshot for a workbook if it exists and is not stale.
+
+    If the workbook itself is missing but a snapshot is present, the snapshot
+    is used as-is, so deployments can ship the compiled file on its own.
+
+    Args:
+        source_path (str): The HSN master Excel file.
+        snapshot_path (Optional[str]): The snapshot to use. Defaults to the
+                                       path returned by default_snapshot_path().
+        compact (bool): Return a memory-mapped CompactHsnMap instead of a dictionary.
+
+    Returns:
+        Optional[Mapping[str, str]]: The loaded map, or None if the caller should
+                                     fall back to parsing the workbook.
+    """
+    snapshot_path = snapshot_path or default_snapshot_path(source_path)
+    if not os.path.exists(snapshot_path):
+        return None
+    if os.path.exists(source_path) and not is_snapshot_fresh(snapshot_path, source_path):
+        print(f"--- HSN snapshot '{snapshot_path}' is stale. Falling back to the Excel file. ---")
+        return None
+
+    try:
+        return load_snapshot(snapshot_path, compact=compact)
+    except (OSError, ValueError) as e:
+        print(f"--- WARNING: Could not read HSN snapshot '{snapshot_path}': {e} ---")
+        return None
+
+
+# --- Part 4: Build Step ---
+
+if __name__ == "__main__":
+    # Compile the workbook ahead of deployment:
+    #   python -m settyl.hsn_snapshot [path/to/HSN_SAC.xlsx] [--output path] [--force]
+    import argparse
+    import time
+
+    from .hsn_validator import read_hsn_excel
+
+    default_source = os.path.join(os.path.dirname(__file__), "HSN_SAC.xlsx")
+
+    parser = argparse.ArgumentParser(description="Compile the HSN master workbook into a binary snapshot.")
+    parser.add_argument("source", nargs="?", default=default_source, help="Path to the HSN master Excel file.")
+    parser.add_argument("--output", "-o", default=None, help="Snapshot path (defaults to <source>.hsnsnap).")
+    parser.add_argument("--force", action="store_true", help="Rebuild even if the snapshot is fresh.")
+    cli_args = parser.parse_args()
+
+    output_path = cli_args.output or default_snapshot_path(cli_args.source)
+    if not cli_args.force and is_snapshot_fresh(output_path, cli_args.source):
+        print(f"Snapshot '{output_path}' is up to date.")
+        sys.exit(0)
+
+    start = time.perf_counter()
+    master = read_hsn_excel(cli_args.source)
+    if not master:
+        sys.exit(1)
+    write_snapshot(master, cli_args.source, output_path)
+    print(f"Wrote {len(master)} HSN codes to '{output_path}' in {time.perf_counter() - start:.2f}s.")
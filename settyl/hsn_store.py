@@ -0,0 +1,399 @@
+import asyncio
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Mapping, Optional, Tuple
+
+from .hsn_index import HsnPrefixIndex
+from .hsn_search import HsnSearchIndex
+from .hsn_snapshot import default_snapshot_path, file_sha256
+from .hsn_validator import load_hsn_data
+
+# Data store states reported by HsnDataStore.health()
+STATUS_NOT_LOADED = "not_loaded"
+STATUS_LOADING = "loading"
+STATUS_LOADED = "loaded"
+STATUS_FAILED = "failed"
+
+
+class HsnDataVersion:
+    """
+    One immutable version of the HSN master data and the indexes built from it.
+
+    A tool call should fetch the current version once and use only that object,
+    so that a reload happening mid-call cannot mix data from two versions.
+    Derived structures other than the prefix index are built on first use and
+    cached on the version.
+    """
+
+    def __init__(self, data: Mapping[str, str], version_id: str):
+        self.data = data
+        self.version_id = version_id
+        self.loaded_at = time.time()
+        self.index = HsnPrefixIndex(data)
+        self._lock = threading.Lock()
+        self._code_table = None
+        self._search_index: Optional[HsnSearchIndex] = None
+
+    def get_code_table(self):
+        """
+        Returns the sorted-array table used by validate_hsn_codes_bulk(), building it on first use.
+
+        Returns:
+            HsnCodeTable: The table for this version.
+        """
+        if self._code_table is None:
+            # pandas is only needed for bulk validation.
+            from .hsn_bulk import HsnCodeTable
+
+            with self._lock:
+                if self._code_table is None:
+                    self._code_table = HsnCodeTable(self.data)
+        return self._code_table
+
+    def get_search_index(self) -> HsnSearchIndex:
+        """
+        Returns the full-text description index, building it on first use.
+
+        Returns:
+            HsnSearchIndex: The index for this version.
+        """
+        if self._search_index is None:
+            with self._lock:
+                if self._search_index is None:
+                    self._search_index = HsnSearchIndex(self.data)
+        return self._search_index
+
+    async def aget_search_index(self) -> HsnSearchIndex:
+        """Async variant of get_search_index(); a build (or the wait for one) runs in a worker thread."""
+        if self._search_index is not None:
+            return self._search_index
+        return await asyncio.to_thread(self.get_search_index)
+
+    def prepare_like(self, other: "HsnDataVersion") -> None:
+        """Builds the structures `other` has already built, so a swap does not cause a cold start."""
+        if other._code_table is not None:
+            self.get_code_table()
+        if other._search_index is not None:
+            self.get_search_index()
+
+
+def _source_version_id(file_path: str) -> str:
+    """Identifies a version of the master data by the hash of its source file."""
+    for path in (file_path, default_snapshot_path(file_path)):
+        if os.path.exists(path):
+            return file_sha256(path).hex()[:12]
+    return "unknown"
+
+
+def _source_signature(file_path: str):
+    try:
+        stat = os.stat(file_path)
+    except OSError:
+        return None
+    return stat.st_size, stat.st_mtime_ns
+
+
+class HsnDataStore:
+    """
+    Lazily loaded, thread-safe and hot-reloadable holder for the HSN master data.
+
+    Nothing is read from disk when the store is created. The first call to
+    get() (or aget()/acurrent_version() from async code) loads the data;
+    concurrent callers wait for that single load instead of starting their
+    own. A failed load is retried on the next access once `retry_interval`
+    seconds have passed. Once a version is loaded, its description search
+    index is built in a background thread (build_search_index=False skips it).
+
+    reload() builds a complete new HsnDataVersion while the old one keeps
+    serving requests, then swaps it in with a single reference assignment.
+    Callers that already hold the old version finish with it undisturbed.
+    """
+
+    def __init__(
+        self,
+        file_path: str,
+        loader: Callable[[str], Mapping[str, str]] = load_hsn_data,
+        retry_interval: float = 30.0,
+        build_search_index: bool = True,
+    ):
+        self.file_path = file_path
+        self._loader = loader
+        self._retry_interval = retry_interval
+        self._search_in_background = build_search_index
+        self._lock = threading.Lock()
+        self._reload_lock = threading.Lock()
+        self._current: Optional[HsnDataVersion] = None
+        self._status = STATUS_NOT_LOADED
+        self._reloading = False
+        self._error: Optional[str] = None
+        self._failed_at = 0.0
+        self._load_seconds: Optional[float] = None
+        self._reload_count = 0
+        self._loaded_signature = None
+        self._warmup_lock = threading.Lock()
+        self._warmup_thread: Optional[threading.Thread] = None
+        self._watch_stop: Optional[threading.Event] = None
+
+    @property
+    def status(self) -> str:
+        return self._status
+
+    def _build_version(self) -> Tuple[Optional[HsnDataVersion], Optional[str], float, Any]:
+        """
+        Loads the source file into a new version. Touches no store state, so it
+        can run outside self._lock; pass the result to _record_build() under it.
+
+        Returns:
+            Tuple: The version (None on failure), the error message, the load
+                   time in seconds and the source file signature it was read at.
+        """
+        start = time.perf_counter()
+        signature = _source_signature(self.file_path)
+        try:
+            data = self._loader(self.file_path)
+            if not data:
+                error = f"No HSN codes could be loaded from '{self.file_path}'."
+                return None, error, time.perf_counter() - start, signature
+            version = HsnDataVersion(data, _source_version_id(self.file_path))
+        except Exception as e:
+            return None, f"{type(e).__name__}: {e}", time.perf_counter() - start, signature
+        return version, None, time.perf_counter() - start, signature
+
+    def _record_build(self, error: Optional[str], load_seconds: float, signature: Any) -> None:
+        """Records the outcome of a _build_version() call. The caller holds self._lock."""
+        self._error = error
+        self._load_seconds = load_seconds
+        if error is None:
+            self._loaded_signature = signature
+
+    def current_version(self) -> Optional[HsnDataVersion]:
+        """
+        Returns the current data version, loading it on first use.
+
+        Returns:
+            Optional[HsnDataVersion]: The version, or None if loading failed.
+        """
+        version = self._current
+        if version is not None:
+            return version
+
+        with self._lock:
+            # Another thread may have finished loading while we waited.
+            if self._current is not None:
+                return self._current
+            if self._status == STATUS_FAILED and time.monotonic() - self._failed_at < self._retry_interval:
+                return None
+
+            self._status = STATUS_LOADING
+            version, error, load_seconds, signature = self._build_version()
+            self._record_build(error, load_seconds, signature)
+            if version is None:
+                self._status = STATUS_FAILED
+                self._failed_at = time.monotonic()
+                return None
+
+            self._current = version
+            self._status = STATUS_LOADED
+        self._build_search_index_in_background(version)
+        return version
+
+    def _build_search_index_in_background(self, version: HsnDataVersion) -> None:
+        """Starts building a new version's description index, so the first search does not pay for it."""
+        if self._search_in_background:
+            threading.Thread(target=version.get_search_index, name="hsn-search-index", daemon=True).start()
+
+    def get(self) -> Mapping[str, str]:
+        """
+        Returns the HSN code -> description map, loading it on first use.
+
+        Returns:
+            Mapping[str, str]: The master data, or an empty dictionary if loading failed.
+        """
+        version = self.current_version()
+        return version.data if version is not None else {}
+
+    def get_index(self) -> Optional[HsnPrefixIndex]:
+        """
+        Returns the prefix index over the master data, loading the data if needed.
+
+        Returns:
+            Optional[HsnPrefixIndex]: The index, or None if loading failed.
+        """
+        version = self.current_version()
+        return version.index if version is not None else None
+
+    def get_code_table(self):
+        """
+        Returns the sorted-array table used by validate_hsn_codes_bulk(), building it on first use.
+
+        Returns:
+            Optional[HsnCodeTable]: The table, or None if loading failed.
+        """
+        version = self.current_version()
+        return version.get_code_table() if version is not None else None
+
+    def get_search_index(self) -> Optional[HsnSearchIndex]:
+        """
+        Returns the full-text description index, building it on first use.
+
+        Returns:
+            Optional[HsnSearchIndex]: The index, or None if loading failed.
+        """
+        version = self.current_version()
+        return version.get_search_index() if version is not None else None
+
+    async def acurrent_version(self) -> Optional[HsnDataVersion]:
+        """
+        Async variant of current_version() that never blocks the event loop:
+        the load, and the wait for a load another caller started, run in a
+        worker thread.
+
+        Returns:
+            Optional[HsnDataVersion]: The version, or None if loading failed.
+        """
+        version = self._current
+        if version is not None:
+            return version
+        return await asyncio.to_thread(self.current_version)
+
+    async def aget(self) -> Mapping[str, str]:
+        """
+        Async variant of get() that never blocks the event loop on the load.
+
+        Returns:
+            Mapping[str, str]: The master data, or an empty dictionary if loading failed.
+        """
+        version = await self.acurrent_version()
+        return version.data if version is not None else {}
+
+    # --- Hot Reload ---
+
+    def reload(self) -> bool:
+        """
+        Rebuilds the data from the source file and atomically swaps it in.
+
+        Requests keep being served from the current version while the new one
+        is built. If the rebuild fails, the current version stays in place.
+
+        Returns:
+            bool: True if a new version was swapped in.
+        """
+        with self._reload_lock:
+            self._reloading = True
+            try:
+                new_version, error, load_seconds, signature = self._build_version()
+                if new_version is None:
+                    with self._lock:
+                        self._record_build(error, load_seconds, signature)
+                    print(f"--- WARNING: HSN data reload failed, keeping the current version: {error} ---")
+                    return False
+
+                if self._search_in_background:
+                    new_version.get_search_index()
+                old_version = self._current
+                if old_version is not None:
+                    new_version.prepare_like(old_version)
+
+                with self._lock:
+                    self._record_build(error, load_seconds, signature)
+                    self._current = new_version
+                    self._status = STATUS_LOADED
+                    self._reload_count += 1
+            finally:
+                self._reloading = False
+
+        old_id = old_version.version_id if old_version is not None else None
+        # Drop our reference, so the old version is freed by reference counting
+        # as soon as in-flight calls holding it have finished.
+        del old_version
+        print(f"--- HSN data reloaded: version {old_id} -> {new_version.version_id} "
+              f"({len(new_version.data)} codes) ---")
+        return True
+
+    def request_reload(self) -> threading.Thread:
+        """
+        Starts reload() in a background thread (e.g. from an admin endpoint).
+
+        Returns:
+            threading.Thread: The reload thread.
+        """
+        thread = threading.Thread(target=self.reload, name="hsn-data-reload", daemon=True)
+        thread.start()
+        return thread
+
+    def start_watching(self, interval: float = 30.0) -> threading.Thread:
+        """
+        Polls the source file and reloads whenever its size or modification time changes.
+
+        Args:
+            interval (float): Seconds between checks.
+
+        Returns:
+            threading.Thread: The watcher thread. Stop it with stop_watching().
+        """
+        self.stop_watching()
+        stop = threading.Event()
+        self._watch_stop = stop
+
+        def watch():
+            while not stop.wait(interval):
+                signature = _source_signature(self.file_path)
+                if (self._current is not None and signature is not None
+                        and signature != self._loaded_signature):
+                    self.reload()
+
+        thread = threading.Thread(target=watch, name="hsn-data-watcher", daemon=True)
+        thread.start()
+        return thread
+
+    def stop_watching(self) -> None:
+        """Stops the watcher started by start_watching(), if any."""
+        if self._watch_stop is not None:
+            self._watch_stop.set()
+            self._watch_stop = None
+
+    def _warmup(self) -> None:
+        version = self.current_version()
+        if version is not None:
+            version.get_search_index()
+
+    def start_warmup(self) -> threading.Thread:
+        """
+        Starts loading the data and building the search index in a background daemon thread.
+
+        Calling this more than once is harmless; the running warm-up thread is returned.
+
+        Returns:
+            threading.Thread: The warm-up thread.
+        """
+        with self._warmup_lock:
+            if self._warmup_thread is None or not self._warmup_thread.is_alive():
+                self._warmup_thread = threading.Thread(
+                    target=self._warmup, name="hsn-data-warmup", daemon=True
+                )
+                self._warmup_thread.start()
+            return self._warmup_thread
+
+    def health(self) -> Dict[str, Any]:
+        """
+        Reports the state of the data store for health checks.
+
+        Returns:
+            Dict[str, Any]: The status ('not_loaded', 'loading', 'loaded' or
+                            'failed'), whether a reload is running, the current
+                            data version, the number of codes, the last load
+                            time and the last error, if any.
+        """
+        version = self._current
+        return {
+            "status": self._status,
+            "reloading": self._reloading,
+            "file_path": self.file_path,
+            "data_version": version.version_id if version is not None else None,
+            "loaded_at": version.loaded_at if version is not None else None,
+            "reload_count": self._reload_count,
+            "entries": len(version.data) if version is not None else 0,
+            "load_seconds": self._load_seconds,
+            "error": self._error,
+        }
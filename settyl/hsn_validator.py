@@ -1,15 +1,26 @@
 
-import pandas as pd
-from typing import List, Dict, Union, Any
+from typing import List, Dict, Mapping, Union, Any, Optional
 import os
 import pprint # Used for pretty printing the results during testing
+import sys
+
+if __package__:
+    from .hsn_index import HsnPrefixIndex
+    from .hsn_snapshot import load_fresh_snapshot, load_snapshot, write_snapshot
+else:
+    # Run as a script (`python settyl/hsn_validator.py`): import the modules through the package.
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from settyl.hsn_index import HsnPrefixIndex
+    from settyl.hsn_snapshot import load_fresh_snapshot, load_snapshot, write_snapshot
 
 # --- Part 1: Data Loading and Preparation ---
 
-def load_hsn_data(file_path: str) -> Dict[str, str]:
+def read_hsn_excel(file_path: str) -> Dict[str, str]:
     """
-    Loads HSN data from an Excel file into an efficient in-memory dictionary.
-    This function should be called once when the application starts.
+    Parses the HSN master Excel file into a dictionary using pandas.
+
+    This is the slow path: it imports pandas and parses the whole workbook.
+    Prefer load_hsn_data(), which uses a compiled snapshot when one is fresh.
 
     Args:
         file_path (str): The path to the HSN_Master_Data.xlsx file.
@@ -18,12 +29,15 @@ def load_hsn_data(file_path: str) -> Dict[str, str]:
         Dict[str, str]: A dictionary mapping HSN codes to their descriptions.
                         Returns an empty dictionary if the file is not found or is invalid.
     """
-    print(f"Attempting to load HSN data from: {file_path}")
     if not os.path.exists(file_path):
         print(f"--- CRITICAL ERROR: File not found at '{file_path}'. ---")
         return {}
 
     try:
+        # pandas is imported here rather than at module level so that processes
+        # which start from a snapshot never pay for the import.
+        import pandas as pd
+
         # Read the Excel file, ensuring HSNCode is treated as a string
         # to preserve leading zeros (e.g., '01').
         df = pd.read_excel(file_path, dtype={'HSNCode': str})
@@ -40,23 +54,72 @@ def load_hsn_data(file_path: str) -> Dict[str, str]:
         # Clean the HSN codes: remove leading/trailing whitespace
         df['HSNCode'] = df['HSNCode'].str.strip()
 
+        # Rows without a description are kept with an empty string so the map
+        # is identical whether it comes from Excel or from a snapshot.
+        df['Description'] = df['Description'].fillna('').astype(str)
+
         # Convert the cleaned DataFrame into a dictionary for fast lookups.
         # This is the most efficient structure for our validation task.
-        hsn_map = pd.Series(df.Description.values, index=df.HSNCode).to_dict()
-        
-        print(f"--- Successfully loaded {len(hsn_map)} HSN codes into memory. ---")
-        return hsn_map
+        return pd.Series(df.Description.values, index=df.HSNCode).to_dict()
 
     except Exception as e:
         print(f"--- CRITICAL ERROR: An error occurred while loading the Excel file: {e} ---")
         return {}
 
 
+def load_hsn_data(file_path: str, use_snapshot: bool = True, compact: bool = False) -> Mapping[str, str]:
+    """
+    Loads HSN data into an efficient in-memory dictionary.
+    This function should be called once when the application starts.
+
+    If a compiled snapshot (see hsn_snapshot.py) exists next to the Excel file
+    and still matches it, the snapshot is loaded instead of parsing Excel.
+    Otherwise the workbook is parsed and a fresh snapshot is written for the
+    next start.
+
+    Args:
+        file_path (str): The path to the HSN_Master_Data.xlsx file.
+        use_snapshot (bool): Set to False to always parse the Excel file.
+        compact (bool): Return a memory-mapped CompactHsnMap served straight from
+                        the snapshot instead of a dictionary. Worker processes on
+                        one host then share a single copy of the data.
+
+    Returns:
+        Mapping[str, str]: A mapping of HSN codes to their descriptions.
+                           Returns an empty dictionary if the file is not found or is invalid.
+    """
+    print(f"Attempting to load HSN data from: {file_path}")
+
+    if use_snapshot:
+        hsn_map = load_fresh_snapshot(file_path, compact=compact)
+        if hsn_map is not None:
+            print(f"--- Successfully loaded {len(hsn_map)} HSN codes from snapshot. ---")
+            return hsn_map
+
+    hsn_map = read_hsn_excel(file_path)
+    if not hsn_map:
+        return {}
+    print(f"--- Successfully loaded {len(hsn_map)} HSN codes into memory. ---")
+
+    if use_snapshot:
+        try:
+            snapshot_path = write_snapshot(hsn_map, file_path)
+        except OSError as e:
+            # A read-only deployment can still serve requests from the Excel path.
+            print(f"--- WARNING: Could not write HSN snapshot: {e} ---")
+        else:
+            if compact:
+                return load_snapshot(snapshot_path, compact=True)
+
+    return hsn_map
+
+
 # --- Part 2: The Main Validation Function (The "Tool") ---
 
 def validate_hsn_codes(
     hsn_inputs: Union[str, List[str]], 
-    hsn_data_map: Dict[str, str]
+    hsn_data_map: Dict[str, str],
+    prefix_index: Optional[HsnPrefixIndex] = None
 ) -> List[Dict[str, Any]]:
     """
     Validates one or more HSN codes against the pre-loaded HSN data map.
@@ -64,6 +127,8 @@ def validate_hsn_codes(
     Args:
         hsn_inputs (Union[str, List[str]]): A single HSN code as a string, or a list of HSN codes.
         hsn_data_map (Dict[str, str]): The in-memory dictionary of HSN codes and descriptions.
+        prefix_index (Optional[HsnPrefixIndex]): If given, codes that are not found
+                                                 report their nearest existing ancestor.
 
     Returns:
         List[Dict[str, Any]]: A list of dictionaries, each containing the validation result
@@ -123,12 +188,17 @@ def validate_hsn_codes(
                 "message": "HSN code is valid."
             })
         else:
-            results.append({
+            result = {
                 "input_hsn": code,
                 "is_valid": False,
                 "reason_code": "NOT_FOUND",
                 "message": "HSN code not found in the master data."
-            })
+            }
+            # --- Logic 3: Nearest Match ---
+            # Point the caller at the closest existing level of the hierarchy.
+            if prefix_index is not None:
+                result["nearest_ancestor"] = prefix_index.nearest_ancestor(clean_code)
+            results.append(result)
 
     return results
 
@@ -138,8 +208,9 @@ if __name__ == "__main__":
     # This block runs only when you execute the script directly.
     # It will not run when the functions are imported by another script (like an agent).
 
+    # Run with `python settyl/hsn_validator.py`, or `python -m settyl.hsn_validator` from the repository root.
     # Define the path to your Excel file
-    HSN_FILE_PATH = "HSN_SAC.xlsx"
+    HSN_FILE_PATH = os.path.join(os.path.dirname(__file__), "HSN_SAC.xlsx")
 
     # Load the data ONCE
     hsn_master_data = load_hsn_data(HSN_FILE_PATH)
@@ -179,7 +250,7 @@ if __name__ == "__main__":
         # 5. Test a list with a mix of valid and invalid codes
         print("--- Test 5: Mixed List of Codes ---")
         mixed_codes = ["01", "01011010", "123", "ABC", "01012100", "98765432"]
-        test_5 = validate_hsn_codes(mixed_codes, hsn_master_data)
+        test_5 = validate_hsn_codes(mixed_codes, hsn_master_data, HsnPrefixIndex(hsn_master_data))
         pprint.pprint(test_5)
         print("\n")
 
@@ -193,4 +264,10 @@ if __name__ == "__main__":
         print("--- Test 7: Invalid Input Type ---")
         test_7 = validate_hsn_codes(12345, hsn_master_data)
         pprint.pprint(test_7)
-        print("\n")
\ No newline at end of file
+        print("\n")
+
+        # 8. Test prefix queries over the HSN hierarchy
+        print("--- Test 8: Children of a Heading ---")
+        test_8 = HsnPrefixIndex(hsn_master_data).children("8471", limit=5)
+        pprint.pprint(test_8)
+        print("\n")
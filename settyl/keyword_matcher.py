@@ -0,0 +1,308 @@
+import os
+import re
+import threading
+from collections import OrderedDict, deque
+from typing import Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+# Used when the term file cannot be read, so the guardrail never silently turns off.
+DEFAULT_BLOCKED_TERMS = ("STUPID", "BLOCK")
+DEFAULT_TERMS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "blocked_terms.txt")
+
+
+class KeywordMatch(NamedTuple):
+    term: str   # The term as written in the term list
+    start: int  # Offset in the case-folded, whitespace-collapsed parts, joined by newlines
+    end: int
+
+
+def _is_word_char(ch: str) -> bool:
+    return ch.isalnum() or ch == "_"
+
+
+def normalize_term(term: str) -> str:
+    """Case-folds a term and collapses its internal whitespace to single spaces."""
+    return " ".join(term.casefold().split())
+
+
+# --- Part 1: The Automaton ---
+
+class KeywordMatcher:
+    """
+    Aho-Corasick automaton over a list of blocked terms and phrases.
+
+    A scan reads the text once, character by character, so its cost grows
+    with the length of the text and not with the number of terms. Matching
+    is case-insensitive (str.casefold) and runs of whitespace in the text
+    match a single space in a phrase.
+
+    With `word_boundaries` a term only matches as a whole word: 'block' does
+    not match inside 'blockchain'. As with regex \\b, the boundary is only
+    required on a side where the term itself starts or ends with a word
+    character.
+    """
+
+    def __init__(self, terms: Iterable[str], word_boundaries: bool = True):
+        self.word_boundaries = word_boundaries
+        # Trie as one transition dict per state; state 0 is the root.
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        # For each state, the terms (as indexes into self.terms) that end there,
+        # including those reached through failure links.
+        self._out: List[Tuple[int, ...]] = [()]
+        self.terms: List[str] = []
+        self._lengths: List[int] = []
+        self._needs_start: List[bool] = []
+        self._needs_end: List[bool] = []
+
+        seen = set()
+        for term in terms:
+            key = normalize_term(term)
+            if not key or key in seen:
+                continue
+            seen.add(key)
+            self._add(term.strip(), key)
+        self._build_failure_links()
+
+        # While the automaton is at the root, jump straight to the next character
+        # that can start a term (and, if every term needs a word boundary there,
+        # only at the start of a word) instead of stepping through the text.
+        first_chars = "".join(re.escape(ch) for ch in sorted(self._goto[0]))
+        word_start_only = bool(self.terms) and all(self._needs_start)
+        self._skip = re.compile(("(?<!\\w)" if word_start_only else "") + f"[{first_chars}]") if first_chars else None
+
+    def __len__(self) -> int:
+        return len(self.terms)
+
+    def _add(self, term: str, key: str) -> None:
+        state = 0
+        for ch in key:
+            next_state = self._goto[state].get(ch)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto[state][ch] = next_state
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append(())
+            state = next_state
+        self._out[state] = self._out[state] + (len(self.terms),)
+        self.terms.append(term)
+        self._lengths.append(len(key))
+        self._needs_start.append(self.word_boundaries and _is_word_char(key[0]))
+        self._needs_end.append(self.word_boundaries and _is_word_char(key[-1]))
+
+    def _build_failure_links(self) -> None:
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fallback = self._fail[state]
+                while fallback and ch not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(ch, 0)
+                self._fail[next_state] = target if target != next_state else 0
+                self._out[next_state] = self._out[next_state] + self._out[self._fail[next_state]]
+
+    # --- Part 2: Scanning ---
+
+    def _scan(self, parts: Iterable[str], first_only: bool) -> List[KeywordMatch]:
+        # Normalize with C-level string methods; the automaton then only walks
+        # characters. Terms never contain a newline, so joining the parts with
+        # one resets the automaton and stops matches spanning two parts.
+        text = "\n".join(" ".join(part.casefold().split()) for part in parts)
+        goto, fail, out = self._goto, self._fail, self._out
+        lengths, needs_start, needs_end = self._lengths, self._needs_start, self._needs_end
+        root = goto[0]
+        text_length = len(text)
+
+        matches: List[KeywordMatch] = []
+        if self._skip is None:
+            return matches
+        skip = self._skip.search
+        state = 0
+        position = 0
+        while position < text_length:
+            if not state:
+                found = skip(text, position)
+                if found is None:
+                    break
+                position = found.start()
+                state = root[text[position]]
+            else:
+                ch = text[position]
+                while state and ch not in goto[state]:
+                    state = fail[state]
+                state = goto[state].get(ch, 0)
+            position += 1
+            if not state:
+                continue
+
+            for term_index in out[state]:
+                start = position - lengths[term_index]
+                if needs_start[term_index] and start > 0 and _is_word_char(text[start - 1]):
+                    continue
+                if needs_end[term_index] and position < text_length and _is_word_char(text[position]):
+                    continue
+                matches.append(KeywordMatch(self.terms[term_index], start, position))
+                if first_only:
+                    return matches
+        return matches
+
+    def find_all(self, *parts: str) -> List[KeywordMatch]:
+        """
+        Returns every blocked term found in the given text parts.
+
+        Args:
+            *parts (str): One or more pieces of text, e.g. the text parts of a message.
+                          Matches never span two parts.
+
+        Returns:
+            List[KeywordMatch]: The matches, ordered by where they end.
+        """
+        return self._scan(parts, first_only=False)
+
+    def search(self, *parts: str) -> Optional[KeywordMatch]:
+        """
+        Returns the first blocked term found in the given text parts, or None.
+
+        Stops scanning at the first match.
+        """
+        matches = self._scan(parts, first_only=True)
+        return matches[0] if matches else None
+
+
+# --- Part 3: Term Lists ---
+
+def read_terms_file(path: str) -> List[str]:
+    """
+    Reads a term list: one term or phrase per line. Blank lines and lines
+    starting with '#' are ignored.
+    """
+    with open(path, encoding="utf-8") as f:
+        return [line.strip() for line in f if line.strip() and not line.lstrip().startswith("#")]
+
+
+_cache_lock = threading.Lock()
+_cache: Dict[Tuple[str, bool], Tuple[Optional[Tuple[int, int]], KeywordMatcher]] = {}
+
+
+def get_keyword_matcher(path: Optional[str] = None, word_boundaries: bool = True) -> KeywordMatcher:
+    """
+    Returns the compiled matcher for a term file, rebuilding it only when the file changes.
+
+    The file's size and modification time are checked on each call (one
+    os.stat), so edits to the term list take effect without a restart. If the
+    file cannot be read, DEFAULT_BLOCKED_TERMS are used.
+
+    Args:
+        path (Optional[str]): The term file. Defaults to the HSN_BLOCKED_TERMS_FILE
+                              environment variable, then settyl/blocked_terms.txt.
+        word_boundaries (bool): Whether terms must match whole words.
+
+    Returns:
+        KeywordMatcher: The compiled matcher.
+    """
+    path = path or os.getenv("HSN_BLOCKED_TERMS_FILE") or DEFAULT_TERMS_PATH
+    key = (os.path.abspath(path), word_boundaries)
+    try:
+        stat = os.stat(path)
+        signature = (stat.st_size, stat.st_mtime_ns)
+    except OSError:
+        signature = None
+
+    cached = _cache.get(key)
+    if cached is not None and cached[0] == signature:
+        return cached[1]
+
+    with _cache_lock:
+        cached = _cache.get(key)
+        if cached is not None and cached[0] == signature:
+            return cached[1]
+        try:
+            terms = read_terms_file(path)
+        except OSError as e:
+            print(f"--- WARNING: Could not read blocked terms from '{path}' ({e}). Using the built-in list. ---")
+            terms = list(DEFAULT_BLOCKED_TERMS)
+            signature = None
+        matcher = KeywordMatcher(terms, word_boundaries=word_boundaries)
+        _cache[key] = (signature, matcher)
+        print(f"--- Compiled keyword guardrail: {len(matcher)} terms from '{path}' ---")
+        return matcher
+
+
+# --- Part 4: Incremental Scanning ---
+
+class SessionScanCache:
+    """
+    Remembers, per session, which message texts the guardrail has already scanned.
+
+    One user turn makes several model calls (the user message, then again
+    after each tool response), and every call carries the same user text.
+    The verdict for a text is stored the first time it is scanned, so later
+    calls in the session look it up instead of scanning it again.
+
+    Entries are keyed by the texts themselves: Python caches a string's hash,
+    and the dictionary confirms a hit by equality, so a lookup never returns
+    the verdict of a different text. A verdict is only reused while the matcher
+    that produced it is still current, so editing the term list takes effect
+    for texts that were already scanned.
+
+    Args:
+        max_sessions (int): Sessions to remember; the least recently used is dropped.
+        max_entries_per_session (int): Texts to remember per session.
+    """
+
+    def __init__(self, max_sessions: int = 10_000, max_entries_per_session: int = 32):
+        self.max_sessions = max_sessions
+        self.max_entries_per_session = max_entries_per_session
+        self._sessions: "OrderedDict[str, OrderedDict[Tuple[str, ...], Tuple[KeywordMatcher, Optional[KeywordMatch]]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def search(self, session_id: str, parts: Sequence[str], matcher: KeywordMatcher) -> Optional[KeywordMatch]:
+        """
+        Returns matcher.search(*parts), scanning the parts only if this session has not seen them yet.
+
+        Args:
+            session_id (str): The session the message belongs to.
+            parts (Sequence[str]): The text parts of the message.
+            matcher (KeywordMatcher): The current matcher.
+
+        Returns:
+            Optional[KeywordMatch]: The first blocked term found, or None.
+        """
+        key = tuple(parts)
+        with self._lock:
+            entries = self._sessions.get(session_id)
+            if entries is not None:
+                self._sessions.move_to_end(session_id)
+                cached = entries.get(key)
+                if cached is not None and cached[0] is matcher:
+                    entries.move_to_end(key)
+                    self.hits += 1
+                    return cached[1]
+
+        match = matcher.search(*parts)
+
+        with self._lock:
+            self.misses += 1
+            entries = self._sessions.get(session_id)
+            if entries is None:
+                entries = self._sessions[session_id] = OrderedDict()
+                if len(self._sessions) > self.max_sessions:
+                    self._sessions.popitem(last=False)
+            entries[key] = (matcher, match)
+            entries.move_to_end(key)
+            if len(entries) > self.max_entries_per_session:
+                entries.popitem(last=False)
+        return match
+
+    def forget(self, session_id: str) -> None:
+        """Drops everything remembered for a session, e.g. when it is deleted."""
+        with self._lock:
+            self._sessions.pop(session_id, None)
+
+    def stats(self) -> Dict[str, int]:
+        """Cache hits and misses since start-up, and the number of sessions remembered."""
+        return {"hits": self.hits, "misses": self.misses, "sessions": len(self._sessions)}
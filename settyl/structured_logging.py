@@ -0,0 +1,234 @@
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+import threading
+import time
+from typing import Any, Dict, Optional, TextIO
+
+LOGGER_NAME = "settyl"
+# EventLoggers log below this logger, and configure_logging() sets up only it. The
+# 'settyl' logger itself is left alone, so its other records reach the root handlers.
+EVENTS_LOGGER_NAME = f"{LOGGER_NAME}.events"
+
+# Fields every event line carries, in this order, followed by the event's own fields.
+STANDARD_FIELDS = ("agent", "tool", "session", "latency_ms")
+
+
+# --- Part 1: JSON Lines Formatting ---
+
+class JsonLinesFormatter(logging.Formatter):
+    """
+    Formats records as one JSON object per line.
+
+    Structured fields are taken from the record's `fields` attribute (set by
+    EventLogger). Values that are not JSON types are converted with str().
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        line: Dict[str, Any] = {
+            "ts": round(record.created, 6),
+            "level": record.levelname,
+            "logger": record.name,
+            "event": record.getMessage(),
+        }
+        fields = getattr(record, "fields", None)
+        if fields:
+            for name in STANDARD_FIELDS:
+                if fields.get(name) is not None:
+                    line[name] = fields[name]
+            for name, value in fields.items():
+                if name not in line and value is not None:
+                    line[name] = value
+        if record.exc_info:
+            line["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(line, default=str, ensure_ascii=False)
+
+
+class _DeferredQueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler that hands the record over untouched.
+
+    The stock QueueHandler formats the message in the calling thread; here
+    all formatting and JSON encoding happens on the listener thread instead.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            # Never block a request on logging; drop the line instead.
+            _dropped.increment()
+
+
+class _Counter:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.value = 0
+
+    def increment(self) -> None:
+        with self._lock:
+            self.value += 1
+
+
+_dropped = _Counter()
+
+
+# --- Part 2: Configuration ---
+
+_configure_lock = threading.Lock()
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+def configure_logging(level: Optional[str] = None, stream: Optional[TextIO] = None,
+                      max_queue_size: int = 10_000) -> logging.Logger:
+    """
+    Sets up non-blocking JSON-lines logging for the 'settyl.events' logger.
+
+    Log calls put the record on a bounded queue and return; a background
+    listener thread formats and writes them. When the queue is full, records
+    are dropped rather than slowing down the caller. Calling this again
+    replaces the previous configuration.
+
+    Event records do not propagate past 'settyl.events', so they are written
+    once. The application's own configuration of 'settyl' and the root logger
+    is not touched.
+
+    Args:
+        level (Optional[str]): Minimum level. Defaults to the HSN_LOG_LEVEL
+                               environment variable, then 'INFO'.
+        stream (Optional[TextIO]): Where lines are written. Defaults to stderr.
+        max_queue_size (int): Records buffered before new ones are dropped.
+
+    Returns:
+        logging.Logger: The configured 'settyl.events' logger.
+    """
+    global _listener
+    with _configure_lock:
+        logger = logging.getLogger(EVENTS_LOGGER_NAME)
+        if _listener is not None:
+            _listener.stop()
+            for handler in list(logger.handlers):
+                logger.removeHandler(handler)
+
+        output = logging.StreamHandler(stream or sys.stderr)
+        output.setFormatter(JsonLinesFormatter())
+        log_queue: "queue.Queue[logging.LogRecord]" = queue.Queue(max_queue_size)
+        _listener = logging.handlers.QueueListener(log_queue, output, respect_handler_level=True)
+        _listener.start()
+
+        logger.addHandler(_DeferredQueueHandler(log_queue))
+        logger.setLevel((level or os.getenv("HSN_LOG_LEVEL", "INFO")).upper())
+        logger.propagate = False
+        return logger
+
+
+def ensure_logging_configured() -> None:
+    """Calls configure_logging() unless the application has already set up the 'settyl.events' logger."""
+    if not logging.getLogger(EVENTS_LOGGER_NAME).handlers:
+        configure_logging()
+
+
+def shutdown_logging() -> None:
+    """Flushes queued records and stops the listener thread."""
+    global _listener
+    with _configure_lock:
+        if _listener is not None:
+            _listener.stop()
+            _listener = None
+
+
+atexit.register(shutdown_logging)
+
+
+def parse_sample_rates(spec: Optional[str]) -> Dict[str, float]:
+    """
+    Parses 'event=rate' pairs, e.g. 'guardrail.keyword.checked=0.01,tool.hsn_validation.completed=0.1'.
+    """
+    rates: Dict[str, float] = {}
+    for item in (spec or "").split(","):
+        name, _, rate = item.partition("=")
+        if name.strip() and rate.strip():
+            rates[name.strip()] = min(1.0, max(0.0, float(rate)))
+    return rates
+
+
+# --- Part 3: The Event Logger ---
+
+class EventLogger:
+    """
+    Logs named events with structured fields.
+
+    No log record is created for an event whose level is disabled or that is
+    sampled out, and records are formatted and JSON-encoded on the listener
+    thread. Fields should be cheap values (counts, ids, short strings); guard
+    anything costly to compute with enabled().
+
+    High-volume events can be sampled: with a rate of 0.01 for an event, about
+    one in a hundred is written. Warnings and errors are never sampled.
+
+    Args:
+        name (str): Logger name below 'settyl.events', e.g. 'agent'.
+        sample_rates (Optional[Dict[str, float]]): Rate per event name. Defaults
+                                                   to the HSN_LOG_SAMPLING variable.
+    """
+
+    def __init__(self, name: str, sample_rates: Optional[Dict[str, float]] = None):
+        self.logger = logging.getLogger(f"{EVENTS_LOGGER_NAME}.{name}")
+        self.sample_rates = sample_rates if sample_rates is not None else parse_sample_rates(os.getenv("HSN_LOG_SAMPLING"))
+
+    def enabled(self, level: int) -> bool:
+        """True if an event at this level would be written (before sampling). Use it to guard costly fields."""
+        return self.logger.isEnabledFor(level)
+
+    def event(self, level: int, event: str, **fields: Any) -> None:
+        """
+        Writes one event line.
+
+        Args:
+            level (int): A logging level, e.g. logging.INFO.
+            event (str): The event name, e.g. 'guardrail.keyword.blocked'.
+            **fields (Any): Structured fields such as agent, tool, session and latency_ms.
+        """
+        if not self.logger.isEnabledFor(level):
+            return
+        if level < logging.WARNING:
+            rate = self.sample_rates.get(event)
+            if rate is not None and rate < 1.0 and random.random() >= rate:
+                return
+            if rate is not None:
+                fields["sample_rate"] = rate
+        # Built directly rather than through logger.log(), which walks the stack
+        # to find the caller's file and line; the JSON lines do not use them.
+        record = self.logger.makeRecord(self.logger.name, level, "", 0, event, (), None,
+                                        extra={"fields": fields})
+        self.logger.handle(record)
+
+    def debug(self, event: str, **fields: Any) -> None:
+        self.event(logging.DEBUG, event, **fields)
+
+    def info(self, event: str, **fields: Any) -> None:
+        self.event(logging.INFO, event, **fields)
+
+    def warning(self, event: str, **fields: Any) -> None:
+        self.event(logging.WARNING, event, **fields)
+
+    def error(self, event: str, **fields: Any) -> None:
+        self.event(logging.ERROR, event, **fields)
+
+
+def elapsed_ms(start: float) -> float:
+    """Milliseconds since a time.perf_counter() reading, rounded for log lines."""
+    return round((time.perf_counter() - start) * 1000, 3)
+
+
+def dropped_records() -> int:
+    """Number of records dropped because the log queue was full."""
+    return _dropped.value
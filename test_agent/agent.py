@@ -3,10 +3,14 @@ import os
 import asyncio
 from google.adk.agents import Agent
 from google.adk.models.lite_llm import LiteLlm # For multi-model support
-from google.adk.sessions import InMemorySessionService
 from google.adk.runners import Runner
 from google.genai import types # For creating message Content/Parts
 
+from adk_utils.sqlite_session_service import create_session_service
+from adk_utils.streaming import print_agent_stream
+from adk_utils.stub_llm import model_from_env
+from adk_utils.telemetry import instrument_runner, traced
+
 import warnings
 # Ignore all warnings
 warnings.filterwarnings("ignore")
@@ -27,6 +31,7 @@ print("\nEnvironment configured.")
 
 
 # @title Define the get_weather Tool
+@traced("tool")
 def get_weather(city: str) -> dict:
     """Retrieves the current weather report for a specified city.
 
@@ -57,7 +62,7 @@ def get_weather(city: str) -> dict:
 
 # @title Define the Weather Agent
 # Use one of the model constants defined earlier
-AGENT_MODEL = MODEL_GEMINI_2_0_FLASH # Starting with Gemini
+AGENT_MODEL = model_from_env(MODEL_GEMINI_2_0_FLASH) # Starting with Gemini; ADK_MODEL=stub runs offline
 
 root_agent = Agent(
     name="weather_agent_v1",
@@ -77,8 +82,9 @@ print(f"Agent '{root_agent.name}' created using model '{AGENT_MODEL}'.")
 
 # --- Session Management ---
 # Key Concept: SessionService stores conversation history & state.
-# InMemorySessionService is simple, non-persistent storage for this tutorial.
-session_service = InMemorySessionService()
+# InMemorySessionService is simple, non-persistent storage for this tutorial;
+# set ADK_SESSION_DB=sessions.db to keep sessions in SQLite instead.
+session_service = create_session_service()
 
 # Define constants for identifying the interaction context
 APP_NAME = "weather_tutorial_app"
@@ -87,11 +93,12 @@ SESSION_ID = "session_001" # Using a fixed ID for simplicity
 
 # --- Runner ---
 # Key Concept: Runner orchestrates the agent execution loop.
-runner = Runner(
+# instrument_runner records each turn as a span when ADK_TELEMETRY is set.
+runner = instrument_runner(Runner(
     agent=root_agent, # The agent we want to run
     app_name=APP_NAME,   # Associates runs with our app
     session_service=session_service # Uses our session manager
-)
+))
 print(f"Runner created for agent '{runner.agent.name}'.")
 
 
@@ -127,6 +134,13 @@ async def call_agent_async(query: str, runner, user_id, session_id):
   print(f"<<< Agent Response: {final_response_text}")
 
 
+async def call_agent_streaming(query: str, runner, user_id, session_id):
+  """Sends a query to the agent and prints the response as it is generated (SSE streaming mode)."""
+  # Key Concept: with streaming, partial text events arrive before the final response,
+  # so the user sees the first words instead of waiting for the whole reply.
+  await print_agent_stream(runner, query, user_id, session_id)
+
+
 
 # @title Run the Initial Conversation
 
@@ -134,15 +148,18 @@ async def call_agent_async(query: str, runner, user_id, session_id):
 async def run_conversation():
     
     # Create the specific session where the conversation will happen
-    session = await session_service.create_session(
-        app_name=APP_NAME,
-        user_id=USER_ID,
-        session_id=SESSION_ID
-    )
-    print(f"Session created: App='{APP_NAME}', User='{USER_ID}', Session='{SESSION_ID}'")
-
-
-    await call_agent_async("What is the weather like in London?",
+    # (a SQLite-backed service may still have it from an earlier run)
+    session = await session_service.get_session(app_name=APP_NAME, user_id=USER_ID, session_id=SESSION_ID)
+    if session is None:
+        session = await session_service.create_session(
+            app_name=APP_NAME,
+            user_id=USER_ID,
+            session_id=SESSION_ID
+        )
+    print(f"Session ready: App='{APP_NAME}', User='{USER_ID}', Session='{SESSION_ID}'")
+
+
+    await call_agent_streaming("What is the weather like in London?",
                                        runner=runner,
                                        user_id=USER_ID,
                                        session_id=SESSION_ID)
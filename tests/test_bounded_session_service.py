@@ -0,0 +1,118 @@
+import asyncio
+import os
+import time
+
+from google.adk.events.event import Event
+from google.adk.events.event_actions import EventActions
+from google.genai import types
+
+from adk_utils.bounded_session_service import BoundedSessionService
+
+APP, USER = "app", "user"
+
+
+def _event(text, state_delta=None):
+    return Event(author="agent", invocation_id="e-1",
+                 content=types.Content(role="model", parts=[types.Part(text=text)]),
+                 actions=EventActions(state_delta=state_delta or {}))
+
+
+def _run(coroutine):
+    return asyncio.run(coroutine)
+
+
+def test_least_recently_used_session_is_evicted():
+    service = BoundedSessionService(max_sessions_per_app=2)
+
+    async def main():
+        for session_id in ("s1", "s2"):
+            await service.create_session(app_name=APP, user_id=USER, session_id=session_id)
+        await service.get_session(app_name=APP, user_id=USER, session_id="s1")
+        await service.create_session(app_name=APP, user_id=USER, session_id="s3")
+        return [await service.get_session(app_name=APP, user_id=USER, session_id=session_id)
+                for session_id in ("s1", "s2", "s3")]
+
+    s1, s2, s3 = _run(main())
+
+    assert s1 is not None and s2 is None and s3 is not None
+    stats = service.stats()[APP]
+    assert stats["sessions"] == 2 and stats["evicted"] == 1 and stats["users"][USER]["sessions"] == 2
+
+
+def test_byte_cap_keeps_a_single_oversized_session():
+    service = BoundedSessionService(max_bytes_per_app=2_000)
+
+    async def main():
+        small = await service.create_session(app_name=APP, user_id=USER, session_id="small")
+        await service.append_event(small, _event("hi"))
+        large = await service.create_session(app_name=APP, user_id=USER, session_id="large")
+        await service.append_event(large, _event("x" * 5_000))
+        return await service.get_session(app_name=APP, user_id=USER, session_id="small")
+
+    assert _run(main()) is None
+    stats = service.stats()[APP]
+    assert stats["sessions"] == 1 and stats["bytes"] > 5_000
+
+
+def test_evicted_session_is_spilled_and_restored(tmp_path):
+    service = BoundedSessionService(max_sessions_per_app=1, spill_dir=str(tmp_path))
+
+    async def main():
+        first = await service.create_session(app_name=APP, user_id=USER, session_id="s1",
+                                             state={"user:name": "Asha"})
+        await service.append_event(first, _event("one", {"step": 1}))
+        await service.create_session(app_name=APP, user_id=USER, session_id="s2")
+        listed = await service.list_sessions(app_name=APP, user_id=USER)
+        restored = await service.get_session(app_name=APP, user_id=USER, session_id="s1")
+        return first, listed, restored
+
+    first, listed, restored = _run(main())
+
+    assert sorted(session.id for session in listed.sessions) == ["s1", "s2"]
+    assert restored.state == {"step": 1, "user:name": "Asha"}
+    assert [event.id for event in restored.events] == [event.id for event in first.events]
+    stats = service.stats()[APP]
+    assert stats["spilled"] == 2 and stats["restored"] == 1 and stats["spill_pending"] == 0
+
+
+def test_appending_to_a_spilled_session_restores_it(tmp_path):
+    service = BoundedSessionService(max_sessions_per_app=1, spill_dir=str(tmp_path))
+
+    async def main():
+        first = await service.create_session(app_name=APP, user_id=USER, session_id="s1")
+        await service.create_session(app_name=APP, user_id=USER, session_id="s2")
+        await service.append_event(first, _event("after eviction"))
+        return await service.get_session(app_name=APP, user_id=USER, session_id="s1")
+
+    restored = _run(main())
+    assert [event.content.parts[0].text for event in restored.events] == ["after eviction"]
+
+
+def test_idle_sessions_expire_and_deleted_ones_leave_no_file(tmp_path):
+    service = BoundedSessionService(idle_ttl_seconds=0.05, spill_dir=str(tmp_path))
+
+    async def main():
+        await service.create_session(app_name=APP, user_id=USER, session_id="idle")
+        await asyncio.sleep(0.1)
+        removed = await service.sweep()
+        restored = await service.get_session(app_name=APP, user_id=USER, session_id="idle")
+        await service.delete_session(app_name=APP, user_id=USER, session_id="idle")
+        gone = await service.get_session(app_name=APP, user_id=USER, session_id="idle")
+        return removed, restored, gone
+
+    removed, restored, gone = _run(main())
+
+    assert removed == 1 and restored is not None and gone is None
+    assert service.stats()[APP]["expired"] == 1
+    assert not [name for _, _, names in os.walk(tmp_path) for name in names]
+
+
+def test_without_a_spill_dir_expired_sessions_are_dropped():
+    service = BoundedSessionService(idle_ttl_seconds=0.05)
+
+    async def main():
+        await service.create_session(app_name=APP, user_id=USER, session_id="idle")
+        time.sleep(0.1)
+        return await service.get_session(app_name=APP, user_id=USER, session_id="idle")
+
+    assert _run(main()) is None
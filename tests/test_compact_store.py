@@ -0,0 +1,90 @@
+import asyncio
+import tracemalloc
+
+import pytest
+
+from settyl import agent
+from settyl.hsn_index import HsnPrefixIndex
+from settyl.hsn_snapshot import load_snapshot, write_snapshot
+from settyl.hsn_store import HsnDataStore, HsnDataVersion
+
+
+def _master_data():
+    """About 20,000 codes over all four levels, with the malformed codes the real workbook has."""
+    hsn_map = {}
+    for chapter in range(1, 98):
+        hsn_map[f"{chapter:02d}"] = f"CHAPTER {chapter}"
+        for heading in range(1, 9):
+            heading_code = f"{chapter:02d}{heading:02d}"
+            hsn_map[heading_code] = f"HEADING {heading_code}"
+            for subheading in range(10, 40, 10):
+                subheading_code = f"{heading_code}{subheading:02d}"
+                # Some tariff lines sit directly under their heading.
+                if subheading != 30:
+                    hsn_map[subheading_code] = f"SUBHEADING {subheading_code}"
+                for line in range(1, 9):
+                    hsn_map[f"{subheading_code}{line:02d}"] = f"TARIFF LINE {line}"
+    hsn_map.update({"30559": "ODD LENGTH", "3074330": "ODD LENGTH", "2307 00": "NOT NUMERIC"})
+    return hsn_map
+
+
+@pytest.fixture(scope="module")
+def master_data():
+    return _master_data()
+
+
+@pytest.fixture(scope="module")
+def compact_map(master_data, tmp_path_factory):
+    source = tmp_path_factory.mktemp("hsn") / "HSN_SAC.xlsx"
+    source.write_bytes(b"workbook bytes")
+    return load_snapshot(write_snapshot(master_data, str(source)), compact=True)
+
+
+def test_compact_version_keeps_the_data_off_the_heap(compact_map):
+    tracemalloc.start()
+    try:
+        version = HsnDataVersion(compact_map, "test")
+        heap_bytes, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    assert len(version.index) > 20_000
+    # A copy of the codes as Python strings would take megabytes; the index reads the mapped keys in place.
+    assert heap_bytes < 16 * 1024
+
+
+@pytest.mark.parametrize("prefix", ["", "01", "0101", "010130", "0101300", "30", "3055", "3074", "9708", "99"])
+@pytest.mark.parametrize("direct_only", [True, False])
+def test_compact_index_matches_dict_index(master_data, compact_map, prefix, direct_only):
+    from_dict = HsnPrefixIndex(master_data)
+    from_snapshot = HsnPrefixIndex(compact_map)
+
+    assert len(from_snapshot) == len(from_dict)
+    for offset, limit in ((0, 5), (3, 7), (0, 10_000), (40, 25)):
+        assert (from_snapshot.children(prefix, direct_only, offset, limit)
+                == from_dict.children(prefix, direct_only, offset, limit))
+
+
+def test_children_of_a_heading_and_of_a_missing_subheading(compact_map):
+    index = HsnPrefixIndex(compact_map)
+
+    heading = index.children("0101", limit=100)
+    assert [item["hsn"] for item in heading["items"]][:3] == ["010110", "010120", "01013001"]
+    assert heading["total"] == 2 + 8
+
+    missing = index.children("010130")
+    assert missing["total"] == 8 and missing["items"][0]["hsn"] == "01013001"
+    assert index.nearest_ancestor("01013001") == {"hsn": "01013001", "level": "tariff_line",
+                                                  "description": "TARIFF LINE 1"}
+    assert index.nearest_ancestor("01013099")["hsn"] == "0101"
+
+
+def test_children_tool_pages_with_the_default_page_size(master_data, monkeypatch):
+    store = HsnDataStore("unused.xlsx", loader=lambda path: dict(master_data), build_search_index=False)
+    monkeypatch.setattr(agent, "hsn_data_store", store)
+
+    first = asyncio.run(agent.hsn_code_children_tool("", None, None))
+    second = asyncio.run(agent.hsn_code_children_tool("", 2, None))
+
+    assert first["page"] == 1 and len(first["children"]) == 25 and first["has_more"]
+    assert first["total"] == 97 and second["children"][0]["hsn"] == "26"
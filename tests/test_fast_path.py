@@ -0,0 +1,81 @@
+import pytest
+from google.adk.models.llm_request import LlmRequest
+from google.genai import types
+
+from settyl.fast_path import VALIDATION_TOOL_NAME, HsnFastPath, extract_codes, render_validation_reply
+
+ROWS = [
+    {"input_hsn": "01012100", "is_valid": True, "description": "PURE-BRED BREEDING HORSES"},
+    {"input_hsn": "01012199", "is_valid": False, "reason_code": "NOT_FOUND",
+     "nearest_ancestor": {"hsn": "010121", "level": "subheading", "description": "PURE-BRED BREEDING ANIMALS"}},
+]
+
+
+@pytest.mark.parametrize("text, codes", [
+    ("validate 01012100, 8471, 99", ["01012100", "8471", "99"]),
+    ("Please check HSN codes 0101.21.00 and 8471.", ["01012100", "8471"]),
+    ("codes: 0101; 0101?", ["0101"]),
+    ("what's 8471?", ["8471"]),
+])
+def test_code_only_messages(text, codes):
+    assert extract_codes(text) == codes
+
+
+@pytest.mark.parametrize("text", [
+    "8471-8473", "8471 - 8473", "8471 to 8473", "hsn 8471/8472", "(8471)", "HS8471", "8471a",
+    "describe 8471", "validate 7", "validate these codes", "",
+])
+def test_messages_that_need_the_model(text):
+    assert extract_codes(text) is None
+
+
+def _user(text):
+    return types.Content(role="user", parts=[types.Part(text=text)])
+
+
+def _call(codes):
+    return types.Content(role="model", parts=[types.Part(
+        function_call=types.FunctionCall(name=VALIDATION_TOOL_NAME, args={"hsn_inputs": codes}))])
+
+
+def _response(rows):
+    return types.Content(role="user", parts=[types.Part(
+        function_response=types.FunctionResponse(name=VALIDATION_TOOL_NAME, response={"result": rows}))])
+
+
+def _request(*contents):
+    return LlmRequest(model="gemini-2.0-flash", contents=list(contents))
+
+
+@pytest.fixture
+def fast_path():
+    return HsnFastPath()
+
+
+def test_first_call_of_a_turn_calls_the_tool(fast_path):
+    response = fast_path(None, _request(_user("hello"), _user("validate 01012100, 01012199")))
+
+    call = response.content.parts[0].function_call
+    assert call.name == VALIDATION_TOOL_NAME and call.args == {"hsn_inputs": ["01012100", "01012199"]}
+
+
+def test_tool_result_is_rendered_without_the_model(fast_path):
+    request = _request(_user("validate 01012100, 01012199"), _call(["01012100", "01012199"]), _response(ROWS))
+
+    text = fast_path(None, request).content.parts[0].text
+    assert text == render_validation_reply(ROWS)
+    assert text.startswith("I checked 2 HSN codes: 1 valid, 1 not valid.") and "010121" in text
+
+
+@pytest.mark.parametrize("contents", [
+    [_user("is 8471-8473 a valid range?")],
+    [_user("8471-8473")],
+    [_user("validate 8471"), _call(["8471"]), _response([{"unexpected": True}])],
+    [_user("validate 8471"), _call(["8471"]), _response(ROWS), _call(["8471"]), _response(ROWS)],
+])
+def test_everything_else_goes_to_the_model(fast_path, contents):
+    assert fast_path(None, _request(*contents)) is None
+
+
+def test_disabled_fast_path_never_answers():
+    assert HsnFastPath(enabled=False)(None, _request(_user("validate 8471"))) is None
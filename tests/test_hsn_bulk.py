@@ -0,0 +1,81 @@
+import asyncio
+
+import pytest
+
+from settyl import agent
+from settyl.hsn_bulk import HsnCodeTable, validate_hsn_codes_bulk
+from settyl.hsn_store import HsnDataStore
+
+HSN_MAP = {
+    "01": "LIVE ANIMALS",
+    "0101": "LIVE HORSES, ASSES, MULES AND HINNIES.",
+    "010121": "PURE-BRED BREEDING ANIMALS",
+    "01012100": "PURE-BRED BREEDING HORSES",
+    "84": "MACHINERY",
+    "8471": "AUTOMATIC DATA PROCESSING MACHINES",
+}
+
+# Valid, not found (with and without an existing ancestor), bad formats, padding and non-strings.
+HSN_INPUTS = [
+    "0101", "01012100", " 8471 ", "01012199", "0199", "99", "12345", "010A", "", "0101.21",
+    "84711000", 8471, None, ["0101"], "8471",
+]
+
+
+class _ToolContext:
+    """The parts of ADK's ToolContext that hsn_code_validation_tool uses."""
+
+    agent_name = "test_agent"
+    _invocation_context = None
+
+    def __init__(self):
+        self.state = {}
+
+
+@pytest.fixture
+def data_store(monkeypatch):
+    store = HsnDataStore("unused.xlsx", loader=lambda path: dict(HSN_MAP))
+    monkeypatch.setattr(agent, "hsn_data_store", store)
+    return store
+
+
+def _run_tool(monkeypatch, threshold):
+    monkeypatch.setattr(agent, "BULK_VALIDATION_THRESHOLD", threshold)
+    return asyncio.run(agent.hsn_code_validation_tool(list(HSN_INPUTS), _ToolContext()))
+
+
+def test_bulk_path_matches_the_per_code_loop(monkeypatch, data_store):
+    looped = _run_tool(monkeypatch, threshold=len(HSN_INPUTS) + 1)
+    bulk = _run_tool(monkeypatch, threshold=1)
+
+    assert bulk == looped
+    assert [row.get("reason_code", "VALID") for row in looped] == [
+        "VALID", "VALID", "VALID", "NOT_FOUND", "NOT_FOUND", "NOT_FOUND", "INVALID_FORMAT", "INVALID_FORMAT",
+        "INVALID_FORMAT", "INVALID_FORMAT", "NOT_FOUND", "INVALID_ITEM_TYPE", "INVALID_ITEM_TYPE",
+        "INVALID_ITEM_TYPE", "VALID",
+    ]
+    assert looped[3]["nearest_ancestor"]["hsn"] == "010121"
+
+
+def test_bulk_counts():
+    result = validate_hsn_codes_bulk(HSN_INPUTS, HsnCodeTable(HSN_MAP))
+
+    assert len(result) == len(HSN_INPUTS)
+    assert result.counts() == {"VALID": 4, "INVALID_ITEM_TYPE": 3, "INVALID_FORMAT": 4, "NOT_FOUND": 4}
+
+
+def test_state_keeps_a_summary_not_the_rows(monkeypatch, data_store):
+    monkeypatch.setattr(agent, "LAST_RESULT_MAX_ROWS", 5)
+    monkeypatch.setattr(agent, "BULK_VALIDATION_THRESHOLD", 1)
+    tool_context = _ToolContext()
+    inputs = list(HSN_INPUTS) * 100
+
+    rows = asyncio.run(agent.hsn_code_validation_tool(inputs, tool_context))
+    summary = tool_context.state["hsn_tool_last_result"]
+
+    assert len(rows) == len(inputs)
+    assert summary["total"] == len(inputs)
+    assert summary["counts"] == {"VALID": 400, "INVALID_ITEM_TYPE": 300, "INVALID_FORMAT": 400, "NOT_FOUND": 400}
+    assert summary["invalid_rows"] == [row for row in rows if not row["is_valid"]][:5]
+    assert summary["invalid_rows_truncated"] is True
+    assert summary["data_version"] == rows[0]["data_version"]
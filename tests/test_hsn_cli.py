@@ -0,0 +1,65 @@
+import json
+
+from settyl.hsn_cli import _MALFORMED, iter_csv_chunks, run_validation
+from settyl.hsn_snapshot import write_snapshot
+
+CSV = (
+    'InvoiceNo,HSNCode,Note\n'
+    '1,0101,plain\n'
+    '2,8471,"a note\nover two lines"\n'
+    '3,1006,"a stray quote\n'
+    '4,0102,plain\n'
+    '5,0103,"quoted, with a comma"\n'
+)
+
+
+def _write(tmp_path, text):
+    path = tmp_path / "invoices.csv"
+    path.write_bytes(text.encode("utf-8"))
+    return str(path)
+
+
+def _codes(chunks):
+    return [code for _, codes, _ in chunks for code in codes]
+
+
+def test_quoted_newlines_are_one_record(tmp_path):
+    path = _write(tmp_path, CSV.replace('"a stray quote\n', 'no stray quote\n'))
+    assert _codes(iter_csv_chunks(path, "HSNCode", chunk_size=10)) == ["0101", "8471", "1006", "0102", "0103"]
+
+
+def test_unbalanced_quote_only_loses_its_own_row(tmp_path):
+    path = _write(tmp_path, CSV)
+    codes = _codes(iter_csv_chunks(path, "HSNCode", chunk_size=10))
+    assert codes == ["0101", "8471", _MALFORMED, "0102", "0103"]
+
+
+def test_record_line_cap(tmp_path):
+    path = _write(tmp_path, 'HSNCode,Note\n0101,"open\n' + "0102,x\n" * 150 + "0103,y\n")
+    codes = _codes(iter_csv_chunks(path, "HSNCode", chunk_size=1000))
+    assert codes[0] is _MALFORMED
+    assert codes[1:] == ["0102"] * 150 + ["0103"]
+
+
+def test_resuming_from_a_chunk_offset_after_a_malformed_row(tmp_path):
+    path = _write(tmp_path, CSV)
+    chunks = list(iter_csv_chunks(path, "HSNCode", chunk_size=3))
+    assert [first_row for first_row, _, _ in chunks] == [0, 3]
+
+    _, _, offset = chunks[0]
+    resumed = list(iter_csv_chunks(path, "HSNCode", chunk_size=3, start_row=3, start_offset=offset))
+    assert resumed == chunks[1:]
+
+
+def test_run_validation_reports_the_malformed_row(tmp_path):
+    master = tmp_path / "HSN_SAC.xlsx"
+    master.write_bytes(b"workbook bytes")
+    write_snapshot({"01": "LIVE ANIMALS", "0101": "LIVE HORSES", "0102": "LIVE BOVINE ANIMALS"}, str(master))
+
+    output = tmp_path / "results.jsonl"
+    stats = run_validation(_write(tmp_path, CSV), str(output), master_path=str(master), progress=False)
+
+    rows = [json.loads(line) for line in output.read_text().splitlines()]
+    assert [row["reason_code"] for row in rows] == ["VALID", "NOT_FOUND", "MALFORMED_ROW", "VALID", "NOT_FOUND"]
+    assert rows[2]["input_hsn"] is None
+    assert stats["counts"]["MALFORMED_ROW"] == 1 and stats["counts"]["INVALID_ITEM_TYPE"] == 0
@@ -0,0 +1,64 @@
+import json
+
+import pytest
+
+from settyl.hsn_policy import HsnCodePolicy, get_hsn_policy, merge_blocked_rows
+
+
+@pytest.fixture
+def policy():
+    # Deny chapter 99 but allow heading 9954; deny one exact code elsewhere.
+    return HsnCodePolicy({
+        "default": "allow",
+        "deny": {"prefixes": ["99"], "codes": ["85444999"]},
+        "allow": {"prefixes": ["9954"]},
+    })
+
+
+def test_partition_keeps_order_and_positions(policy):
+    codes = ["0101", "9901", "99541000", 8471, "85444999", "8544"]
+
+    permitted, blocked = policy.partition(codes)
+
+    assert permitted == ["0101", "99541000", 8471, "8544"]
+    assert blocked == [(1, "9901", "deny prefix 99"), (4, "85444999", "deny code 85444999")]
+
+
+def test_partition_passes_non_strings_through(policy):
+    permitted, blocked = policy.partition([None, 99, ["99"]])
+
+    assert permitted == [None, 99, ["99"]]
+    assert blocked == []
+
+
+def test_merge_blocked_rows_restores_input_order(policy):
+    codes = ["9901", "0101", "9902", "8471"]
+    permitted, blocked = policy.partition(codes)
+    results = [{"input_hsn": code, "is_valid": True} for code in permitted]
+    blocked_rows = [(position, {"input_hsn": code, "reason_code": "BLOCKED_BY_GUARDRAIL"})
+                    for position, code, _ in blocked]
+
+    merged = merge_blocked_rows(results, blocked_rows, len(codes))
+
+    assert [row["input_hsn"] for row in merged] == codes
+    assert [row.get("reason_code") for row in merged] == ["BLOCKED_BY_GUARDRAIL", None, "BLOCKED_BY_GUARDRAIL", None]
+
+
+def test_merge_blocked_rows_appends_when_counts_differ():
+    results = [{"input_hsn": "[...]", "reason_code": "DATASTORE_UNAVAILABLE"}]
+    blocked_rows = [(0, {"input_hsn": "9901", "reason_code": "BLOCKED_BY_GUARDRAIL"})]
+
+    merged = merge_blocked_rows(results, blocked_rows, total=3)
+
+    assert [row["reason_code"] for row in merged] == ["DATASTORE_UNAVAILABLE", "BLOCKED_BY_GUARDRAIL"]
+
+
+def test_get_hsn_policy_reads_the_file(tmp_path):
+    path = tmp_path / "policy.json"
+    path.write_text(json.dumps({"default": "deny", "allow": {"ranges": [["01", "03"]]}}))
+
+    policy = get_hsn_policy(str(path))
+
+    assert policy.is_allowed("0201")
+    assert not policy.is_allowed("0401")
+    assert policy.evaluate("0401").rule is None
@@ -0,0 +1,84 @@
+import asyncio
+import time
+
+import pytest
+
+from settyl import agent
+from settyl.hsn_search import HsnSearchIndex, stem, tokenize
+from settyl.hsn_store import HsnDataStore
+
+HSN_MAP = {
+    "74": "COPPER AND ARTICLES THEREOF",
+    "7408": "COPPER WIRE",
+    "740811": "OF REFINED COPPER:",
+    "85": "ELECTRICAL MACHINERY AND EQUIPMENT AND PARTS THEREOF",
+    "8544": "INSULATED (INCLUDING ENAMELLED OR ANODISED) WIRE, CABLE AND OTHER INSULATED ELECTRIC CONDUCTORS",
+    "854411": "WINDING WIRE: OF COPPER",
+    "85441110": "FOR ELECTRIC MOTORS",
+    "1006": "RICE",
+    "10063020": "BASMATI RICE",
+    "73": "ARTICLES OF IRON OR STEEL",
+    "7326": "OTHER ARTICLES OF IRON OR STEEL",
+}
+
+
+@pytest.fixture(scope="module")
+def index():
+    return HsnSearchIndex(HSN_MAP)
+
+
+def test_stemming_and_stopwords():
+    assert stem("wires") == "wire" and stem("enamelled") == "enamel"
+    assert tokenize("Articles of Iron or Steel") == ["article", "iron", "steel"]
+
+
+def test_descriptions_are_matched_with_their_ancestors(index):
+    results = index.search("copper winding wire", top_k=3)
+
+    # 85441110 only says 'FOR ELECTRIC MOTORS'; it is found through 854411 and 8544.
+    assert results[0]["hsn"] == "854411"
+    assert {"85441110", "7408"} & {result["hsn"] for result in results[1:]}
+    assert results == sorted(results, key=lambda result: -result["score"])
+
+
+def test_single_term_query_and_top_k(index):
+    results = index.search("basmati", top_k=10)
+
+    assert [result["hsn"] for result in results] == ["10063020"]
+    assert len(index.search("rice", top_k=1)) == 1
+
+
+def test_queries_without_known_terms_return_nothing(index):
+    assert index.search("of the other") == []
+    assert index.search("xyzzy") == []
+    assert index.search("copper", top_k=0) == []
+
+
+def test_index_is_built_in_the_background_after_loading():
+    store = HsnDataStore("unused.xlsx", loader=lambda path: dict(HSN_MAP))
+    version = store.current_version()
+
+    deadline = time.monotonic() + 5
+    while version._search_index is None and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert version._search_index is not None
+    assert version.get_search_index().search("steel", top_k=1)[0]["hsn"] in {"73", "7326"}
+
+
+def test_background_build_can_be_turned_off():
+    store = HsnDataStore("unused.xlsx", loader=lambda path: dict(HSN_MAP), build_search_index=False)
+    version = store.current_version()
+
+    time.sleep(0.05)
+    assert version._search_index is None
+
+
+def test_search_tool_applies_the_default_top_k(monkeypatch):
+    store = HsnDataStore("unused.xlsx", loader=lambda path: dict(HSN_MAP))
+    monkeypatch.setattr(agent, "hsn_data_store", store)
+
+    default = asyncio.run(agent.hsn_description_search_tool("copper wire", None))
+    one = asyncio.run(agent.hsn_description_search_tool("copper wire", 1))
+
+    assert 1 < len(default["candidates"]) <= 10
+    assert one["candidates"] == default["candidates"][:1]
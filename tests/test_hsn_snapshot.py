@@ -0,0 +1,67 @@
+import os
+
+import pytest
+
+from settyl.hsn_snapshot import (
+    CompactHsnMap,
+    load_fresh_snapshot,
+    load_snapshot,
+    pack_code,
+    unpack_code,
+    write_snapshot,
+)
+
+HSN_MAP = {
+    "01": "LIVE ANIMALS",
+    "0101": "LIVE HORSES, ASSES, MULES AND HINNIES.",
+    "01012100": "PURE-BRED BREEDING ANIMALS",
+    "010121": "",
+    "9954": "CONSTRUCTION SERVICES – ÉTÉ",
+    "99AB": "NOT A NUMERIC CODE",
+}
+
+
+@pytest.fixture
+def source(tmp_path):
+    path = tmp_path / "HSN_SAC.xlsx"
+    path.write_bytes(b"workbook bytes")
+    return str(path)
+
+
+@pytest.mark.parametrize("code", ["0", "01", "0101", "010121", "01012100", "99999999"])
+def test_pack_code_round_trip(code):
+    assert unpack_code(pack_code(code)) == code
+
+
+def test_pack_code_rejects_non_numeric():
+    assert pack_code("99AB") is None
+    assert pack_code("123456789") is None
+
+
+@pytest.mark.parametrize("compact", [False, True])
+def test_snapshot_round_trip(source, compact):
+    snapshot_path = write_snapshot(HSN_MAP, source)
+
+    loaded = load_snapshot(snapshot_path, compact=compact)
+
+    assert isinstance(loaded, CompactHsnMap) == compact
+    assert dict(loaded.items()) == HSN_MAP
+    assert len(loaded) == len(HSN_MAP)
+    assert "0101" in loaded and "0102" not in loaded
+    assert loaded.get("0102") is None
+
+
+def test_fresh_snapshot_is_used_and_stale_one_is_not(source):
+    write_snapshot(HSN_MAP, source)
+    assert load_fresh_snapshot(source) == HSN_MAP
+
+    with open(source, "ab") as f:
+        f.write(b" edited")
+    assert load_fresh_snapshot(source) is None
+
+
+def test_snapshot_without_workbook_is_used(source):
+    write_snapshot(HSN_MAP, source)
+    os.remove(source)
+
+    assert load_fresh_snapshot(source) == HSN_MAP
@@ -0,0 +1,117 @@
+import asyncio
+import threading
+import time
+
+from settyl.hsn_store import STATUS_LOADED, STATUS_NOT_LOADED, HsnDataStore
+
+HSN_MAP = {"01": "LIVE ANIMALS", "0101": "LIVE HORSES, ASSES, MULES AND HINNIES."}
+
+
+class _Loader:
+    """Counts its calls; each one takes `delay` seconds."""
+
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, path):
+        with self._lock:
+            self.calls += 1
+        time.sleep(self.delay)
+        return dict(HSN_MAP)
+
+
+def test_nothing_is_loaded_until_first_use():
+    loader = _Loader()
+    store = HsnDataStore("unused.xlsx", loader=loader)
+
+    assert store.status == STATUS_NOT_LOADED and loader.calls == 0
+    assert store.get() == HSN_MAP
+    assert store.status == STATUS_LOADED and loader.calls == 1
+
+
+def test_first_async_load_does_not_block_the_event_loop():
+    loader = _Loader(delay=0.3)
+    store = HsnDataStore("unused.xlsx", loader=loader)
+
+    async def main():
+        ticks = 0
+
+        async def tick():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+
+        ticker = asyncio.create_task(tick())
+        versions = await asyncio.gather(*(store.acurrent_version() for _ in range(5)))
+        ticker.cancel()
+        return versions, ticks
+
+    versions, ticks = asyncio.run(main())
+
+    assert loader.calls == 1
+    assert all(version is versions[0] for version in versions)
+    # A load on the loop would have let the ticker run at most once.
+    assert ticks >= 10
+
+
+def test_reload_swaps_in_a_new_version():
+    data = dict(HSN_MAP)
+    store = HsnDataStore("unused.xlsx", loader=lambda path: dict(data), build_search_index=False)
+    old_version = store.current_version()
+
+    data["02"] = "MEAT AND EDIBLE MEAT OFFAL"
+    assert store.reload() is True
+
+    # A caller still holding the old version keeps seeing the old data.
+    assert "02" not in old_version.data and old_version.index.nearest_ancestor("0201") is None
+    assert store.get()["02"] == "MEAT AND EDIBLE MEAT OFFAL"
+    assert store.get_index().nearest_ancestor("0201")["hsn"] == "02"
+    assert store.health()["reload_count"] == 1
+
+
+def test_old_version_serves_requests_while_a_reload_runs():
+    loader = _Loader()
+    store = HsnDataStore("unused.xlsx", loader=loader, build_search_index=False)
+    old_version = store.current_version()
+
+    loader.delay = 0.3
+    thread = store.request_reload()
+    time.sleep(0.05)
+    assert store.health()["reloading"] is True
+    assert store.current_version() is old_version
+
+    thread.join()
+    assert store.current_version() is not old_version and loader.calls == 2
+
+
+def test_failed_reload_keeps_the_current_version():
+    data = {"value": dict(HSN_MAP)}
+    store = HsnDataStore("unused.xlsx", loader=lambda path: data["value"], build_search_index=False)
+    version = store.current_version()
+
+    data["value"] = {}
+    assert store.reload() is False
+    assert store.current_version() is version
+    assert store.health()["status"] == STATUS_LOADED and "No HSN codes" in store.health()["error"]
+
+
+def test_watcher_reloads_when_the_source_file_changes(tmp_path):
+    source = tmp_path / "HSN_SAC.xlsx"
+    source.write_text("v1")
+    store = HsnDataStore(str(source), loader=lambda path: {**HSN_MAP, "00": open(path).read()},
+                         build_search_index=False)
+    assert store.get()["00"] == "v1"
+
+    store.start_watching(interval=0.02)
+    try:
+        source.write_text("v2, longer")
+        deadline = time.monotonic() + 5
+        while store.get()["00"] != "v2, longer" and time.monotonic() < deadline:
+            time.sleep(0.02)
+    finally:
+        store.stop_watching()
+    assert store.get()["00"] == "v2, longer"
+    assert store.health()["data_version"] != "unknown"
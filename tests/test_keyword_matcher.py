@@ -0,0 +1,89 @@
+import random
+import re
+
+import pytest
+
+from settyl.keyword_matcher import KeywordMatcher, SessionScanCache, get_keyword_matcher
+
+TERMS = ["STUPID", "block", "bad  word", "c++", "x-ray", "ab", "abc", "bc", "-dash"]
+WORDS = ["block", "blockchain", "unblock", "BLOCK", "stupidity", "Stupid", "bad", "word", "c++", "c", "x-ray",
+         "xray", "abc", "ab", "bc", "cab", "block_x", "-dash", "dash", "copper", "wire", "8471"]
+SEPARATORS = [" ", "  ", "\t", "\n", ", ", ".", "-", "_", "!"]
+
+
+def _regex_for(term: str) -> "re.Pattern":
+    """The regex equivalent of one term: \\b where it has word characters, \\s+ between its words."""
+    words = term.split()
+    pattern = r"\s+".join(re.escape(word) for word in words)
+    if re.match(r"\w", words[0]):
+        pattern = r"(?<!\w)" + pattern
+    if re.match(r"\w", words[-1][-1]):
+        pattern += r"(?!\w)"
+    return re.compile(pattern, re.IGNORECASE)
+
+
+REGEXES = {term: _regex_for(term) for term in TERMS}
+
+
+def _random_text(rng: random.Random) -> str:
+    return "".join(rng.choice(WORDS) + rng.choice(SEPARATORS) for _ in range(rng.randint(0, 12)))
+
+
+@pytest.fixture(scope="module")
+def matcher():
+    return KeywordMatcher(TERMS)
+
+
+def test_matches_agree_with_per_term_regexes(matcher):
+    rng = random.Random(7)
+    for _ in range(3000):
+        text = _random_text(rng)
+        expected = {term for term, regex in REGEXES.items() if regex.search(text)}
+
+        assert {match.term for match in matcher.find_all(text)} == expected, text
+        assert (matcher.search(text) is not None) == bool(expected), text
+
+
+def test_whole_words_case_and_whitespace(matcher):
+    assert matcher.search("please BLOCK this").term == "block"
+    assert matcher.search("a blockchain invoice") is None
+    assert matcher.search("that is a BAD \t\n WORD").term == "bad  word"
+    assert [match.term for match in matcher.find_all("abc")] == ["abc"]
+
+
+def test_matches_never_span_two_parts(matcher):
+    assert matcher.search("bad", "word") is None
+    assert matcher.find_all("copper", "block")[0].start == len("copper\n")
+
+
+def test_substring_mode_agrees_with_the_old_upper_case_check():
+    # The guardrail used to block when `term in text.upper()` for each term.
+    terms = ["STUPID", "BLOCK", "C++", "AB", "BC"]
+    matcher = KeywordMatcher(terms, word_boundaries=False)
+    rng = random.Random(11)
+    for _ in range(3000):
+        text = _random_text(rng)
+        expected = {term for term in terms if term in " ".join(text.upper().split())}
+        assert {match.term for match in matcher.find_all(text)} == expected, text
+
+
+def test_term_file_changes_rebuild_the_matcher(tmp_path):
+    path = tmp_path / "terms.txt"
+    path.write_text("# comment\nfoo\n")
+    first = get_keyword_matcher(str(path))
+    assert get_keyword_matcher(str(path)) is first and first.search("FOO bar")
+
+    path.write_text("# comment\nfoo\nbar baz\n")
+    second = get_keyword_matcher(str(path))
+    assert second is not first and second.search("bar   baz").term == "bar baz"
+
+
+def test_scan_cache_reuses_verdicts_only_for_the_same_matcher():
+    cache = SessionScanCache(max_entries_per_session=2)
+    matcher = KeywordMatcher(["block"])
+    assert cache.search("s1", ["please block"], matcher).term == "block"
+    assert cache.search("s1", ["please block"], matcher).term == "block"
+    assert cache.stats()["hits"] == 1
+
+    assert cache.search("s1", ["please block"], KeywordMatcher(["other"])) is None
+    assert cache.stats()["misses"] == 2
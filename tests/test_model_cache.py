@@ -0,0 +1,41 @@
+from google.adk.models.llm_request import LlmRequest
+from google.genai import types
+
+from adk_utils.model_cache import request_key
+
+
+def _text(role, text):
+    return types.Content(role=role, parts=[types.Part(text=text)])
+
+
+def _request(*contents, instruction="You validate HSN codes."):
+    return LlmRequest(model="gemini-2.0-flash", contents=list(contents),
+                      config=types.GenerateContentConfig(system_instruction=instruction))
+
+
+# Two users whose conversations end with the same question.
+ALICE = [_text("user", "My code is 0101."), _text("model", "0101 is valid."), _text("user", "Is it valid?")]
+BOB = [_text("user", "My code is 9954."), _text("model", "9954 is restricted."), _text("user", "Is it valid?")]
+
+
+def test_same_last_turn_with_different_history_gets_different_keys():
+    assert request_key(_request(*ALICE)) != request_key(_request(*BOB))
+
+
+def test_identical_requests_share_a_key_up_to_case_and_whitespace():
+    shouted = ALICE[:-1] + [_text("user", "  IS it   valid? ")]
+
+    assert request_key(_request(*ALICE)) == request_key(_request(*shouted))
+
+
+def test_key_covers_instruction_and_stream_mode():
+    key = request_key(_request(*ALICE))
+
+    assert key != request_key(_request(*ALICE, instruction="Answer in French."))
+    assert key != request_key(_request(*ALICE), stream=True)
+
+
+def test_context_turns_limits_the_history_only_when_asked():
+    # Opting in to a window of 0 earlier turns makes the two users share an entry.
+    assert request_key(_request(*ALICE), context_turns=0) == request_key(_request(*BOB), context_turns=0)
+    assert request_key(_request(*ALICE), context_turns=1) != request_key(_request(*BOB), context_turns=1)
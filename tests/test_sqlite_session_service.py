@@ -0,0 +1,97 @@
+import asyncio
+import gc
+import sqlite3
+import weakref
+
+import pytest
+from google.adk.events.event import Event
+from google.adk.events.event_actions import EventActions
+from google.genai import types
+
+from adk_utils import sqlite_session_service
+from adk_utils.sqlite_session_service import SqliteSessionService
+
+APP, USER = "app", "user"
+
+
+def _event(author, text=None, call=None, state_delta=None):
+    part = types.Part(text=text) if call is None else types.Part(function_call=types.FunctionCall(name=call, args={}))
+    return Event(author=author, invocation_id="e-1", content=types.Content(role="model", parts=[part]),
+                 actions=EventActions(state_delta=state_delta or {}))
+
+
+def _stored_events(db_path):
+    with sqlite3.connect(db_path) as conn:
+        return [row[0] for row in conn.execute("SELECT author FROM events ORDER BY seq")]
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    return str(tmp_path / "sessions.db")
+
+
+def test_turn_is_written_when_the_final_response_arrives(db_path):
+    service = SqliteSessionService(db_path)
+
+    async def main():
+        session = await service.create_session(app_name=APP, user_id=USER, state={"user:name": "Asha"})
+        await service.append_event(session, _event("user", "validate 8471"))
+        await service.append_event(session, _event("agent", call="hsn_code_validation_tool",
+                                                   state_delta={"hsn_tool_last_result": {"total": 1}}))
+        assert _stored_events(db_path) == []
+        await service.append_event(session, _event("agent", "8471 is valid."))
+        return session
+
+    session = asyncio.run(main())
+
+    assert _stored_events(db_path) == ["user", "agent", "agent"]
+    reopened = SqliteSessionService(db_path)
+    stored = asyncio.run(reopened.get_session(app_name=APP, user_id=USER, session_id=session.id))
+    assert stored.state == {"user:name": "Asha", "hsn_tool_last_result": {"total": 1}}
+    assert [event.id for event in stored.events] == [event.id for event in session.events]
+
+
+def test_reads_flush_pending_events_and_batches_are_capped(db_path):
+    service = SqliteSessionService(db_path, max_batch_events=3)
+
+    async def main():
+        session = await service.create_session(app_name=APP, user_id=USER)
+        for _ in range(2):
+            await service.append_event(session, _event("agent", call="tool"))
+        assert _stored_events(db_path) == []
+        stored = await service.get_session(app_name=APP, user_id=USER, session_id=session.id)
+        assert len(stored.events) == 2 and len(_stored_events(db_path)) == 2
+
+        for _ in range(3):
+            await service.append_event(session, _event("agent", call="tool"))
+
+    asyncio.run(main())
+    assert len(_stored_events(db_path)) == 5
+
+
+def test_unbatched_service_writes_every_event(db_path):
+    service = SqliteSessionService(db_path, batch_events=False)
+
+    async def main():
+        session = await service.create_session(app_name=APP, user_id=USER)
+        await service.append_event(session, _event("user", "hello"))
+
+    asyncio.run(main())
+    assert _stored_events(db_path) == ["user"]
+
+
+def test_exit_hook_flushes_live_services_without_keeping_them_alive(db_path):
+    service = SqliteSessionService(db_path)
+
+    async def main():
+        session = await service.create_session(app_name=APP, user_id=USER)
+        await service.append_event(session, _event("user", "hello"))
+
+    asyncio.run(main())
+    sqlite_session_service._flush_live_services()
+    assert _stored_events(db_path) == ["user"]
+
+    reference = weakref.ref(service)
+    del service
+    gc.collect()
+    assert reference() is None
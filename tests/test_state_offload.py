@@ -0,0 +1,57 @@
+import asyncio
+
+import pytest
+from google.adk.events.event import Event
+from google.adk.events.event_actions import EventActions
+from google.adk.sessions import InMemorySessionService
+
+from adk_utils.state_offload import BlobStore, OffloadingSessionService, is_handle, offload_large_values
+
+ROWS = [{"input_hsn": f"{i:08d}", "is_valid": i % 3 != 0, "message": "HSN code is valid."} for i in range(2_000)]
+
+
+@pytest.mark.parametrize("on_disk", [True, False])
+def test_blob_store_round_trip_and_deduplication(tmp_path, on_disk):
+    store = BlobStore(str(tmp_path / "blobs") if on_disk else None)
+
+    handle = store.put(ROWS)
+    assert store.put(list(ROWS)) == handle
+    assert handle["type"] == "list" and handle["length"] == len(ROWS)
+    assert store.get(handle) == ROWS
+    assert store.get(handle) is not store.get(handle)
+
+
+def test_memory_store_drops_the_least_recently_used_blobs():
+    store = BlobStore(max_memory_bytes=100)
+    first, second = store.put("a" * 60), store.put("b" * 60)
+
+    assert store.get(second) == "b" * 60
+    with pytest.raises(KeyError):
+        store.get(first)
+
+
+def test_only_large_values_are_offloaded():
+    delta = {"rows": ROWS, "turns": 3, "note": "short", "flags": [1, 2]}
+    assert offload_large_values(delta, BlobStore(), threshold_bytes=1024) == 1
+    assert is_handle(delta["rows"])
+    assert delta["turns"] == 3 and delta["note"] == "short" and delta["flags"] == [1, 2]
+
+
+def test_session_service_round_trip(tmp_path):
+    service = OffloadingSessionService(InMemorySessionService(), BlobStore(str(tmp_path)), threshold_bytes=1024)
+
+    async def main():
+        session = await service.create_session(app_name="app", user_id="user", state={"seed": ROWS})
+        event = Event(author="agent", invocation_id="e-1",
+                      actions=EventActions(state_delta={"rows": ROWS, "count": len(ROWS)}))
+        await service.append_event(session, event)
+        stored = await service.get_session(app_name="app", user_id="user", session_id=session.id)
+        return event, stored
+
+    event, stored = asyncio.run(main())
+
+    assert is_handle(event.actions.state_delta["rows"])
+    assert is_handle(stored.state["rows"]) and is_handle(stored.state["seed"])
+    assert stored.state["count"] == len(ROWS)
+    assert service.load(stored, "rows") == ROWS and service.load(stored, "seed") == ROWS
+    assert service.load(stored, "missing", "default") == "default"
@@ -0,0 +1,53 @@
+import io
+import json
+import logging
+
+import pytest
+
+from settyl.structured_logging import EventLogger, configure_logging, ensure_logging_configured, shutdown_logging
+
+
+@pytest.fixture
+def stream():
+    stream = io.StringIO()
+    yield stream
+    # Restore the default configuration for the rest of the test session.
+    shutdown_logging()
+    logging.getLogger("settyl.events").handlers.clear()
+    ensure_logging_configured()
+
+
+def test_events_are_written_as_json_lines(stream):
+    configure_logging(level="DEBUG", stream=stream)
+    EventLogger("agent", sample_rates={}).info("tool.called", tool="hsn", session="s1", latency_ms=1.5, codes=3)
+    shutdown_logging()
+
+    line = json.loads(stream.getvalue())
+    assert line["event"] == "tool.called" and line["logger"] == "settyl.events.agent"
+    assert [key for key in line if key not in ("ts", "level", "logger", "event")] == [
+        "tool", "session", "latency_ms", "codes"]
+
+
+def test_settyl_logger_keeps_propagating(stream, caplog):
+    configure_logging(stream=stream)
+
+    assert logging.getLogger("settyl").propagate is True
+    assert logging.getLogger("settyl").handlers == []
+    with caplog.at_level(logging.INFO):
+        logging.getLogger("settyl.hsn_store").info("plain record")
+        EventLogger("agent", sample_rates={}).info("event record")
+    shutdown_logging()
+
+    # Plain 'settyl' records reach the root handlers; events are written once, to the stream only.
+    assert [record.getMessage() for record in caplog.records] == ["plain record"]
+    assert json.loads(stream.getvalue())["event"] == "event record"
+
+
+def test_sampled_out_events_are_not_written(stream):
+    configure_logging(stream=stream)
+    logger = EventLogger("agent", sample_rates={"noisy": 0.0})
+    logger.info("noisy")
+    logger.warning("noisy")
+    shutdown_logging()
+
+    assert [json.loads(line)["level"] for line in stream.getvalue().splitlines()] == ["WARNING"]